@@ -0,0 +1,57 @@
+import numpy as np
+from typing import Dict, Optional
+from results import SimResultBatch
+
+# Floors hard-coded in simulate_one
+PRICE_FLOOR = 0.01
+PROVIDER_FLOOR = 2.0
+SUPPLY_FLOOR = 1000.0
+
+# A path counts as collapsed while its price is within 1% of the floor (the burn
+# branch re-quotes the floor as 0.01001, the reserve branch only halves the last
+# drop, so neither sits exactly on 0.01) or its providers are on their floor.
+PRICE_DEATH_LEVEL = PRICE_FLOOR * 1.01
+PROVIDER_DEATH_LEVEL = PROVIDER_FLOOR * (1 + 1e-9)
+
+def collapsed(batch: SimResultBatch) -> np.ndarray:
+    """(n_sims, T) mask of weeks spent in the collapse regime"""
+    return (batch['price'] <= PRICE_DEATH_LEVEL) | (batch['providers'] <= PROVIDER_DEATH_LEVEL)
+
+def time_of_death(batch: SimResultBatch) -> np.ndarray:
+    """
+    First week from which a path stays collapsed through the horizon, as a
+    float per path; NaN for paths that are alive at the final week.
+    """
+    mask = collapsed(batch)
+    # stays[i, t]: collapsed at every week t..T-1
+    stays = np.flip(np.logical_and.accumulate(np.flip(mask, axis=1), axis=1), axis=1)
+    dead = stays[:, -1] if mask.shape[1] else np.zeros(mask.shape[0], dtype=bool)
+    weeks = np.argmax(stays, axis=1).astype(float)
+    weeks[~dead] = np.nan
+    return weeks
+
+def death_histogram(batch: SimResultBatch) -> np.ndarray:
+    """Counts of time of death per week, plus survivors in the last slot: shape (T + 1,)"""
+    weeks = time_of_death(batch)
+    slots = np.where(np.isnan(weeks), batch.T, weeks).astype(np.int64)
+    return np.bincount(slots, minlength=batch.T + 1)
+
+def death_summary(histogram: np.ndarray) -> Dict[str, Optional[float]]:
+    """Run stats for a death histogram: detection count, probability, and quantiles of the week of death"""
+    T = len(histogram) - 1
+    n_sims = int(histogram.sum())
+    n_dead = int(histogram[:T].sum())
+
+    def week_quantile(q: float) -> Optional[float]:
+        if n_dead == 0:
+            return None
+        return float(np.searchsorted(np.cumsum(histogram[:T]), q * n_dead))
+
+    return {
+        "n_absorbed": n_dead,
+        "death_probability": n_dead / n_sims if n_sims else 0.0,
+        "time_of_death_p05": week_quantile(0.05),
+        "time_of_death_median": week_quantile(0.5),
+        "time_of_death_p95": week_quantile(0.95),
+        "survival": (1 - np.cumsum(histogram[:T]) / max(n_sims, 1)).tolist(),
+    }
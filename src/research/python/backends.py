@@ -0,0 +1,56 @@
+import warnings
+import numpy as np
+from typing import Callable, Dict, Sequence
+from engine import SimulationParams, simulate_one
+from batch_engine import simulate_batch, simulate_rows
+from results import SimResultBatch, path_to_array
+import jit_kernel
+
+# backend(params, seeds, shocks=None) -> SimResultBatch
+Backend = Callable[..., SimResultBatch]
+BACKENDS: Dict[str, Backend] = {}
+
+def register_backend(name: str):
+    def decorator(fn: Backend) -> Backend:
+        BACKENDS[name] = fn
+        return fn
+    return decorator
+
+def get_backend(name: str) -> Backend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}' (available: {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+def get_row_kernel(name: str) -> Callable[..., SimResultBatch]:
+    """kernel(plan, demands, shocks) -> SimResultBatch over per-row parameter plans"""
+    if name == 'numpy' or (name == 'jit' and not jit_kernel.HAS_NUMBA):
+        return simulate_rows
+    if name == 'jit':
+        return jit_kernel.simulate_rows
+    raise ValueError(f"Backend '{name}' cannot run mixed parameter batches (use 'numpy' or 'jit')")
+
+def simulate(params: SimulationParams, seeds: Sequence[int], backend: str = 'numpy', shocks: np.ndarray = None) -> SimResultBatch:
+    return get_backend(backend)(params, seeds, shocks)
+
+@register_backend('python')
+def run_python(params: SimulationParams, seeds: Sequence[int], shocks: np.ndarray = None) -> SimResultBatch:
+    """Reference engine: one simulate_one call per seed"""
+    if shocks is not None:
+        raise ValueError("The python backend draws its own shocks from each seed")
+    return SimResultBatch(np.stack([path_to_array(simulate_one(params, int(seed))) for seed in seeds]))
+
+@register_backend('numpy')
+def run_numpy(params: SimulationParams, seeds: Sequence[int], shocks: np.ndarray = None) -> SimResultBatch:
+    return simulate_batch(params, seeds, shocks)
+
+_warned_no_jit = False
+
+@register_backend('jit')
+def run_jit(params: SimulationParams, seeds: Sequence[int], shocks: np.ndarray = None) -> SimResultBatch:
+    global _warned_no_jit
+    if not jit_kernel.HAS_NUMBA:
+        if not _warned_no_jit:
+            warnings.warn("numba is not installed; the 'jit' backend is using the NumPy engine")
+            _warned_no_jit = True
+        return run_numpy(params, seeds, shocks)
+    return jit_kernel.simulate_plan(params, seeds, shocks)
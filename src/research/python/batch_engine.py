@@ -0,0 +1,235 @@
+import numpy as np
+from typing import Sequence
+from engine import SimulationParams, demand_from_noise
+from results import SimResultBatch
+
+# Shock tensor layout: shocks[sim, t, k]
+SHOCK_DEMAND = 0    # demand noise (get_demand_series)
+SHOCK_PROVIDER = 1  # provider growth noise
+SHOCK_PRICE = 2     # price log-return noise (unused on the unlock week)
+N_SHOCKS = 3
+
+# Numeric parameter plan: SimulationParams resolved once into a flat float64 vector,
+# so the step kernels never touch dataclass attributes or compare strings.
+# Stacking one plan row per path lets a single batch mix parameter sets.
+PLAN_FIELDS = (
+    'initialSupply', 'initialPrice', 'initialProviders', 'maxMintWeekly', 'burnPct',
+    'initialLiquidity', 'investorUnlockWeek', 'investorSellPct', 'providerCostPerWeek',
+    'baseCapacityPerProvider', 'kDemandPrice', 'kMintPrice', 'rewardLagWeeks',
+    'churnThreshold', 'hardwareCost', 'competitorYield',
+    'mu', 'sigma', 'kpiEmissions', 'reserveStrategy',
+)
+(P_SUPPLY, P_PRICE, P_PROVIDERS, P_MAX_MINT, P_BURN_PCT,
+ P_LIQUIDITY, P_UNLOCK_WEEK, P_SELL_PCT, P_COST,
+ P_CAPACITY, P_K_DEMAND, P_K_MINT, P_LAG,
+ P_CHURN_THRESHOLD, P_HARDWARE, P_COMPETITOR_YIELD,
+ P_MU, P_SIGMA, P_KPI, P_RESERVE) = range(len(PLAN_FIELDS))
+
+def macro_drift(macro: str) -> tuple[float, float]:
+    """(mu, sigma) of the weekly price log-return"""
+    if macro == 'bearish':
+        return -0.01, 0.06
+    if macro == 'bullish':
+        return 0.015, 0.06
+    return 0.002, 0.05
+
+def resolve_plan(params: SimulationParams) -> np.ndarray:
+    mu, sigma = macro_drift(params.macro)
+    values = {name: getattr(params, name) for name in PLAN_FIELDS if hasattr(params, name)}
+    values['initialProviders'] = params.initialProviders or 30
+    values['rewardLagWeeks'] = max(1, params.rewardLagWeeks)
+    values.update(
+        mu=mu,
+        sigma=sigma,
+        kpiEmissions=1.0 if params.emissionModel == 'kpi' else 0.0,
+        reserveStrategy=1.0 if params.revenueStrategy == 'reserve' else 0.0,
+    )
+    return np.array([values[name] for name in PLAN_FIELDS], dtype=np.float64)
+
+def plan_rows(params: SimulationParams, n: int) -> np.ndarray:
+    """(n, P) plan with the same parameter set on every row"""
+    return np.tile(resolve_plan(params), (n, 1))
+
+def draw_shocks(params: SimulationParams, seeds: Sequence[int]) -> np.ndarray:
+    """
+    Replays the draw order of simulate_one for every seed, so the batch
+    engine reproduces the scalar engine path for path.
+    """
+    T = params.T
+    unlock_in_horizon = 0 <= params.investorUnlockWeek < T
+    n_step_draws = 2 * T - (1 if unlock_in_horizon else 0)
+
+    # Position of each step draw inside the per-seed stream (after the T demand draws)
+    provider_idx = np.zeros(T, dtype=np.int64)
+    price_idx = np.full(T, -1, dtype=np.int64)
+    pos = 0
+    for t in range(T):
+        provider_idx[t] = pos
+        pos += 1
+        if t != params.investorUnlockWeek:
+            price_idx[t] = pos
+            pos += 1
+    has_price = price_idx >= 0
+
+    shocks = np.zeros((len(seeds), T, N_SHOCKS))
+    for i, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        shocks[i, :, SHOCK_DEMAND] = rng.normal(0, 1, T)
+        steps = rng.normal(size=n_step_draws)
+        shocks[i, :, SHOCK_PROVIDER] = steps[provider_idx]
+        shocks[i, has_price, SHOCK_PRICE] = steps[price_idx[has_price]]
+    return shocks
+
+def simulate_batch(params: SimulationParams, seeds: Sequence[int], shocks: np.ndarray = None) -> SimResultBatch:
+    """
+    Vectorized simulate_one: every path advances together as (n_sims,) arrays
+    and data-dependent branches become masks.
+    """
+    if shocks is None:
+        shocks = draw_shocks(params, seeds)
+    demands = demand_from_noise(params.T, 12000, params.demandType, shocks[:, :, SHOCK_DEMAND])
+    return simulate_rows(plan_rows(params, shocks.shape[0]), demands, shocks)
+
+def simulate_rows(plan: np.ndarray, demands: np.ndarray, shocks: np.ndarray) -> SimResultBatch:
+    """
+    Batch step over per-row parameter plans: plan (n, P), demands (n, T),
+    shocks (n, T, N_SHOCKS). Rows may carry different parameter sets.
+    """
+    n, T = demands.shape
+    rows = np.arange(n)
+    batch = SimResultBatch.empty(n, T)
+    out = batch.columns()  # views into batch.data
+
+    cost = plan[:, P_COST]
+    max_mint = plan[:, P_MAX_MINT]
+    is_kpi = plan[:, P_KPI] > 0
+    is_reserve = plan[:, P_RESERVE] > 0
+    has_vampire = plan[:, P_COMPETITOR_YIELD] > 0.2
+
+    supply = plan[:, P_SUPPLY].copy()
+    price = plan[:, P_PRICE].copy()
+    providers = plan[:, P_PROVIDERS].copy()
+    service_price = np.full(n, 0.5)
+    treasury = np.zeros(n)
+    low_profit_weeks = np.zeros(n)
+
+    # Reward lag as a ring buffer: slot t % lag is written, slot (t + 1) % lag is the oldest
+    lag = plan[:, P_LAG].astype(np.int64)
+    reward_history = np.repeat((cost * 1.5)[:, np.newaxis], lag.max(), axis=1)
+
+    # AMM Initial
+    pool_usd = plan[:, P_LIQUIDITY].copy()
+    pool_tokens = pool_usd / price
+    k_amm = pool_usd * pool_tokens
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for t in range(T):
+            demand = demands[:, t]
+            capacity = np.maximum(0.001, providers * plan[:, P_CAPACITY])
+            demand_served = np.minimum(demand, capacity)
+            utilization = (demand_served / capacity) * 100
+
+            scarcity = (demand - capacity) / capacity
+            service_price = np.minimum(np.maximum(service_price * (1 + 0.6 * scarcity), 0.05), 5.0)
+
+            safe_price = np.maximum(price, 0.0001)
+            tokens_spent = (demand_served * service_price) / safe_price
+            burned = np.minimum(supply * 0.95, plan[:, P_BURN_PCT] * tokens_spent)
+
+            # Emissions
+            saturation = np.minimum(1.0, providers / 5000.0)
+            emission_factor = 0.6 + 0.4 * np.tanh(demand / 15000.0) - (0.2 * saturation)
+            kpi_factor = emission_factor * np.maximum(0.3, np.minimum(1, demand_served / capacity))
+            kpi_factor = np.where(price < plan[:, P_PRICE] * 0.8, kpi_factor * 0.6, kpi_factor)
+            emission_factor = np.where(is_kpi, kpi_factor, emission_factor)
+
+            minted = np.maximum(0, np.minimum(max_mint, max_mint * emission_factor))
+            supply = np.maximum(1000.0, supply + minted - burned)
+
+            # Rewards
+            instant_reward_value = (minted / np.maximum(providers, 0.1)) * safe_price
+            reward_history[rows, t % lag] = instant_reward_value
+            delayed_reward = reward_history[rows, (t + 1) % lag]
+            profit = delayed_reward - cost
+            incentive = profit / cost
+
+            low_profit_weeks = np.where(profit < plan[:, P_CHURN_THRESHOLD],
+                                        low_profit_weeks + 1,
+                                        np.maximum(0, low_profit_weeks - 1))
+            churn_multiplier = np.where(low_profit_weeks > 5, 4.0, np.where(low_profit_weeks > 2, 1.8, 1.0))
+
+            # Provider Growth/Churn
+            max_growth = providers * 0.15
+            raw_delta = (incentive * 4.5 * churn_multiplier) + shocks[:, t, SHOCK_PROVIDER] * 0.5
+            delta = np.maximum(-providers * 0.1, np.minimum(max_growth, raw_delta))
+
+            # Vampire Attack
+            vampire_churn_amount = np.where(has_vampire, providers * plan[:, P_COMPETITOR_YIELD] * 0.025, 0)
+            delta = delta - vampire_churn_amount
+
+            # ROI Churn
+            payback_months = np.where(instant_reward_value > 0,
+                                      plan[:, P_HARDWARE] / (instant_reward_value * 4.33), 999)
+            delta = delta - np.where(payback_months > 24, providers * 0.0125, 0)
+            delta = delta - np.where(payback_months > 36, providers * 0.025, 0)
+
+            # Price Model: unlock week dumps into the AMM, other weeks follow the log-return model
+            is_unlock = plan[:, P_UNLOCK_WEEK] == t
+
+            unlock_amount = supply * plan[:, P_SELL_PCT]
+            unlock_pool_tokens = pool_tokens + unlock_amount
+            unlock_pool_usd = k_amm / unlock_pool_tokens
+            unlock_price = unlock_pool_usd / unlock_pool_tokens
+            price_drop_pct = np.maximum(0, 1 - (unlock_price / price))
+            panic_churn = providers * price_drop_pct * 1.5
+
+            demand_pressure = plan[:, P_K_DEMAND] * np.tanh(scarcity)
+            dilution_pressure = -plan[:, P_K_MINT] * (minted / supply) * 100
+            log_ret = plan[:, P_MU] + demand_pressure + dilution_pressure + plan[:, P_SIGMA] * shocks[:, t, SHOCK_PRICE]
+            market_price = np.maximum(0.01, price * np.exp(log_ret))
+
+            next_price = np.where(is_unlock, unlock_price, market_price)
+            net_flow = np.where(is_unlock, -unlock_amount, 0)
+            delta = np.where(is_unlock, delta - panic_churn, delta)
+            # Re-sync AMM
+            pool_usd = np.where(is_unlock, unlock_pool_usd, np.sqrt(k_amm * market_price))
+            pool_tokens = np.where(is_unlock, unlock_pool_tokens, np.sqrt(k_amm / market_price))
+
+            # Treasury / Sinking Fund
+            daily_mint_usd = (minted / 7) * price
+            daily_burn_usd = (burned / 7) * price
+            net_daily_loss = daily_burn_usd - daily_mint_usd
+            solvency_score = np.where(daily_mint_usd > 0, daily_burn_usd / daily_mint_usd, 10)
+
+            treasury = np.where(is_reserve, treasury + minted * price * 0.1, treasury)
+            next_price = np.where(is_reserve,
+                                  np.where(next_price < price, price - ((price - next_price) * 0.5), next_price),
+                                  next_price * 1.001)
+
+            out['price'][:, t] = price
+            out['supply'][:, t] = supply
+            out['demand'][:, t] = demand
+            out['demand_served'][:, t] = demand_served
+            out['providers'][:, t] = providers
+            out['capacity'][:, t] = capacity
+            out['servicePrice'][:, t] = service_price
+            out['minted'][:, t] = minted
+            out['burned'][:, t] = burned
+            out['utilization'][:, t] = utilization
+            out['profit'][:, t] = profit
+            out['scarcity'][:, t] = scarcity
+            out['incentive'][:, t] = incentive
+            out['solvencyScore'][:, t] = solvency_score
+            out['netDailyLoss'][:, t] = net_daily_loss
+            out['dailyMintUsd'][:, t] = daily_mint_usd
+            out['dailyBurnUsd'][:, t] = daily_burn_usd
+            out['netFlow'][:, t] = net_flow
+            out['churnCount'][:, t] = np.where(delta < 0, np.abs(delta), 0)
+            out['joinCount'][:, t] = np.where(delta > 0, delta, 0)
+            out['treasuryBalance'][:, t] = treasury
+            out['vampireChurn'][:, t] = vampire_churn_amount
+
+            price = next_price
+            providers = np.maximum(2, providers + delta)
+
+    return batch
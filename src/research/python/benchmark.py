@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing import Pipe, Process, cpu_count
+from typing import Callable, Dict, List, Optional, Sequence
+from engine import simulate_one, get_demand_series, RESULT_FIELDS
+from monte_carlo import run_monte_carlo, aggregate_results, baseline_params, make_seeds
+from batch_engine import simulate_batch
+from results import SimResultBatch
+import export_data
+
+# Sweep grids: 'quick' is CI-sized, 'full' covers T 52->520, n_sims 100->100k and every pool size
+PROFILES = {
+    'quick': {'T': (52, 104), 'n_sims': (100, 1000), 'workers': (1, 2), 'export_sims': 200},
+    'full': {'T': (52, 104, 260, 520), 'n_sims': (100, 1000, 10_000, 100_000),
+             'workers': tuple(sorted({1, 2, 4, cpu_count()})), 'export_sims': 1000},
+}
+DEFAULT_THRESHOLD = 0.15
+MAX_TENSOR_BYTES = 2 * 2**30  # (n_sims, T, n_fields) float64 cases above this are skipped
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.bench', 'baseline.json')
+
+@dataclass
+class BenchCase:
+    """One benchmark: `setup()` returns the call to time; each call does `units` sims (or weeks)"""
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    units: int
+    repeat: int = 5
+    config: dict = dataclasses.field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return self.name + ''.join(f' {k}={v}' for k, v in self.config.items())
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process plus its largest finished child"""
+    scale = 1 / 2**20 if sys.platform == 'darwin' else 1 / 2**10  # ru_maxrss is bytes on macOS, KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+def time_case(case: BenchCase) -> dict:
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn = case.setup()
+        fn()  # warm-up: imports, pool start-up paths, JIT compilation
+        for _ in range(case.repeat):
+            began = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - began)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {'throughput': case.units / p50, 'p50': float(p50), 'p95': float(p95), 'peak_rss_mb': peak_rss_mb()}
+
+def _run_isolated(case: BenchCase, conn):
+    try:
+        conn.send(time_case(case))
+    except BaseException as e:
+        conn.send({'error': f'{type(e).__name__}: {e}'})
+    finally:
+        conn.close()
+
+def measure(case: BenchCase, isolate: bool = True) -> dict:
+    """
+    Times a case in a fresh forked process (non-daemonic, so it may start
+    its own pool) so that peak RSS is per case rather than a session high-water mark.
+    """
+    if not isolate:
+        return time_case(case)
+    parent, child = Pipe(duplex=False)
+    proc = Process(target=_run_isolated, args=(case, child))
+    with contextlib.redirect_stdout(io.StringIO()):
+        proc.start()
+        child.close()
+        result = parent.recv()
+        proc.join()
+    if 'error' in result:
+        raise RuntimeError(f"{case.key}: {result['error']}")
+    return result
+
+def _export_all(n_sims: int, processes: int):
+    def run():
+        with tempfile.TemporaryDirectory() as output_dir:
+            export_data.export_all_research_data(n_sims=n_sims, processes=processes, output_dir=output_dir)
+    return run
+
+def _aggregate(params, n_sims: int):
+    def setup():
+        # Aggregation cost depends on shape, not values: tile a smaller simulated batch
+        batch = simulate_batch(params, make_seeds(min(n_sims, 10_000), 0))
+        reps = -(-n_sims // batch.n_sims)
+        batch = SimResultBatch(np.tile(batch.data, (reps, 1, 1))[:n_sims])
+        return lambda: aggregate_results(batch, params.T)
+    return setup
+
+def build_cases(profile: str = 'quick', backend: str = 'python',
+                max_tensor_bytes: int = MAX_TENSOR_BYTES) -> List[BenchCase]:
+    grid = PROFILES[profile]
+    cases = []
+    for T in grid['T']:
+        params = dataclasses.replace(baseline_params(), T=T)
+        cases.append(BenchCase('simulate_one', lambda p=params: lambda: simulate_one(p, 42), 1, 20, {'T': T}))
+        cases.append(BenchCase(
+            'get_demand_series',
+            lambda T=T: partial(get_demand_series, T, 12000, 'growth', np.random.default_rng(0)), T, 200, {'T': T}))
+        for n_sims in grid['n_sims']:
+            if n_sims * T * len(RESULT_FIELDS) * 8 > max_tensor_bytes:
+                continue  # full-path cases this large belong to streaming / trajectory-store runs
+            cases.append(BenchCase('aggregate_results', _aggregate(params, n_sims), n_sims, 5,
+                                   {'T': T, 'n_sims': n_sims}))
+            seeds = make_seeds(n_sims, 0)
+            for workers in grid['workers']:
+                cases.append(BenchCase(
+                    'run_monte_carlo',
+                    lambda p=params, s=seeds, w=workers: partial(run_monte_carlo, p, seeds=s, backend=backend, processes=w),
+                    n_sims, 3, {'T': T, 'n_sims': n_sims, 'workers': workers, 'backend': backend}))
+    for workers in grid['workers']:
+        cases.append(BenchCase('export_all_research_data', lambda w=workers: _export_all(grid['export_sims'], w),
+                               4 * grid['export_sims'], 3, {'n_sims': grid['export_sims'], 'workers': workers}))
+    return cases
+
+def run_suite(cases: Sequence[BenchCase], isolate: bool = True, log=print) -> dict:
+    results = {}
+    for case in cases:
+        results[case.key] = dict(measure(case, isolate), config=case.config)
+        r = results[case.key]
+        log(f"{case.key:<70} {r['throughput']:>12.0f}/s  p50 {r['p50'] * 1e3:>9.2f}ms  "
+            f"p95 {r['p95'] * 1e3:>9.2f}ms  rss {r['peak_rss_mb']:>7.1f}MB")
+    add_scaling_efficiency(results)
+    return {'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': cpu_count()},
+            'results': results}
+
+def add_scaling_efficiency(results: Dict[str, dict]):
+    """Parallel efficiency of each run_monte_carlo case against its 1-worker twin (as in parallel.scaling_curve)"""
+    for key, r in results.items():
+        workers = r['config'].get('workers')
+        if not key.startswith('run_monte_carlo') or not workers:
+            continue
+        single = key.replace(f' workers={workers}', ' workers=1')
+        if single in results:
+            r['efficiency'] = r['throughput'] / (results[single]['throughput'] * workers)
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Regressions of `current` against `baseline`: throughput down, p95 latency
+    up or peak RSS up by more than `threshold` (relative). Cases missing from
+    either side are ignored.
+    """
+    regressions = []
+    for key, new in current['results'].items():
+        old = baseline['results'].get(key)
+        if old is None:
+            continue
+        checks = (('throughput', old['throughput'] / new['throughput'] - 1),
+                  ('p95', new['p95'] / old['p95'] - 1),
+                  ('peak_rss_mb', new['peak_rss_mb'] / old['peak_rss_mb'] - 1))
+        for metric, worse_by in checks:
+            if worse_by > threshold:
+                regressions.append(f"{key}: {metric} {old[metric]:.4g} -> {new[metric]:.4g} "
+                                   f"({worse_by:+.0%} worse, limit {threshold:.0%})")
+    return regressions
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Research engine benchmark suite with regression gates")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    parser.add_argument('--backend', default='python')
+    parser.add_argument('--only', action='append', default=[], help="run only cases whose name starts with this")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON to compare against / save to")
+    parser.add_argument('--save', action='store_true', help="write this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="allowed relative regression")
+    parser.add_argument('--output', help="also write this run's results to this JSON file")
+    parser.add_argument('--no-isolate', action='store_true', help="run cases in-process (peak RSS becomes cumulative)")
+    args = parser.parse_args(argv)
+
+    cases = [c for c in build_cases(args.profile, args.backend)
+             if not args.only or any(c.name.startswith(prefix) for prefix in args.only)]
+    report = run_suite(cases, isolate=not args.no_isolate)
+    report['profile'] = args.profile
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save to record one")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(json.load(f), report, args.threshold)
+    for line in regressions:
+        print(f"❌ {line}")
+    if not regressions:
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import os
+import json
+import hashlib
+import dataclasses
+import numpy as np
+from typing import Dict, Optional, Sequence
+from engine import SimulationParams
+
+# Sources whose contents define simulation output; editing any of them changes every key.
+# variance_reduction.py draws the antithetic / Sobol shock tensors behind the 'paths-*' kinds.
+ENGINE_SOURCES = ('engine.py', 'batch_engine.py', 'jit_kernel.py', 'variance_reduction.py')
+# Sources that shape cached aggregates (percentiles, streaming sketches, convergence and absorbing
+# metadata); 'aggregate*' kinds also hash these, so editing them invalidates stored exports
+AGGREGATE_SOURCES = ('results.py', 'monte_carlo.py', 'streaming.py', 'convergence.py', 'absorbing.py')
+# SimulationParams fields the engine never reads (paths are fully determined by the seed list)
+NON_ENGINE_FIELDS = ('nSims', 'seed')
+
+def default_cache_dir() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sim_cache")
+
+def engine_fingerprint(sources: Sequence[str] = ENGINE_SOURCES) -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sources:
+        with open(os.path.join(script_dir, name), 'rb') as f:
+            digest.update(name.encode())
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def canonical_params(params: SimulationParams) -> str:
+    values = {k: v for k, v in dataclasses.asdict(params).items() if k not in NON_ENGINE_FIELDS}
+    return json.dumps(values, sort_keys=True, separators=(',', ':'))
+
+def cache_key(params: SimulationParams, seeds: Sequence[int], kind: str, engine: Optional[str] = None) -> str:
+    """Content address of one result: params + exact seed list + engine version + result kind"""
+    digest = hashlib.sha256()
+    digest.update(kind.encode())
+    digest.update((engine or engine_fingerprint()).encode())
+    digest.update(canonical_params(params).encode())
+    digest.update(np.asarray(seeds, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    On-disk store of named float arrays, one compressed .npz per key.
+    Reads refresh the file's mtime, and eviction drops the least recently
+    used entries once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = 2 * 1024 ** 3):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.engine = engine_fingerprint()
+        self.aggregate_engine = engine_fingerprint(ENGINE_SOURCES + AGGREGATE_SOURCES)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def _engine_for(self, kind: str) -> str:
+        return self.aggregate_engine if kind.startswith('aggregate') else self.engine
+
+    def key(self, params: SimulationParams, seeds: Sequence[int], kind: str) -> str:
+        return cache_key(params, seeds, kind, self._engine_for(kind))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.npz")
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        path = self._path(key)
+        try:
+            with np.load(path) as stored:
+                arrays = {name: stored[name] for name in stored.files if name != '__meta__'}
+        except (FileNotFoundError, OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray], meta: Optional[dict] = None):
+        meta = dict(meta or {})
+        meta.setdefault('engine', self._engine_for(meta.get('kind', '')))
+        tmp_path = self._path(key) + f".{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, __meta__=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, self._path(key))  # atomic: readers never see a partial entry
+        self.evict()
+
+    def meta(self, key: str) -> Optional[dict]:
+        try:
+            with np.load(self._path(key)) as stored:
+                return json.loads(str(stored['__meta__']))
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+
+    def entries(self) -> list:
+        """(mtime, size, path) of every entry, oldest first"""
+        found = []
+        for name in os.listdir(self.root):
+            if name.endswith('.npz'):
+                path = os.path.join(self.root, name)
+                stat = os.stat(path)
+                found.append((stat.st_mtime, stat.st_size, path))
+        return sorted(found)
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def invalidate(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def prune_stale(self) -> int:
+        """Removes entries written by a different engine (or, for aggregates, aggregation code) version"""
+        removed = 0
+        for _, _, path in self.entries():
+            key = os.path.basename(path)[:-len('.npz')]
+            meta = self.meta(key)
+            if meta is None or meta.get('engine') != self._engine_for(meta.get('kind', '')):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
+
+def flatten_stats(stats: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """aggregate_results dict -> flat {'metric/stat': array} for storage"""
+    return {f"{metric}/{stat}": values for metric, by_stat in stats.items() for stat, values in by_stat.items()}
+
+def unflatten_stats(arrays: Dict[str, np.ndarray]) -> Dict[str, Dict[str, np.ndarray]]:
+    stats: Dict[str, Dict[str, np.ndarray]] = {}
+    for name, values in arrays.items():
+        metric, stat = name.split('/', 1)
+        stats.setdefault(metric, {})[stat] = values
+    return stats
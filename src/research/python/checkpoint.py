@@ -0,0 +1,78 @@
+import json
+import os
+import re
+import shutil
+import numpy as np
+from typing import Iterator, List, Optional, Sequence, Tuple
+from engine import SimulationParams
+from cache import ENGINE_SOURCES, cache_key, canonical_params, engine_fingerprint
+
+# Chunk size when checkpointing: fixed so a restart with a different pool size still lines up
+DEFAULT_CHECKPOINT_CHUNK = 500
+# Chunks from before and after an edit to any of these must never be stitched together:
+# the engines and shock generators (ENGINE_SOURCES, incl. variance_reduction.py) plus the
+# backend dispatch that decides which engine a chunk runs on
+CHECKPOINT_SOURCES = ENGINE_SOURCES + ('backends.py',)
+CHUNK_FILE = re.compile(r'^chunk_(\d+)_(\d+)\.npy$')
+
+def default_checkpoint_dir() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sim_checkpoints")
+
+class ChunkCheckpoint:
+    """
+    Finished chunks of one Monte Carlo job, one .npy per seed range under a
+    directory keyed by params, the exact seed list, backend, variance
+    reduction, chunk size and engine version. Each chunk is written to a
+    temporary file and renamed, so a kill leaves either the whole chunk or
+    nothing. A restarted job with the same key reloads the finished ranges.
+    """
+
+    def __init__(self, params: SimulationParams, seeds: Sequence[int], backend: str = 'python',
+                 variance_reduction: str = 'none', chunk_size: int = DEFAULT_CHECKPOINT_CHUNK,
+                 root: Optional[str] = None):
+        self.seeds = np.asarray(seeds)
+        self.chunk_size = chunk_size
+        self.engine = engine_fingerprint(CHECKPOINT_SOURCES)
+        kind = f'checkpoint-{backend}-{variance_reduction}-{chunk_size}'
+        self.key = cache_key(params, self.seeds, kind, self.engine)
+        self.dir = os.path.join(root or default_checkpoint_dir(), self.key[:24])
+        os.makedirs(self.dir, exist_ok=True)
+        manifest = os.path.join(self.dir, 'manifest.json')
+        if not os.path.exists(manifest):
+            manifest_data = json.dumps({
+                'key': self.key, 'engine': self.engine, 'backend': backend,
+                'variance_reduction': variance_reduction, 'chunk_size': chunk_size,
+                'n_sims': len(self.seeds), 'T': params.T, 'params': json.loads(canonical_params(params)),
+            }, indent=2).encode()
+            self._write_atomic(manifest, lambda f: f.write(manifest_data))
+
+    def _write_atomic(self, path: str, write):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _chunk_path(self, start: int, stop: int) -> str:
+        return os.path.join(self.dir, f"chunk_{start}_{stop}.npy")
+
+    def completed(self) -> List[Tuple[int, int]]:
+        """Seed ranges already on disk, in order"""
+        ranges = []
+        for name in os.listdir(self.dir):
+            match = CHUNK_FILE.match(name)
+            if match:
+                ranges.append((int(match.group(1)), int(match.group(2))))
+        return sorted(ranges)
+
+    def load(self) -> Iterator[Tuple[int, int, np.ndarray]]:
+        """(start, stop, (stop - start, T, n_fields) block) for every finished chunk"""
+        for start, stop in self.completed():
+            yield start, stop, np.load(self._chunk_path(start, stop))
+
+    def save(self, start: int, stop: int, block: np.ndarray):
+        self._write_atomic(self._chunk_path(start, stop), lambda f: np.save(f, np.ascontiguousarray(block)))
+
+    def clear(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
@@ -0,0 +1,113 @@
+import json
+import struct
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Layout: MAGIC | uint32 version | uint32 header bytes | JSON header | padding | column data.
+# Every column is one contiguous little-endian array at header['columns'][i]['offset']
+# (relative to the start of the data block, 8-byte aligned), so readers can map
+# or view them without parsing per-week records (a Float32Array in the browser).
+MAGIC = b'DPCL'
+VERSION = 1
+PREAMBLE = struct.Struct('<4sII')
+ALIGN = 8
+
+# uint16 quantization keeps the top code for NaN
+QUANT_NAN = np.iinfo(np.uint16).max
+
+@dataclass
+class ColumnarData:
+    metadata: dict
+    columns: Dict[str, np.ndarray]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def records(self) -> list:
+        """Per-row dicts, the shape of the JSON export's time_series"""
+        names = list(self.columns)
+        return [dict(zip(names, (float(v) for v in row))) for row in zip(*self.columns.values())]
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+def quantize(values: np.ndarray) -> tuple:
+    """(uint16 codes, zero, scale) with values ~= zero + codes * scale"""
+    finite = values[np.isfinite(values)]
+    lo, hi = (float(finite.min()), float(finite.max())) if finite.size else (0.0, 0.0)
+    scale = (hi - lo) / (QUANT_NAN - 1) or 1.0
+    codes = np.full(values.shape, QUANT_NAN, dtype='<u2')
+    ok = np.isfinite(values)
+    codes[ok] = np.round((values[ok] - lo) / scale).astype('<u2')
+    return codes, lo, scale
+
+def write_columnar(path: str, columns: Dict[str, np.ndarray], metadata: Optional[dict] = None,
+                   quantized: bool = False) -> int:
+    """
+    Writes equal-length 1-D columns as float32 (or uint16 + affine scale when
+    `quantized`, ~1.5e-5 of each column's range). Returns the file size.
+    """
+    lengths = {len(v) for v in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns must have equal length, got {sorted(lengths)}")
+
+    entries, blobs, offset = [], [], 0
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        entry = {'name': name, 'offset': offset, 'count': int(values.size)}
+        if quantized:
+            data, zero, scale = quantize(values)
+            entry.update(dtype='<u2', zero=zero, scale=scale, nan=int(QUANT_NAN))
+        else:
+            data = values.astype('<f4')
+            entry['dtype'] = '<f4'
+        blob = data.tobytes()
+        blobs.append(blob + b'\0' * _pad(len(blob)))
+        entries.append(entry)
+        offset += len(blobs[-1])
+
+    header = json.dumps({'metadata': metadata or {}, 'length': lengths.pop() if lengths else 0,
+                         'columns': entries}, separators=(',', ':')).encode()
+    header += b' ' * _pad(PREAMBLE.size + len(header))
+    with open(path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    return PREAMBLE.size + len(header) + offset
+
+def read_header(path: str) -> tuple:
+    """(header dict, byte offset of the data block)"""
+    with open(path, 'rb') as f:
+        magic, version, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a columnar research export")
+        if version > VERSION:
+            raise ValueError(f"{path} has format version {version}; this reader supports up to {VERSION}")
+        header = json.loads(f.read(header_len))
+    return header, PREAMBLE.size + header_len
+
+def load_columnar(path: str, mmap: bool = True) -> ColumnarData:
+    """
+    Float32 columns are zero-copy views of one read-only memory map (or of a
+    single read when mmap=False); quantized columns are decoded to float32.
+    """
+    header, data_start = read_header(path)
+    if mmap:
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        with open(path, 'rb') as f:
+            raw = np.frombuffer(f.read(), dtype=np.uint8)
+
+    columns = {}
+    for entry in header['columns']:
+        dtype = np.dtype(entry['dtype'])
+        start = data_start + entry['offset']
+        values = raw[start:start + entry['count'] * dtype.itemsize].view(dtype)
+        if 'scale' in entry:
+            decoded = (entry['zero'] + values.astype(np.float64) * entry['scale']).astype(np.float32)
+            decoded[values == entry['nan']] = np.nan
+            values = decoded
+        columns[entry['name']] = values
+    return ColumnarData(header['metadata'], columns)
@@ -0,0 +1,108 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+from results import SimResultBatch, key_metrics
+
+# Same rule-of-thumb thresholds as assessConvergence in src/utils/convergence.ts
+HIGH_MIN_SIMS = 100
+HIGH_MAX_CV = 0.1
+MEDIUM_MIN_SIMS = 30
+MEDIUM_RELAXED_MIN_SIMS = 20
+MEDIUM_RELAXED_MAX_CV = 0.2
+
+# Exported band statistics and the quantile each one estimates
+BANDS = {'p05': 0.05, 'p95': 0.95}
+
+@dataclass
+class ConvergenceResult:
+    level: str  # 'high' | 'medium' | 'low'
+    label: str
+    message: str
+    recommendation: Optional[str] = None
+
+def assess_convergence(n_sims: int, cv: float) -> ConvergenceResult:
+    """Port of assessConvergence: stability level from nSims and coefficient of variation"""
+    if n_sims >= HIGH_MIN_SIMS and cv < HIGH_MAX_CV:
+        return ConvergenceResult(
+            'high', 'High Confidence',
+            f"Results are statistically stable (n={n_sims}, CV={cv * 100:.1f}%).")
+
+    if n_sims >= MEDIUM_MIN_SIMS or (n_sims >= MEDIUM_RELAXED_MIN_SIMS and cv < MEDIUM_RELAXED_MAX_CV):
+        return ConvergenceResult(
+            'medium', 'Medium Confidence',
+            f"Results are moderately stable (n={n_sims}, CV={cv * 100:.1f}%).",
+            'Increase nSims to 100+ for publication-quality results.')
+
+    return ConvergenceResult(
+        'low', 'Low Confidence',
+        f"Results may be dominated by noise (n={n_sims}, CV={cv * 100:.1f}%).",
+        'Increase nSims to at least 30 for meaningful analysis.')
+
+def average_cv(means: np.ndarray, std_devs: np.ndarray) -> float:
+    """Port of calculateAverageCV: mean |std / mean| over weeks with a usable mean"""
+    means, std_devs = np.asarray(means, dtype=float), np.asarray(std_devs, dtype=float)
+    if means.size == 0 or std_devs.size == 0:
+        return 1.0  # Worst case
+    valid = (means != 0) & ~np.isnan(means) & ~np.isnan(std_devs)
+    return float(np.mean(np.abs(std_devs[valid] / means[valid]))) if valid.any() else 1.0
+
+def standard_errors(values: np.ndarray) -> Dict[str, tuple]:
+    """
+    (estimate, standard error) per week for the mean and each band of an
+    (n_sims, T) block. A quantile's error is read off the sample itself: the
+    quantiles one binomial standard error either side of q bracket +-1 SE.
+    """
+    n = values.shape[0]
+    out = {'mean': (values.mean(axis=0), values.std(axis=0, ddof=1) / np.sqrt(n))}
+    for stat, q in BANDS.items():
+        spread = np.sqrt(q * (1 - q) / n)
+        lo, mid, hi = np.quantile(values, np.clip([q - spread, q, q + spread], 0, 1), axis=0)
+        out[stat] = (mid, (hi - lo) / 2)
+    return out
+
+def measure_precision(batch: SimResultBatch, T: int,
+                      metrics: Sequence[str] = ('price', 'providers', 'revenue')) -> Dict[str, Dict[str, float]]:
+    """Average relative standard error (the estimate's own CV) per metric and statistic"""
+    series = key_metrics(batch, T)
+    precision = {}
+    for metric in metrics:
+        precision[metric] = {stat: average_cv(estimate, se)
+                             for stat, (estimate, se) in standard_errors(series[metric]).items()}
+    return precision
+
+@dataclass
+class PrecisionReport:
+    """Achieved precision of one Monte Carlo run, as written to export metadata"""
+    n_sims: int
+    precision: Dict[str, Dict[str, float]]
+    target: Optional[float] = None
+    stopped: str = 'fixed'  # 'fixed' | 'converged' | 'budget'
+
+    @classmethod
+    def measure(cls, batch: SimResultBatch, T: int, target: Optional[float] = None) -> 'PrecisionReport':
+        return cls(batch.n_sims, measure_precision(batch, T), target)
+
+    @property
+    def worst(self) -> float:
+        return max(cv for by_stat in self.precision.values() for cv in by_stat.values())
+
+    @property
+    def assessment(self) -> ConvergenceResult:
+        return assess_convergence(self.n_sims, self.worst)
+
+    @property
+    def converged(self) -> bool:
+        reached = self.target is None or self.worst <= self.target
+        return reached and self.assessment.level == 'high'
+
+    def to_dict(self) -> dict:
+        assessment = self.assessment
+        return {
+            "n_sims": int(self.n_sims),
+            "level": assessment.level,
+            "label": assessment.label,
+            "max_relative_se": self.worst,
+            "target_relative_se": self.target,
+            "stopped": self.stopped,
+            "relative_se": self.precision,
+        }
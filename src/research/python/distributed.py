@@ -0,0 +1,288 @@
+import argparse
+import os
+import secrets
+import sys
+import threading
+import time
+import numpy as np
+from collections import deque
+from multiprocessing import AuthenticationError, Process, cpu_count
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from engine import SimulationParams
+from backends import get_backend
+from parallel import chunk_bounds
+from results import SimResultBatch
+from streaming import StreamingAggregator
+from monte_carlo import make_seeds, baseline_params, print_absorbed, absorbing_stats
+
+DEFAULT_PORT = 50515
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_DISTRIBUTED_CHUNK = 1000
+AUTHKEY_ENV = 'DEPIN_MC_AUTHKEY'
+MODES = ('paths', 'streaming')
+
+class WorkQueue:
+    """
+    Coordinator-side chunk ledger. Chunks are leased to workers with a
+    deadline; an expired lease (worker died, host lost) goes back to the
+    queue on the next lease() call. The first result for a chunk wins, so a
+    slow worker finishing a re-queued chunk late is harmless.
+    """
+
+    def __init__(self, params: SimulationParams, seeds: np.ndarray, chunk_size: int, backend: str,
+                 mode: str, lease_seconds: float):
+        self.params = params
+        self.seeds = seeds
+        self.backend = backend
+        self.mode = mode
+        self.lease_seconds = lease_seconds
+        self.chunks = chunk_bounds(len(seeds), chunk_size)
+        self.pending = deque(range(len(self.chunks)))
+        self.leases: Dict[int, Tuple[str, float]] = {}  # chunk id -> (worker, deadline)
+        self.results: Dict[int, object] = {}
+        self.requeued = 0
+        self.workers: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+
+    def _reclaim_expired(self, now: float):
+        for chunk_id, (worker, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[chunk_id]
+                self.pending.appendleft(chunk_id)
+                self.requeued += 1
+
+    def lease(self, worker: str) -> Optional[dict]:
+        """Next chunk task, {'wait': seconds} while others hold the remaining leases, or None when done"""
+        with self.lock:
+            now = time.time()
+            self.workers.setdefault(worker, {'chunks': 0, 'sims': 0, 'busy_seconds': 0.0, 'last_seen': now})
+            self.workers[worker]['last_seen'] = now
+            self._reclaim_expired(now)
+            while self.pending and self.pending[0] in self.results:
+                self.pending.popleft()
+            if not self.pending:
+                return None if self.finished.is_set() else {'wait': 0.2}
+            chunk_id = self.pending.popleft()
+            self.leases[chunk_id] = (worker, now + self.lease_seconds)
+            start, stop = self.chunks[chunk_id]
+            return {'chunk': chunk_id, 'start': start, 'params': self.params, 'seeds': self.seeds[start:stop],
+                    'backend': self.backend, 'mode': self.mode}
+
+    def complete(self, worker: str, chunk_id: int, payload, seconds: float) -> bool:
+        """Stores a chunk result; False when another worker already delivered it"""
+        with self.lock:
+            self.leases.pop(chunk_id, None)
+            if chunk_id in self.results:
+                return False
+            self.results[chunk_id] = payload
+            start, stop = self.chunks[chunk_id]
+            stats = self.workers.setdefault(worker, {'chunks': 0, 'sims': 0, 'busy_seconds': 0.0})
+            stats['chunks'] += 1
+            stats['sims'] += stop - start
+            stats['busy_seconds'] += seconds
+            stats['last_seen'] = time.time()
+            if len(self.results) == len(self.chunks):
+                self.finished.set()
+            return True
+
+    def progress(self) -> dict:
+        with self.lock:
+            return {'chunks': len(self.chunks), 'done': len(self.results), 'leased': len(self.leases),
+                    'requeued': self.requeued, 'workers': len(self.workers)}
+
+# Wire protocol: each worker holds one authenticated connection and sends
+# ('lease', worker) or ('complete', worker, chunk id, payload, seconds);
+# the coordinator answers each request with the WorkQueue method's return value.
+REQUESTS = ('lease', 'complete', 'progress')
+
+def run_chunk(task: dict):
+    """Runs one leased chunk: full paths as float64, or a merged StreamingAggregator"""
+    batch = get_backend(task['backend'])(task['params'], task['seeds'])
+    if task['mode'] == 'streaming':
+        agg = StreamingAggregator(task['params'].T)
+        agg.add(batch)
+        return agg
+    return batch.data
+
+def run_worker(address: Tuple[str, int], authkey: bytes, name: Optional[str] = None,
+               fail_after: Optional[int] = None) -> int:
+    """
+    Leases chunks from a coordinator until it reports the job done; returns
+    the number of chunks delivered. `fail_after` makes the worker vanish
+    with its next lease unfinished (used to exercise re-queueing).
+    """
+    name = name or f"{os.uname().nodename}:{os.getpid()}"
+    conn = Client(tuple(address), authkey=authkey)
+    delivered = 0
+    while True:
+        try:
+            conn.send(('lease', name))
+            task = conn.recv()
+        except (EOFError, OSError):
+            break  # coordinator is gone: the job finished or was cancelled
+        if task is None:
+            break
+        if 'wait' in task:
+            time.sleep(task['wait'])
+            continue
+        if fail_after is not None and delivered >= fail_after:
+            os._exit(1)
+        began = time.perf_counter()
+        payload = run_chunk(task)
+        try:
+            conn.send(('complete', name, task['chunk'], payload, time.perf_counter() - began))
+            conn.recv()
+        except (EOFError, OSError):
+            break
+        delivered += 1
+    conn.close()
+    return delivered
+
+def _worker_entry(address, authkey, name, fail_after):
+    run_worker(address, authkey, name, fail_after)
+
+def spawn_local_workers(address: Tuple[str, int], authkey: bytes, n: int,
+                        fail_after: Optional[int] = None) -> List[Process]:
+    """Starts `n` worker processes on this host (one per core for a worker node)"""
+    procs = [Process(target=_worker_entry, args=(address, authkey, None, fail_after), daemon=True) for _ in range(n)]
+    for proc in procs:
+        proc.start()
+    return procs
+
+class Coordinator:
+    """
+    Serves a WorkQueue over TCP (multiprocessing.connection, HMAC-authenticated
+    with `authkey`) with one thread per worker connection, so results land
+    directly in this process. Use as a context manager; run() blocks until
+    every chunk is in.
+    """
+
+    def __init__(self, params: SimulationParams, seeds: Sequence[int], chunk_size: int = DEFAULT_DISTRIBUTED_CHUNK,
+                 backend: str = 'numpy', mode: str = 'paths', host: str = '127.0.0.1', port: int = 0,
+                 authkey: Optional[bytes] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}' (available: {', '.join(MODES)})")
+        get_backend(backend)
+        self.queue = WorkQueue(params, np.asarray(seeds), chunk_size, backend, mode, lease_seconds)
+        self.authkey = authkey or secrets.token_bytes(16)
+        self._listener = Listener((host, port), authkey=self.authkey)
+        self.address = self._listener.address
+        self._closing = threading.Event()
+
+    def _accept(self):
+        while not self._closing.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, AuthenticationError):
+                continue  # failed handshake, or the listener was closed
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return  # worker went away; its lease expires and the chunk is re-queued
+                if request[0] not in REQUESTS:
+                    return
+                try:
+                    conn.send(getattr(self.queue, request[0])(*request[1:]))
+                except OSError:
+                    return
+
+    def __enter__(self) -> 'Coordinator':
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._closing.set()
+        self._listener.close()
+
+    def run(self, timeout: Optional[float] = None, log_every: float = 5.0) -> Union[SimResultBatch, StreamingAggregator]:
+        """Waits for all chunks and assembles them in seed order (deterministic for both modes)"""
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.queue.finished.wait(log_every):
+            p = self.queue.progress()
+            print(f"… {p['done']}/{p['chunks']} chunks, {p['leased']} leased, {p['workers']} workers, "
+                  f"{p['requeued']} re-queued")
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError(f"Distributed run incomplete after {timeout}s: {p}")
+        parts = [self.queue.results[i] for i in range(len(self.queue.chunks))]
+        if self.queue.mode == 'streaming':
+            return StreamingAggregator.merge_all(parts)
+        return SimResultBatch(np.concatenate(parts, axis=0))
+
+def run_distributed(params: SimulationParams, n_sims: int = 1000, seeds: Optional[Sequence[int]] = None,
+                    chunk_size: int = DEFAULT_DISTRIBUTED_CHUNK, backend: str = 'numpy', streaming: bool = False,
+                    host: str = '127.0.0.1', port: int = 0, authkey: Optional[bytes] = None,
+                    local_workers: int = 0, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                    timeout: Optional[float] = None) -> Union[SimResultBatch, StreamingAggregator]:
+    """
+    Coordinates a Monte Carlo job across every worker that connects to
+    host:port (see `python distributed.py worker`), plus `local_workers`
+    started here. streaming=True has workers return O(T) sketches instead of paths.
+    """
+    if seeds is None:
+        seeds = make_seeds(n_sims, params.seed)
+    seeds = np.asarray(seeds)
+    with Coordinator(params, seeds, chunk_size, backend, 'streaming' if streaming else 'paths', host, port,
+                     authkey, lease_seconds) as coordinator:
+        print(f"Coordinating {len(seeds)} sims in {len(coordinator.queue.chunks)} chunks on "
+              f"{coordinator.address[0]}:{coordinator.address[1]}")
+        start_time = time.time()
+        procs = spawn_local_workers(coordinator.address, coordinator.authkey, local_workers)
+        results = coordinator.run(timeout)
+        duration = time.time() - start_time
+    for proc in procs:
+        proc.join(timeout=5)
+    p = coordinator.queue.progress()
+    print(f"Completed in {duration:.2f} seconds ({len(seeds) / duration:.0f} sims/sec) "
+          f"on {p['workers']} workers, {p['requeued']} chunks re-queued")
+    print_absorbed(absorbing_stats(results))
+    return results
+
+def _authkey(value: Optional[str]) -> bytes:
+    value = value or os.environ.get(AUTHKEY_ENV)
+    if not value:
+        raise SystemExit(f"Pass --authkey or set {AUTHKEY_ENV}")
+    return value.encode()
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Distributed Monte Carlo over a TCP work queue")
+    sub = parser.add_subparsers(dest='role', required=True)
+    coord = sub.add_parser('coordinator')
+    coord.add_argument('--host', default='0.0.0.0')
+    coord.add_argument('--port', type=int, default=DEFAULT_PORT)
+    coord.add_argument('--n-sims', type=int, default=10_000)
+    coord.add_argument('--chunk-size', type=int, default=DEFAULT_DISTRIBUTED_CHUNK)
+    coord.add_argument('--backend', default='numpy')
+    coord.add_argument('--streaming', action='store_true')
+    coord.add_argument('--local-workers', type=int, default=0)
+    coord.add_argument('--authkey')
+    worker = sub.add_parser('worker')
+    worker.add_argument('--host', required=True)
+    worker.add_argument('--port', type=int, default=DEFAULT_PORT)
+    worker.add_argument('--processes', type=int, default=cpu_count())
+    worker.add_argument('--authkey')
+    args = parser.parse_args(argv)
+
+    authkey = _authkey(args.authkey)
+    if args.role == 'worker':
+        for proc in spawn_local_workers((args.host, args.port), authkey, args.processes):
+            proc.join()
+        return 0
+    from monte_carlo import aggregate_results
+    params = baseline_params()
+    results = run_distributed(params, args.n_sims, chunk_size=args.chunk_size, backend=args.backend,
+                              streaming=args.streaming, host=args.host, port=args.port, authkey=authkey,
+                              local_workers=args.local_workers)
+    stats = aggregate_results(results, params.T)
+    print(f"Week {params.T} price: ${stats['price']['mean'][-1]:.3f} "
+          f"(90% CI: ${stats['price']['p05'][-1]:.3f} - ${stats['price']['p95'][-1]:.3f})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
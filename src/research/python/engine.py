@@ -1,6 +1,6 @@
 import numpy as np
 import math
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import List, Literal, Optional
 
 # Constants matching JS implementation
@@ -70,9 +70,15 @@ class SimResult:
     treasuryBalance: float
     vampireChurn: float
 
+# Per-week output columns (everything in SimResult except the week index)
+RESULT_FIELDS = tuple(f.name for f in fields(SimResult) if f.name != 't')
+
 def get_demand_series(T: int, base: float, type: DEMAND_TYPES, rng: np.random.Generator) -> np.ndarray:
+    return demand_from_noise(T, base, type, rng.normal(0, 1, T))
+
+def demand_from_noise(T: int, base: float, type: DEMAND_TYPES, noise: np.ndarray) -> np.ndarray:
+    """Demand curve for standard-normal noise of shape (..., T)"""
     t_vals = np.arange(T)
-    noise = rng.normal(0, 1, T)
     
     if type == 'consistent':
         d = base * (1 + 0.03 * noise)
@@ -83,11 +89,35 @@ def get_demand_series(T: int, base: float, type: DEMAND_TYPES, rng: np.random.Ge
     elif type == 'volatile':
         d = base * (1 + 0.20 * noise)
     else:
-        d = np.full(T, base)
+        d = np.full(np.shape(noise), base)
         
     return np.maximum(0, d)
 
-def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
+def take_snapshot(t: int, state: dict, pool_usd: float, pool_tokens: float, k_amm: float,
+                  rng: np.random.Generator) -> dict:
+    """Everything simulate_one carries from week t-1 into week t"""
+    return {'t': t, 'state': dict(state, rewardHistory=list(state['rewardHistory'])),
+            'pool_usd': pool_usd, 'pool_tokens': pool_tokens, 'k_amm': k_amm,
+            'rng': rng.bit_generator.state}
+
+def restore_snapshot(snapshot: dict, rng: np.random.Generator):
+    """(t, state, pool_usd, pool_tokens, k_amm) of a take_snapshot() dict; rewinds `rng` to it"""
+    rng.bit_generator.state = snapshot['rng']
+    state = dict(snapshot['state'], rewardHistory=list(snapshot['state']['rewardHistory']))
+    return snapshot['t'], state, snapshot['pool_usd'], snapshot['pool_tokens'], snapshot['k_amm']
+
+def simulate_one(params: SimulationParams, sim_seed: int, profiler=None, snapshots: Optional[dict] = None,
+                 resume: Optional[dict] = None) -> List[SimResult]:
+    """
+    `profiler` (see profiling.PhaseProfiler) is opt-in: every hook sits behind
+    one `prof is not None` test, so an uninstrumented run skips them all.
+    `snapshots` is a dict keyed by week; each listed week gets the path state
+    at its start (see take_snapshot). `resume` continues from one such
+    snapshot and returns only weeks snapshot['t'] .. T-1.
+    """
+    prof = profiler
+    if prof is not None:
+        prof.start_path()
     rng = np.random.default_rng(sim_seed)
     
     # Macro Settings
@@ -98,8 +128,11 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
         mu, sigma = 0.015, 0.06
         
     demands = get_demand_series(params.T, 12000, params.demandType, rng)
+    if prof is not None:
+        prof.lap('demand')
     results = []
     
+    start = 0
     state = {
         'supply': params.initialSupply,
         'price': params.initialPrice,
@@ -114,8 +147,14 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
     pool_usd = params.initialLiquidity
     pool_tokens = pool_usd / state['price']
     k_amm = pool_usd * pool_tokens
+    if resume is not None:
+        start, state, pool_usd, pool_tokens, k_amm = restore_snapshot(resume, rng)
+    if prof is not None:
+        prof.lap('setup')
     
-    for t in range(params.T):
+    for t in range(start, params.T):
+        if snapshots is not None and t in snapshots:
+            snapshots[t] = take_snapshot(t, state, pool_usd, pool_tokens, k_amm, rng)
         demand = demands[t]
         capacity = max(0.001, state['providers'] * params.baseCapacityPerProvider)
         demand_served = min(demand, capacity)
@@ -124,6 +163,11 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
         scarcity = (demand - capacity) / capacity
         state['servicePrice'] = min(max(state['servicePrice'] * (1 + 0.6 * scarcity), 0.05), 5.0)
         
+        if prof is not None:
+            prof.lap('demand')
+            if state['servicePrice'] in (0.05, 5.0):
+                prof.count('clamp_service_price')
+        
         safe_price = max(state['price'], 0.0001)
         tokens_spent = (demand_served * state['servicePrice']) / safe_price
         
@@ -141,7 +185,14 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
                 emission_factor *= 0.6
                 
         minted = max(0, min(params.maxMintWeekly, params.maxMintWeekly * emission_factor))
+        if prof is not None:
+            if burned < burned_raw:
+                prof.count('clamp_burn_cap')
+            if state['supply'] + minted - burned < 1000.0:
+                prof.count('clamp_supply_floor')
         state['supply'] = max(1000.0, state['supply'] + minted - burned)
+        if prof is not None:
+            prof.lap('emissions')
         
         # Rewards
         instant_reward_value = (minted / max(state['providers'], 0.1)) * safe_price
@@ -161,11 +212,17 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
         churn_multiplier = 1.0
         if state['consecutiveLowProfitWeeks'] > 2: churn_multiplier = 1.8
         if state['consecutiveLowProfitWeeks'] > 5: churn_multiplier = 4.0
+        if prof is not None:
+            prof.lap('rewards')
+            if churn_multiplier > 1.0:
+                prof.count(f'churn_multiplier_{churn_multiplier:g}x')
         
         # Provider Growth/Churn
         max_growth = state['providers'] * 0.15
         raw_delta = (incentive * 4.5 * churn_multiplier) + rng.normal() * 0.5
         delta = max(-state['providers'] * 0.1, min(max_growth, raw_delta))
+        if prof is not None and delta != raw_delta:
+            prof.count('clamp_growth' if raw_delta > max_growth else 'clamp_decline')
         
         # Vampire Attack
         vampire_churn_amount = 0
@@ -179,11 +236,16 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
         if payback_months > 24: delta -= state['providers'] * 0.0125
         if payback_months > 36: delta -= state['providers'] * 0.025
         
+        if prof is not None:
+            prof.lap('churn')
+        
         net_flow = 0
         next_price = state['price']
         
         # Price Model
         if t == params.investorUnlockWeek:
+            if prof is not None:
+                prof.count('amm_unlock')
             unlock_amount = state['supply'] * params.investorSellPct
             new_pool_tokens = pool_tokens + unlock_amount
             new_pool_usd = k_amm / new_pool_tokens
@@ -201,6 +263,8 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
             dilution_pressure = -params.kMintPrice * (minted / state['supply']) * 100
             log_ret = mu + demand_pressure + dilution_pressure + sigma * rng.normal()
             next_price = max(0.01, state['price'] * math.exp(log_ret))
+            if prof is not None and next_price == 0.01:
+                prof.count('clamp_price_floor')
             
             # Re-sync AMM
             pool_usd = math.sqrt(k_amm * next_price)
@@ -219,6 +283,8 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
                 next_price = state['price'] - (price_drop * 0.5)
         else:
             next_price = next_price * 1.001
+        if prof is not None:
+            prof.lap('price')
             
         results.append(SimResult(
             t=t, price=state['price'], supply=state['supply'], demand=demand,
@@ -234,6 +300,13 @@ def simulate_one(params: SimulationParams, sim_seed: int) -> List[SimResult]:
         ))
         
         state['price'] = next_price
+        if prof is not None:
+            if state['providers'] + delta < 2:
+                prof.count('clamp_providers_floor')
         state['providers'] = max(2, state['providers'] + delta)
+        if prof is not None:
+            prof.lap('result')
         
+    if prof is not None:
+        prof.end_path()
     return results
@@ -1,59 +1,149 @@
+import argparse
 import json
 import os
 import copy
+import numpy as np
+from functools import partial
+from typing import List, Optional, Tuple
 from engine import SimulationParams
-from monte_carlo import run_monte_carlo, aggregate_results
+from monte_carlo import run_monte_carlo, run_adaptive, aggregate_results, absorbing_stats, make_seeds
+from results import SimResultBatch
+from convergence import PrecisionReport
+from scheduler import ScenarioScheduler
+from cache import ResultCache, flatten_stats, unflatten_stats
+from columnar import write_columnar
 
-def export_scenario(scenario_name: str, params: SimulationParams, filename: str):
+EXPORT_FORMATS = ('json', 'binary', 'both')
+BINARY_SUFFIX = '.bin'
+
+# (exported column, aggregate metric, statistic), in time_series key order
+SERIES_COLUMNS = (
+    ("price_mean", 'price', 'mean'), ("price_p05", 'price', 'p05'), ("price_p95", 'price', 'p95'),
+    ("nodes_mean", 'providers', 'mean'), ("nodes_p05", 'providers', 'p05'), ("nodes_p95", 'providers', 'p95'),
+    ("revenue_mean", 'revenue', 'mean'), ("revenue_p05", 'revenue', 'p05'), ("revenue_p95", 'revenue', 'p95'),
+)
+
+def default_output_dir() -> str:
+    # Resolve path relative to THIS script file
+    # src/research/python/export_data.py -> ../../../public/data
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, "../../../public/data")
+
+def export_scenario(scenario_name: str, params: SimulationParams, filename: str,
+                    n_sims: int = 1000, streaming: bool = False, output_dir: str = None,
+                    cache: Optional[ResultCache] = None, adaptive: bool = False,
+                    target_precision: float = 0.02, backend: str = 'python',
+                    export_format: str = 'json', quantized: bool = False):
+    """
+    With adaptive=True, n_sims is the path budget and the run stops once target_precision is reached.
+    export_format='binary' | 'both' also writes the columnar float32 file (uint16 when quantized).
+    """
+    formats = dict(export_format=export_format, quantized=quantized)
     print(f"\n--- Running Scenario: {scenario_name} ---")
     
+    seeds = make_seeds(n_sims, params.seed if cache is not None or adaptive else None)
+    kind = aggregate_kind(backend, streaming, target_precision if adaptive else None)
+    if cache is not None:
+        hit = cached_stats(cache, params, seeds, kind)
+        if hit is not None:
+            write_cached(scenario_name, params, filename, hit, output_dir, **formats)
+            return
+    
     # Run Simulation
-    results = run_monte_carlo(params, n_sims=1000)
+    report = None
+    if adaptive:
+        results, report = run_adaptive(params, target_precision, max_sims=n_sims, backend=backend, seeds=seeds)
+    else:
+        results = run_monte_carlo(params, seeds=seeds, streaming=streaming, backend=backend)
+    write_scenario(scenario_name, params, filename, results, output_dir, cache=cache, seeds=seeds, kind=kind,
+                   report=report, **formats)
+
+def aggregate_kind(backend: str, streaming: bool = False, target_precision: Optional[float] = None) -> str:
+    """
+    Cache kind of a scenario's aggregates. The backend is part of it: the
+    python and numpy engines agree only to float rounding, so one's entries
+    are not exact results for the other.
+    """
+    if target_precision is not None:
+        return f'aggregate-adaptive-{backend}-{target_precision}'
+    return f'aggregate-streaming-{backend}' if streaming else f'aggregate-{backend}'
+
+def cached_stats(cache: ResultCache, params: SimulationParams, seeds, kind: str):
+    """(stats, meta) of a cached scenario, or None"""
+    key = cache.key(params, seeds, kind)
+    arrays = cache.get(key)
+    return (unflatten_stats(arrays), cache.meta(key) or {}) if arrays is not None else None
+
+def write_cached(scenario_name: str, params: SimulationParams, filename: str, hit, output_dir: str = None,
+                 export_format: str = 'json', quantized: bool = False):
+    stats, meta = hit
+    print(f"♻ {scenario_name}: unchanged, using cached aggregates")
+    write_stats(scenario_name, params, filename, stats, meta['n_sims'], output_dir, meta.get('convergence'),
+                meta.get('absorbing'), export_format, quantized)
+
+def write_scenario(scenario_name: str, params: SimulationParams, filename: str, results, output_dir: str = None,
+                   cache: Optional[ResultCache] = None, seeds=None, kind: Optional[str] = None,
+                   report: Optional[PrecisionReport] = None, export_format: str = 'json', quantized: bool = False):
     stats = aggregate_results(results, params.T)
-    
+    # Streaming runs keep no paths, so their band precision can't be measured
+    if report is None and isinstance(results, SimResultBatch):
+        report = PrecisionReport.measure(results, params.T)
+    convergence = report.to_dict() if report is not None else None
+    absorbing = absorbing_stats(results)
+    if cache is not None:
+        cache.put(cache.key(params, seeds, kind), flatten_stats(stats),
+                  meta={'kind': kind, 'scenario': scenario_name, 'n_sims': int(results.n_sims),
+                        'convergence': convergence, 'absorbing': absorbing})
+    write_stats(scenario_name, params, filename, stats, results.n_sims, output_dir, convergence, absorbing,
+                export_format, quantized)
+
+def write_stats(scenario_name: str, params: SimulationParams, filename: str, stats: dict,
+                n_sims: int, output_dir: str = None, convergence: Optional[dict] = None,
+                absorbing: Optional[dict] = None, export_format: str = 'json', quantized: bool = False):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export_format '{export_format}' (available: {', '.join(EXPORT_FORMATS)})")
     # Format Data
     export_data = {
         "metadata": {
             "engine": "Python/NumPy v1.0",
             "scenario": scenario_name,
-            "n_sims": 1000,
-            "generated_at": "2025-04-10T12:00:00Z"
+            "n_sims": int(n_sims),
+            "generated_at": "2025-04-10T12:00:00Z",
+            "convergence": convergence,
+            "absorbing": absorbing
         },
-        "time_series": []
+        "time_series": time_series_records(stats, params.T)
     }
-    
-    for t in range(params.T):
-        point = {
-            "week": t,
-            "price_mean": float(stats['price']['mean'][t]),
-            "price_p05": float(stats['price']['p05'][t]),
-            "price_p95": float(stats['price']['p95'][t]),
-            
-            "nodes_mean": float(stats['providers']['mean'][t]),
-            "nodes_p05": float(stats['providers']['p05'][t]),
-            "nodes_p95": float(stats['providers']['p95'][t]),
-            
-            "revenue_mean": float(stats['revenue']['mean'][t]),
-            "revenue_p05": float(stats['revenue']['p05'][t]),
-            "revenue_p95": float(stats['revenue']['p95'][t])
-        }
-        export_data["time_series"].append(point)
         
     # Save
-    # Resolve path relative to THIS script file
-    # src/research/python/export_data.py -> ../../../public/data
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_dir = os.path.join(script_dir, "../../../public/data")
+    output_dir = output_dir or default_output_dir()
     output_path = os.path.join(output_dir, filename)
     
     os.makedirs(output_dir, exist_ok=True)
     
-    with open(output_path, 'w') as f:
-        json.dump(export_data, f, indent=2)
-        
-    print(f"✅ Data exported to {output_path}")
+    if export_format in ('json', 'both'):
+        with open(output_path, 'w') as f:
+            json.dump(export_data, f, indent=2)
+        print(f"✅ Data exported to {output_path}")
+    
+    if export_format in ('binary', 'both'):
+        # Same series, one contiguous array each (see columnar.py)
+        columns = {"week": np.arange(params.T)}
+        columns.update((column, stats[metric][stat][:params.T]) for column, metric, stat in SERIES_COLUMNS)
+        binary_path = os.path.splitext(output_path)[0] + BINARY_SUFFIX
+        size = write_columnar(binary_path, columns, export_data["metadata"], quantized=quantized)
+        print(f"✅ Data exported to {binary_path} ({size / 1024:.1f} KiB)")
+
+def time_series_records(stats: dict, T: int) -> List[dict]:
+    """Per-week export rows ({"week", "price_mean", ...}) of an aggregate_results dict"""
+    records = []
+    for t in range(T):
+        point = {"week": t}
+        point.update((column, float(stats[metric][stat][t])) for column, metric, stat in SERIES_COLUMNS)
+        records.append(point)
+    return records
 
-def export_all_research_data():
+def research_base_params() -> SimulationParams:
     # Base Params (Onocoy V3 Calibrated - WITH STABILIZATION TWEAKS)
     # The previous base params were causing a death spiral ($0.10 -> $0.01) even in neutral cases
     # We increase demand and reduce initial burn to stabilize the baseline.
@@ -82,9 +172,15 @@ def export_all_research_data():
         emissionModel='fixed',
         revenueStrategy='burn'
     )
+    return base_params
+
+def research_scenarios() -> List[Tuple[str, SimulationParams, str]]:
+    """(scenario name, params, output filename) for every published research dataset"""
+    base_params = research_base_params()
+    scenarios = []
     
     # 1. Neutral (Base)
-    export_scenario("Neutral Case", base_params, "research_neutral.json")
+    scenarios.append(("Neutral Case", base_params, "research_neutral.json"))
     
     # 2. Bull Market (High Demand, Bull Macro)
     bull_params = copy.deepcopy(base_params)
@@ -94,21 +190,59 @@ def export_all_research_data():
     # Boost demand base significantly
     # Note: engine.py's get_demand_series uses fixed base 12000. 
     # We should update engine.py to use params.baseDemand if possible, but for now we rely on macro drift.
-    export_scenario("Bull Market", bull_params, "research_bull.json")
+    scenarios.append(("Bull Market", bull_params, "research_bull.json"))
     
     # 3. Bear Market (Low Demand, Bear Macro)
     bear_params = copy.deepcopy(base_params)
     bear_params.macro = 'bearish'
     bear_params.demandType = 'consistent' # Stagnant demand
     bear_params.investorSellPct = 0.20 # Sell pressure
-    export_scenario("Bear Market", bear_params, "research_bear.json")
+    scenarios.append(("Bear Market", bear_params, "research_bear.json"))
 
     # 4. Hyper Growth (Extreme Bull)
     hyper_params = copy.deepcopy(base_params)
     hyper_params.macro = 'bullish'
     hyper_params.demandType = 'high-to-decay' # Viral adoption
     hyper_params.maxMintWeekly = 3_000_000 # Allow more supply for growth
-    export_scenario("Hyper Growth", hyper_params, "research_hyper.json")
+    scenarios.append(("Hyper Growth", hyper_params, "research_hyper.json"))
+    
+    return scenarios
+
+def export_all_research_data(n_sims: int = 1000, processes: int = None, backend: str = 'python',
+                             output_dir: str = None, cache: Optional[ResultCache] = None,
+                             adaptive: bool = False, target_precision: float = 0.02,
+                             export_format: str = 'json', quantized: bool = False):
+    """
+    Without a cache every scenario draws fresh seeds. With a cache, seeds are
+    derived from params.seed so runs repeat and can hit; the research
+    scenarios all share seed 42, so they then run on one common seed list.
+    """
+    formats = dict(export_format=export_format, quantized=quantized)
+    if adaptive:
+        # Each scenario decides its own path count, so they run one after another
+        for name, params, filename in research_scenarios():
+            export_scenario(name, params, filename, n_sims=n_sims, output_dir=output_dir, cache=cache,
+                            adaptive=True, target_precision=target_precision, backend=backend, **formats)
+        return
+    
+    # One warm pool for every scenario; each file is written as soon as its scenario finishes.
+    # With a cache, scenarios whose params, seeds and engine are unchanged are not re-run.
+    with ScenarioScheduler(processes=processes, backend=backend) as scheduler:
+        for name, params, filename in research_scenarios():
+            seeds = make_seeds(n_sims, params.seed if cache is not None else None)
+            hit = cached_stats(cache, params, seeds, aggregate_kind(backend)) if cache is not None else None
+            if hit is not None:
+                write_cached(name, params, filename, hit, output_dir, **formats)
+                continue
+            scheduler.submit(name, params, seeds=seeds,
+                             on_complete=partial(write_scenario, name, params, filename, output_dir=output_dir,
+                                                 cache=cache, seeds=seeds, kind=aggregate_kind(backend), **formats))
+        if scheduler.jobs:
+            scheduler.run()
 
 if __name__ == "__main__":
-    export_all_research_data()
+    parser = argparse.ArgumentParser(description="Export the research scenarios to public/data")
+    parser.add_argument('--cache', action='store_true',
+                        help="reuse cached aggregates (fixes each scenario's seeds to params.seed)")
+    args = parser.parse_args()
+    export_all_research_data(cache=ResultCache() if args.cache else None)
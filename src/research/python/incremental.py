@@ -0,0 +1,134 @@
+import dataclasses
+import time
+import numpy as np
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Sequence, Union
+from engine import SimulationParams, simulate_one, RESULT_FIELDS
+from parallel import chunk_bounds, default_chunk_size
+from results import SimResultBatch, path_to_array
+
+DEFAULT_SNAPSHOT_EVERY = 4
+
+def _unlock_week(params: SimulationParams) -> int:
+    """Week the investor unlock fires, or T when it falls outside the horizon"""
+    return params.investorUnlockWeek if 0 <= params.investorUnlockWeek < params.T else params.T
+
+def _growth_call_week(params: SimulationParams) -> int:
+    week = params.growthCallEventWeek
+    return week if week is not None and 0 <= week < params.T else params.T
+
+# Fields simulate_one only reads from some week on: field -> first week an edit can change,
+# given (base, edited). Every other field can change week 0. nSims and seed never reach a
+# path (the run's seeds are fixed), so editing them changes nothing.
+LATE_FIELDS = {
+    'investorUnlockWeek': lambda a, b: min(_unlock_week(a), _unlock_week(b)),
+    'investorSellPct': lambda a, b: min(_unlock_week(a), _unlock_week(b)),
+    # The engine does not apply the growth-call event yet; resuming from its week stays exact once it does
+    'growthCallEventWeek': lambda a, b: min(_growth_call_week(a), _growth_call_week(b)),
+    'growthCallEventPct': lambda a, b: min(_growth_call_week(a), _growth_call_week(b)),
+    'nSims': lambda a, b: a.T,
+    'seed': lambda a, b: a.T,
+}
+
+def first_affected_week(base: SimulationParams, edited: SimulationParams) -> int:
+    """Earliest week whose results can differ between two param sets (base.T when none can)"""
+    week = base.T
+    for f in dataclasses.fields(SimulationParams):
+        if getattr(base, f.name) != getattr(edited, f.name):
+            rule = LATE_FIELDS.get(f.name)
+            week = min(week, rule(base, edited) if rule else 0)
+    return week
+
+def _run_snapshot_chunk(task):
+    """Wrapper for multiprocessing: full paths plus their snapshots at `weeks`"""
+    params, seeds, weeks, start = task
+    blocks, snapshots = [], []
+    for seed in seeds:
+        taken = dict.fromkeys(weeks)
+        blocks.append(path_to_array(simulate_one(params, int(seed), snapshots=taken)))
+        snapshots.append(taken)
+    return start, np.stack(blocks), snapshots
+
+def _resume_chunk(task):
+    """Wrapper for multiprocessing: weeks snapshot['t'] .. T-1 of each path"""
+    params, seeds, snapshots, start = task
+    return start, np.stack([path_to_array(simulate_one(params, int(seed), resume=snapshot))
+                            for seed, snapshot in zip(seeds, snapshots)])
+
+class SnapshotRun:
+    """
+    A python-engine run that kept every path's state at a few weeks, so a
+    what-if edit that leaves a prefix of the horizon untouched (unlock timing,
+    unlock size) re-simulates only from the latest snapshot before that week.
+    Results are identical to a fresh simulate_one run of the edited params.
+    """
+
+    def __init__(self, params: SimulationParams, seeds: Sequence[int], batch: SimResultBatch,
+                 snapshots: List[Dict[int, dict]], weeks: Sequence[int], chunk_size: Optional[int] = None,
+                 processes: Optional[int] = None):
+        self.params = params
+        self.seeds = np.asarray(seeds)
+        self.batch = batch
+        self.snapshots = snapshots  # per path: {week: take_snapshot dict}
+        self.weeks = sorted(weeks)
+        self.processes = processes or cpu_count()
+        self.chunk_size = chunk_size or default_chunk_size(len(self.seeds), self.processes)
+
+    def resume_week(self, edited: SimulationParams) -> int:
+        """Week a what-if of `edited` restarts from: the latest snapshot not after the first affected week"""
+        affected = first_affected_week(self.params, edited)
+        if affected >= self.params.T:
+            return self.params.T
+        return max((w for w in self.weeks if w <= affected), default=0)
+
+    def what_if(self, edited: Union[SimulationParams, dict]) -> SimResultBatch:
+        """Results for `edited` (params, or overrides of the run's params) over the same seeds"""
+        if isinstance(edited, dict):
+            edited = dataclasses.replace(self.params, **edited)
+        week = self.resume_week(edited)
+        data = self.batch.data.copy()
+        if week >= self.params.T:
+            return SimResultBatch(data)
+        n = len(self.seeds)
+        if week == 0:
+            data = np.empty((n, edited.T, len(RESULT_FIELDS)))  # an early edit may also change T
+            tasks = [(edited, self.seeds[start:stop], (), start) for start, stop in chunk_bounds(n, self.chunk_size)]
+            with Pool(processes=self.processes) as pool:
+                for start, block, _ in pool.imap_unordered(_run_snapshot_chunk, tasks):
+                    data[start:start + len(block)] = block
+            return SimResultBatch(data)
+        tasks = [(edited, self.seeds[start:stop], [s[week] for s in self.snapshots[start:stop]], start)
+                 for start, stop in chunk_bounds(n, self.chunk_size)]
+        with Pool(processes=self.processes) as pool:
+            for start, block in pool.imap_unordered(_resume_chunk, tasks):
+                data[start:start + len(block), week:] = block
+        return SimResultBatch(data)
+
+def run_with_snapshots(params: SimulationParams, seeds: Sequence[int], weeks: Optional[Sequence[int]] = None,
+                       chunk_size: Optional[int] = None, processes: Optional[int] = None) -> SnapshotRun:
+    """Python-engine run that snapshots every path at `weeks` (default: every DEFAULT_SNAPSHOT_EVERY weeks)"""
+    weeks = tuple(weeks) if weeks is not None else tuple(range(DEFAULT_SNAPSHOT_EVERY, params.T, DEFAULT_SNAPSHOT_EVERY))
+    bad = [w for w in weeks if not 0 <= w < params.T]
+    if bad:
+        raise ValueError(f"Snapshot weeks {bad} fall outside the horizon (0..{params.T - 1})")
+    processes = processes or cpu_count()
+    seeds = np.asarray(seeds)
+    chunk_size = chunk_size or default_chunk_size(len(seeds), processes)
+    data = np.empty((len(seeds), params.T, len(RESULT_FIELDS)))
+    snapshots: List[Dict[int, dict]] = [None] * len(seeds)
+    tasks = [(params, seeds[start:stop], weeks, start) for start, stop in chunk_bounds(len(seeds), chunk_size)]
+    with Pool(processes=processes) as pool:
+        for start, block, taken in pool.imap_unordered(_run_snapshot_chunk, tasks):
+            data[start:start + len(block)] = block
+            snapshots[start:start + len(block)] = taken
+    return SnapshotRun(params, seeds, SimResultBatch(data), snapshots, weeks, chunk_size, processes)
+
+def unlock_sweep(run: SnapshotRun, unlock_weeks: Sequence[int]) -> Dict[int, SimResultBatch]:
+    """The unlock-timing study: one what-if per unlock week, each resumed from its own prefix"""
+    results = {}
+    for week in unlock_weeks:
+        edited = dataclasses.replace(run.params, investorUnlockWeek=week)
+        began = time.perf_counter()
+        results[week] = run.what_if(edited)
+        print(f"↻ unlock week {week}: resumed from week {run.resume_week(edited)} in {time.perf_counter() - began:.2f}s")
+    return results
@@ -0,0 +1,191 @@
+import math
+import numpy as np
+from typing import Sequence
+from engine import SimulationParams, demand_from_noise
+from batch_engine import (
+    draw_shocks, plan_rows, SHOCK_DEMAND, SHOCK_PROVIDER, SHOCK_PRICE,
+    P_SUPPLY, P_PRICE, P_PROVIDERS, P_MAX_MINT, P_BURN_PCT, P_LIQUIDITY, P_UNLOCK_WEEK,
+    P_SELL_PCT, P_COST, P_CAPACITY, P_K_DEMAND, P_K_MINT, P_LAG, P_CHURN_THRESHOLD,
+    P_HARDWARE, P_COMPETITOR_YIELD, P_MU, P_SIGMA, P_KPI, P_RESERVE,
+)
+from results import SimResultBatch, FIELD_INDEX
+
+# Output columns resolved from RESULT_FIELDS once at import; numba freezes them as constants
+(R_PRICE, R_SUPPLY, R_DEMAND, R_DEMAND_SERVED, R_PROVIDERS,
+ R_CAPACITY, R_SERVICE_PRICE, R_MINTED, R_BURNED, R_UTILIZATION,
+ R_PROFIT, R_SCARCITY, R_INCENTIVE, R_SOLVENCY, R_NET_DAILY_LOSS,
+ R_DAILY_MINT_USD, R_DAILY_BURN_USD, R_NET_FLOW, R_CHURN, R_JOIN,
+ R_TREASURY, R_VAMPIRE_CHURN) = (
+    FIELD_INDEX[name] for name in (
+        'price', 'supply', 'demand', 'demand_served', 'providers',
+        'capacity', 'servicePrice', 'minted', 'burned', 'utilization',
+        'profit', 'scarcity', 'incentive', 'solvencyScore', 'netDailyLoss',
+        'dailyMintUsd', 'dailyBurnUsd', 'netFlow', 'churnCount', 'joinCount',
+        'treasuryBalance', 'vampireChurn',
+    ))
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # Optional dependency: backends.py falls back to the NumPy engine
+    njit = None
+    HAS_NUMBA = False
+
+def simulate_kernel(plan, demands, shocks, out):
+    """
+    Scalar engine step over plan rows: plan (n, P), demands (n, T),
+    shocks (n, T, N_SHOCKS) -> out (n, T, n_fields) in RESULT_FIELDS order.
+    """
+    n, T = demands.shape
+    for i in range(n):
+        p = plan[i]
+        lag = int(p[P_LAG])
+        unlock_week = int(p[P_UNLOCK_WEEK])
+        cost = p[P_COST]
+        max_mint = p[P_MAX_MINT]
+
+        supply = p[P_SUPPLY]
+        price = p[P_PRICE]
+        providers = p[P_PROVIDERS]
+        service_price = 0.5
+        treasury = 0.0
+        low_profit_weeks = 0
+        history = np.full(lag, cost * 1.5)
+
+        pool_usd = p[P_LIQUIDITY]
+        pool_tokens = pool_usd / price
+        k_amm = pool_usd * pool_tokens
+
+        for t in range(T):
+            demand = demands[i, t]
+            capacity = max(0.001, providers * p[P_CAPACITY])
+            demand_served = min(demand, capacity)
+            utilization = (demand_served / capacity) * 100
+
+            scarcity = (demand - capacity) / capacity
+            service_price = min(max(service_price * (1 + 0.6 * scarcity), 0.05), 5.0)
+
+            safe_price = max(price, 0.0001)
+            tokens_spent = (demand_served * service_price) / safe_price
+            burned = min(supply * 0.95, p[P_BURN_PCT] * tokens_spent)
+
+            # Emissions
+            saturation = min(1.0, providers / 5000.0)
+            emission_factor = 0.6 + 0.4 * math.tanh(demand / 15000.0) - (0.2 * saturation)
+            if p[P_KPI] > 0:
+                emission_factor *= max(0.3, min(1.0, demand_served / capacity))
+                if price < p[P_PRICE] * 0.8:
+                    emission_factor *= 0.6
+
+            minted = max(0.0, min(max_mint, max_mint * emission_factor))
+            supply = max(1000.0, supply + minted - burned)
+
+            # Rewards (ring buffer, oldest entry is the delayed reward)
+            instant_reward_value = (minted / max(providers, 0.1)) * safe_price
+            history[t % lag] = instant_reward_value
+            delayed_reward = history[(t + 1) % lag]
+            profit = delayed_reward - cost
+            incentive = profit / cost
+
+            if profit < p[P_CHURN_THRESHOLD]:
+                low_profit_weeks += 1
+            else:
+                low_profit_weeks = max(0, low_profit_weeks - 1)
+
+            churn_multiplier = 1.0
+            if low_profit_weeks > 2: churn_multiplier = 1.8
+            if low_profit_weeks > 5: churn_multiplier = 4.0
+
+            # Provider Growth/Churn
+            max_growth = providers * 0.15
+            raw_delta = (incentive * 4.5 * churn_multiplier) + shocks[i, t, SHOCK_PROVIDER] * 0.5
+            delta = max(-providers * 0.1, min(max_growth, raw_delta))
+
+            # Vampire Attack
+            vampire_churn_amount = 0.0
+            if p[P_COMPETITOR_YIELD] > 0.2:
+                vampire_churn_amount = providers * p[P_COMPETITOR_YIELD] * 0.025
+                delta -= vampire_churn_amount
+
+            # ROI Churn
+            payback_months = p[P_HARDWARE] / (instant_reward_value * 4.33) if instant_reward_value > 0 else 999.0
+            if payback_months > 24: delta -= providers * 0.0125
+            if payback_months > 36: delta -= providers * 0.025
+
+            net_flow = 0.0
+
+            # Price Model
+            if t == unlock_week:
+                unlock_amount = supply * p[P_SELL_PCT]
+                pool_tokens = pool_tokens + unlock_amount
+                pool_usd = k_amm / pool_tokens
+                next_price = pool_usd / pool_tokens
+                net_flow = -unlock_amount
+
+                price_drop_pct = max(0.0, 1 - (next_price / price))
+                delta -= providers * price_drop_pct * 1.5
+            else:
+                demand_pressure = p[P_K_DEMAND] * math.tanh(scarcity)
+                dilution_pressure = -p[P_K_MINT] * (minted / supply) * 100
+                log_ret = p[P_MU] + demand_pressure + dilution_pressure + p[P_SIGMA] * shocks[i, t, SHOCK_PRICE]
+                next_price = max(0.01, price * math.exp(log_ret))
+
+                # Re-sync AMM
+                pool_usd = math.sqrt(k_amm * next_price)
+                pool_tokens = math.sqrt(k_amm / next_price)
+
+            # Treasury / Sinking Fund
+            daily_mint_usd = (minted / 7) * price
+            daily_burn_usd = (burned / 7) * price
+            net_daily_loss = daily_burn_usd - daily_mint_usd
+            solvency_score = daily_burn_usd / daily_mint_usd if daily_mint_usd > 0 else 10.0
+
+            if p[P_RESERVE] > 0:
+                treasury += minted * price * 0.1
+                if next_price < price:
+                    next_price = price - ((price - next_price) * 0.5)
+            else:
+                next_price = next_price * 1.001
+
+            row = out[i, t]
+            row[R_PRICE] = price
+            row[R_SUPPLY] = supply
+            row[R_DEMAND] = demand
+            row[R_DEMAND_SERVED] = demand_served
+            row[R_PROVIDERS] = providers
+            row[R_CAPACITY] = capacity
+            row[R_SERVICE_PRICE] = service_price
+            row[R_MINTED] = minted
+            row[R_BURNED] = burned
+            row[R_UTILIZATION] = utilization
+            row[R_PROFIT] = profit
+            row[R_SCARCITY] = scarcity
+            row[R_INCENTIVE] = incentive
+            row[R_SOLVENCY] = solvency_score
+            row[R_NET_DAILY_LOSS] = net_daily_loss
+            row[R_DAILY_MINT_USD] = daily_mint_usd
+            row[R_DAILY_BURN_USD] = daily_burn_usd
+            row[R_NET_FLOW] = net_flow
+            row[R_CHURN] = -delta if delta < 0 else 0.0
+            row[R_JOIN] = delta if delta > 0 else 0.0
+            row[R_TREASURY] = treasury
+            row[R_VAMPIRE_CHURN] = vampire_churn_amount
+
+            price = next_price
+            providers = max(2.0, providers + delta)
+
+compiled_kernel = njit(cache=True, error_model='numpy')(simulate_kernel) if HAS_NUMBA else None
+
+def simulate_rows(plan: np.ndarray, demands: np.ndarray, shocks: np.ndarray, compiled: bool = True) -> SimResultBatch:
+    """Runs the plan kernel (compiled when numba is available and `compiled` is set)"""
+    n, T = demands.shape
+    batch = SimResultBatch.empty(n, T)
+    kernel = compiled_kernel if (compiled and HAS_NUMBA) else simulate_kernel
+    kernel(np.ascontiguousarray(plan), np.ascontiguousarray(demands), np.ascontiguousarray(shocks), batch.data)
+    return batch
+
+def simulate_plan(params: SimulationParams, seeds: Sequence[int], shocks: np.ndarray = None, compiled: bool = True) -> SimResultBatch:
+    if shocks is None:
+        shocks = draw_shocks(params, seeds)
+    demands = demand_from_noise(params.T, 12000, params.demandType, shocks[:, :, SHOCK_DEMAND])
+    return simulate_rows(plan_rows(params, shocks.shape[0]), demands, shocks, compiled)
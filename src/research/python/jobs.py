@@ -0,0 +1,195 @@
+import argparse
+import dataclasses
+import json
+import sys
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from functools import partial
+from typing import List, Optional, Sequence
+from engine import SimulationParams
+from backends import BACKENDS
+from scheduler import ScenarioScheduler
+from cache import ResultCache
+from monte_carlo import make_seeds
+from export_data import EXPORT_FORMATS, research_base_params, aggregate_kind, cached_stats, write_cached, write_scenario
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# How each scenario's seed list is drawn:
+#   fixed  - from the scenario's own params.seed (repeatable, cacheable)
+#   common - one list from execution.seed shared by every scenario (paired comparisons)
+#   random - fresh seeds on every run
+SEED_POLICIES = ('fixed', 'common', 'random')
+PARAM_FIELDS = {f.name for f in dataclasses.fields(SimulationParams)}
+
+@dataclass
+class ExecutionSettings:
+    workers: Optional[int] = None
+    chunk_size: Optional[int] = None
+    backend: str = 'python'
+    n_sims: int = 1000
+    seed_policy: str = 'fixed'
+    seed: int = 42
+    output_format: str = 'json'
+    quantized: bool = False
+    output_dir: Optional[str] = None
+    cache: bool = False
+
+    def __post_init__(self):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{self.backend}' (available: {', '.join(BACKENDS)})")
+        if self.seed_policy not in SEED_POLICIES:
+            raise ValueError(f"Unknown seed_policy '{self.seed_policy}' (available: {', '.join(SEED_POLICIES)})")
+        if self.output_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown output_format '{self.output_format}' (available: {', '.join(EXPORT_FORMATS)})")
+        if self.cache and self.seed_policy == 'random':
+            raise ValueError("seed_policy 'random' never repeats a seed list, so it cannot be cached")
+
+@dataclass
+class ScenarioSpec:
+    name: str
+    params: SimulationParams
+    filename: str
+    n_sims: int
+
+@dataclass
+class JobSpec:
+    execution: ExecutionSettings
+    scenarios: List[ScenarioSpec] = field(default_factory=list)
+
+def apply_overrides(params: SimulationParams, overrides: dict, where: str) -> SimulationParams:
+    unknown = set(overrides) - PARAM_FIELDS
+    if unknown:
+        raise ValueError(f"{where}: unknown SimulationParams field(s) {', '.join(sorted(unknown))}")
+    return dataclasses.replace(params, **overrides)
+
+def default_filename(name: str) -> str:
+    slug = ''.join(c if c.isalnum() else '_' for c in name.lower()).strip('_')
+    return f"research_{slug}.json"
+
+def parse_spec(spec: dict) -> JobSpec:
+    """
+    spec = {"execution": {...ExecutionSettings}, "base": {...overrides of the research base},
+            "scenarios": [{"name": ..., "overrides": {...}, "filename": ..., "n_sims": ...}]}
+    """
+    unknown = set(spec) - {'execution', 'base', 'scenarios'}
+    if unknown:
+        raise ValueError(f"Unknown job spec section(s) {', '.join(sorted(unknown))}")
+    settings = spec.get('execution', {})
+    bad = set(settings) - {f.name for f in dataclasses.fields(ExecutionSettings)}
+    if bad:
+        raise ValueError(f"execution: unknown setting(s) {', '.join(sorted(bad))}")
+    execution = ExecutionSettings(**settings)
+    base = apply_overrides(research_base_params(), spec.get('base', {}), 'base')
+
+    scenarios, names = [], set()
+    for i, entry in enumerate(spec.get('scenarios', [])):
+        if 'name' not in entry:
+            raise ValueError(f"scenarios[{i}] has no name")
+        if entry['name'] in names:
+            raise ValueError(f"Scenario '{entry['name']}' is listed twice")
+        names.add(entry['name'])
+        params = apply_overrides(base, entry.get('overrides', {}), f"scenario '{entry['name']}'")
+        scenarios.append(ScenarioSpec(entry['name'], params, entry.get('filename') or default_filename(entry['name']),
+                                      int(entry.get('n_sims', execution.n_sims))))
+    if not scenarios:
+        raise ValueError("Job spec lists no scenarios")
+    return JobSpec(execution, scenarios)
+
+def load_spec(path: str) -> JobSpec:
+    """Reads a .json or .toml job spec"""
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise ValueError("TOML job specs need Python 3.11+ (tomllib); use JSON instead")
+        with open(path, 'rb') as f:
+            return parse_spec(tomllib.load(f))
+    with open(path) as f:
+        return parse_spec(json.load(f))
+
+def scenario_seeds(job: JobSpec, scenario: ScenarioSpec) -> np.ndarray:
+    policy = job.execution.seed_policy
+    if policy == 'fixed':
+        return make_seeds(scenario.n_sims, scenario.params.seed)
+    if policy == 'common':
+        return make_seeds(scenario.n_sims, job.execution.seed)
+    return make_seeds(scenario.n_sims)
+
+def run_job(job: JobSpec) -> List[dict]:
+    """
+    Runs every scenario of a job on one ScenarioScheduler pool and writes each
+    export as it finishes. Returns one timing row per scenario.
+    """
+    ex = job.execution
+    cache = ResultCache() if ex.cache else None
+    formats = dict(export_format=ex.output_format, quantized=ex.quantized)
+    kind = aggregate_kind(ex.backend)
+    rows = {}
+    began = time.perf_counter()
+    with ScenarioScheduler(processes=ex.workers, backend=ex.backend, chunk_size=ex.chunk_size) as scheduler:
+        for scenario in job.scenarios:
+            seeds = scenario_seeds(job, scenario)
+            hit = cached_stats(cache, scenario.params, seeds, kind) if cache is not None else None
+            if hit is not None:
+                write_cached(scenario.name, scenario.params, scenario.filename, hit, ex.output_dir, **formats)
+                rows[scenario.name] = {'scenario': scenario.name, 'n_sims': len(seeds), 'status': 'cached',
+                                       'done_at': time.perf_counter() - began, 'cpu_seconds': 0.0, 'chunks': 0}
+                continue
+            scheduler.submit(scenario.name, scenario.params, seeds=seeds,
+                             on_complete=partial(write_scenario, scenario.name, scenario.params, scenario.filename,
+                                                 output_dir=ex.output_dir, cache=cache, seeds=seeds, kind=kind, **formats))
+        if scheduler.jobs:
+            for name, finished in scheduler.run().items():
+                rows[name] = {'scenario': name, 'n_sims': len(finished.seeds), 'status': 'run',
+                              'done_at': finished.duration, 'cpu_seconds': float(sum(finished.chunk_seconds)),
+                              'chunks': len(finished.chunk_seconds)}
+    return [rows[s.name] for s in job.scenarios]
+
+def print_timings(rows: Sequence[dict]):
+    print(f"\n{'scenario':<24} {'status':>7} {'n_sims':>8} {'chunks':>7} {'done at':>9} {'cpu s':>9} {'sims/cpu-s':>11}")
+    for r in rows:
+        rate = r['n_sims'] / r['cpu_seconds'] if r['cpu_seconds'] else float('nan')
+        print(f"{r['scenario']:<24} {r['status']:>7} {r['n_sims']:>8} {r['chunks']:>7} "
+              f"{r['done_at']:>8.2f}s {r['cpu_seconds']:>9.2f} {rate:>11.0f}")
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the research scenarios of a JSON/TOML job spec")
+    parser.add_argument('spec', help="job spec (.json or .toml)")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--chunk-size', type=int)
+    parser.add_argument('--backend', choices=sorted(BACKENDS))
+    parser.add_argument('--n-sims', type=int, help="override every scenario's path count")
+    parser.add_argument('--seed-policy', choices=SEED_POLICIES)
+    parser.add_argument('--output-format', choices=EXPORT_FORMATS)
+    parser.add_argument('--output-dir')
+    parser.add_argument('--timings', help="also write the per-scenario timing rows to this JSON file")
+    parser.add_argument('--dry-run', action='store_true', help="validate the spec and list its scenarios")
+    args = parser.parse_args(argv)
+
+    job = load_spec(args.spec)
+    overrides = {k: v for k, v in (('workers', args.workers), ('chunk_size', args.chunk_size),
+                                   ('backend', args.backend), ('seed_policy', args.seed_policy),
+                                   ('output_format', args.output_format), ('output_dir', args.output_dir))
+                 if v is not None}
+    job.execution = dataclasses.replace(job.execution, **overrides)
+    if args.n_sims is not None:
+        for scenario in job.scenarios:
+            scenario.n_sims = args.n_sims
+
+    if args.dry_run:
+        print(f"Execution: {dataclasses.asdict(job.execution)}")
+        for s in job.scenarios:
+            print(f"  {s.name}: {s.n_sims} sims -> {s.filename}")
+        return 0
+    rows = run_job(job)
+    print_timings(rows)
+    if args.timings:
+        with open(args.timings, 'w') as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
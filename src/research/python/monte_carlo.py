@@ -1,43 +1,229 @@
+import os
 import time
 import numpy as np
 import pandas as pd
 from multiprocessing import Pool, cpu_count
-from engine import SimulationParams, simulate_one, SimResult
+from typing import List, Optional, Sequence, Tuple, Union
+from engine import SimulationParams, SimResult
+from backends import get_backend
+from results import SimResultBatch, key_metrics
+from streaming import StreamingAggregator
+from parallel import run_chunked, chunk_bounds, default_chunk_size
+from cache import ResultCache
+from convergence import PrecisionReport, HIGH_MIN_SIMS
+from absorbing import death_histogram, death_summary
+from variance_reduction import shock_tensor, VARIANCE_REDUCTION_MODES
+from profiling import run_profiled
+from telemetry import RunTelemetry, print_telemetry
+from checkpoint import ChunkCheckpoint, DEFAULT_CHECKPOINT_CHUNK
 
-def run_simulation_batch(args):
-    """Wrapper for multiprocessing"""
-    params, seed = args
-    return simulate_one(params, seed)
+def make_seeds(n_sims: int, seed: Optional[int] = None) -> np.ndarray:
+    """Fresh random seeds, or a reproducible seed list derived from `seed`"""
+    if seed is None:
+        return np.random.randint(0, 1000000, n_sims)
+    return np.random.default_rng(seed).integers(0, 1000000, n_sims)
 
-def run_monte_carlo(base_params: SimulationParams, n_sims: int = 1000):
+def run_streaming_chunk(args):
+    """Wrapper for multiprocessing: folds a chunk of paths into O(T) accumulators"""
+    params, seeds, backend, variance_reduction, start = args
+    began = time.time()
+    shocks = None if variance_reduction == 'none' else shock_tensor(params, seeds, variance_reduction)
+    agg = StreamingAggregator(params.T)
+    agg.add(get_backend(backend)(params, seeds, shocks))
+    return agg, (os.getpid(), start, start + len(seeds), began, time.time())
+
+def check_variance_reduction(variance_reduction: str, backend: str):
+    if variance_reduction not in VARIANCE_REDUCTION_MODES:
+        raise ValueError(f"Unknown variance_reduction '{variance_reduction}' "
+                         f"(available: {', '.join(VARIANCE_REDUCTION_MODES)})")
+    if variance_reduction != 'none' and backend == 'python':
+        raise ValueError("Variance reduction feeds a shock tensor; use the 'numpy' or 'jit' backend")
+
+def run_monte_carlo(base_params: SimulationParams, n_sims: int = 1000, backend: str = 'python',
+                    streaming: bool = False, chunk_size: int = None,
+                    processes: int = None, seeds: Optional[Sequence[int]] = None,
+                    cache: Optional[ResultCache] = None, adaptive: bool = False,
+                    target_precision: float = 0.02,
+                    variance_reduction: str = 'none',
+                    profile_path: Optional[str] = None, progress: Optional[bool] = None,
+                    telemetry_path: Optional[str] = None,
+                    checkpoint_dir: Optional[str] = None) -> Union[SimResultBatch, StreamingAggregator]:
+    """
+    With a cache, runs are keyed by params, seeds and engine version; when no
+    seeds are given they are derived from params.seed so the run is repeatable.
+    With adaptive=True, n_sims is the budget and the run stops early once
+    `target_precision` is reached (see run_adaptive).
+    variance_reduction='antithetic' | 'sobol' pre-generates the shock tensor
+    (see variance_reduction.py) and needs the 'numpy' or 'jit' backend; in
+    streaming mode each chunk gets its own antithetic pairs / Sobol block.
+    With profile_path, the python engine runs with per-phase timers and event
+    counters; the merged report goes to profile_path plus a Chrome trace next
+    to it (see profiling.py).
+    Chunks are collected as they finish behind a progress bar (progress=None:
+    only on a terminal); telemetry_path writes the per-chunk JSON-lines stream
+    of telemetry.RunTelemetry.
+    With checkpoint_dir, every finished chunk is saved there (checkpoint.py)
+    and a rerun with the same params, seeds, backend and variance reduction
+    only simulates the missing chunks; the result is bit-identical to an
+    uninterrupted run and the checkpoint is removed once the run completes.
+    Without explicit seeds they are derived from params.seed, as for caching.
+    """
+    check_variance_reduction(variance_reduction, backend)
+    if profile_path is not None and (backend != 'python' or streaming or adaptive or cache is not None
+                                     or variance_reduction != 'none'):
+        raise ValueError("Profiling instruments simulate_one: use the 'python' backend without "
+                         "streaming, adaptive, caching or variance reduction")
+    if checkpoint_dir is not None and (streaming or adaptive or profile_path is not None):
+        raise ValueError("Checkpointing saves full-path chunks; it cannot be combined with streaming, "
+                         "adaptive or profiled runs")
+    if cache is not None and streaming:
+        raise ValueError("Caching stores full paths; it cannot be combined with streaming=True")
+    if adaptive:
+        if streaming or cache is not None:
+            raise ValueError("Adaptive runs need every path in memory and are not cached")
+        results, report = run_adaptive(base_params, target_precision, max_sims=n_sims, backend=backend,
+                                       seeds=seeds, chunk_size=chunk_size, processes=processes,
+                                       variance_reduction=variance_reduction, telemetry_path=telemetry_path,
+                                       progress=progress)
+        return results
+    if seeds is None:
+        seeds = make_seeds(n_sims, base_params.seed if cache is not None or checkpoint_dir is not None else None)
+    seeds = np.asarray(seeds)
+    n_sims = len(seeds)
+    
+    if cache is not None:
+        kind = f'paths-{backend}' if variance_reduction == 'none' else f'paths-{backend}-{variance_reduction}'
+        key = cache.key(base_params, seeds, kind)
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"Loaded {n_sims} cached Monte Carlo Simulations ({key[:12]})")
+            return SimResultBatch(cached['data'])
+    
     print(f"Starting {n_sims} Monte Carlo Simulations...")
     start_time = time.time()
+    processes = processes or cpu_count()
     
-    # Generate random seeds
-    seeds = np.random.randint(0, 1000000, n_sims)
-    tasks = [(base_params, seed) for seed in seeds]
-    
-    # Parallel Execution
-    with Pool(processes=cpu_count()) as pool:
-        results = pool.map(run_simulation_batch, tasks)
+    if streaming:
+        # Workers return merged sketches instead of paths, so memory stays O(T)
+        chunk_size = chunk_size or min(10_000, default_chunk_size(n_sims, processes))
+        bounds = chunk_bounds(n_sims, chunk_size)
+        tasks = ((base_params, seeds[start:stop], backend, variance_reduction, start) for start, stop in bounds)
+        results = StreamingAggregator(base_params.T)
+        with RunTelemetry(n_sims, len(bounds), processes, telemetry_path, progress) as telemetry, \
+                Pool(processes=processes) as pool:
+            for part, chunk in pool.imap_unordered(run_streaming_chunk, tasks):
+                results.merge(part)
+                telemetry.chunk_done(*chunk)
+    elif profile_path is not None:
+        results, profile = run_profiled(base_params, seeds, chunk_size, processes)
+        telemetry = None
+    else:
+        # Parallel Execution: chunks written straight into shared memory
+        shocks = None if variance_reduction == 'none' else shock_tensor(base_params, seeds, variance_reduction)
+        checkpoint = None
+        if checkpoint_dir is not None:
+            checkpoint = ChunkCheckpoint(base_params, seeds, backend, variance_reduction,
+                                         chunk_size or DEFAULT_CHECKPOINT_CHUNK, checkpoint_dir)
+            chunk_size = checkpoint.chunk_size
+        chunk_size = chunk_size or default_chunk_size(n_sims, processes)
+        with RunTelemetry(n_sims, len(chunk_bounds(n_sims, chunk_size)), processes, telemetry_path,
+                          progress) as telemetry:
+            results = run_chunked(base_params, seeds, backend, chunk_size, processes, shocks, telemetry,
+                                  checkpoint)
+        if checkpoint is not None:
+            checkpoint.clear()
         
     duration = time.time() - start_time
     print(f"Completed in {duration:.2f} seconds ({n_sims / duration:.0f} sims/sec)")
+    if telemetry is not None:
+        print_telemetry(telemetry.final)
+    print_absorbed(absorbing_stats(results))
+    if profile_path is not None:
+        profile.print_summary()
+        report_path, trace_path = profile.write(profile_path)
+        print(f"✅ Profile written to {report_path} (trace: {trace_path})")
+    
+    if cache is not None:
+        cache.put(key, {'data': results.data}, meta={'kind': kind, 'n_sims': n_sims})
     
     return results
 
-def aggregate_results(results: list[list[SimResult]], T: int):
+def run_adaptive(base_params: SimulationParams, target_precision: float = 0.02,
+                 min_sims: int = HIGH_MIN_SIMS, max_sims: int = 20_000, batch_size: int = 200,
+                 backend: str = 'python', seeds: Optional[Sequence[int]] = None,
+                 chunk_size: int = None, processes: int = None,
+                 variance_reduction: str = 'none', telemetry_path: Optional[str] = None,
+                 progress: Optional[bool] = None) -> Tuple[SimResultBatch, PrecisionReport]:
+    """
+    Runs in batches until the relative standard error of every exported
+    statistic (mean, p05, p95 of each metric, averaged over weeks) is at most
+    `target_precision` and assess_convergence rates the run 'high', or until
+    `max_sims` paths are spent. Seeds are consumed in order, so the result is
+    identical to a fixed run over the same seed prefix. With variance
+    reduction the shock tensor is generated for the whole budget up front.
+    One RunTelemetry covers the whole run: its bar is sized to the budget and
+    closes wherever the run stops.
+    """
+    check_variance_reduction(variance_reduction, backend)
+    if seeds is None:
+        seeds = make_seeds(max_sims, base_params.seed)
+    seeds = np.asarray(seeds)[:max_sims]
+    max_sims = len(seeds)
+    shocks = None if variance_reduction == 'none' else shock_tensor(base_params, seeds, variance_reduction)
+    
+    print(f"Starting adaptive Monte Carlo (target relative SE {target_precision:.1%}, budget {max_sims})...")
+    start_time = time.time()
+    processes = processes or cpu_count()
+    parts = []
+    n_done, n_next = 0, min(max(min_sims, batch_size), max_sims)
+    with RunTelemetry(max_sims, 0, processes, telemetry_path, progress, desc='Adaptive Monte Carlo') as telemetry:
+        while True:
+            batch_chunk = chunk_size or default_chunk_size(n_next - n_done, processes)
+            telemetry.next_batch(n_done, len(chunk_bounds(n_next - n_done, batch_chunk)))
+            parts.append(run_chunked(base_params, seeds[n_done:n_next], backend, batch_chunk, processes,
+                                     None if shocks is None else shocks[n_done:n_next], telemetry))
+            n_done = n_next
+            results = SimResultBatch.concat(parts)
+            report = PrecisionReport.measure(results, base_params.T, target_precision)
+            if report.converged or n_done >= max_sims:
+                report.stopped = 'converged' if report.converged else 'budget'
+                break
+            # Standard errors shrink like 1/sqrt(n): aim for the projected size, at most doubling per step
+            projected = n_done * (report.worst / target_precision) ** 2
+            n_next = int(np.clip(np.ceil(projected / batch_size) * batch_size, n_done + batch_size, 2 * n_done))
+            n_next = min(n_next, max_sims)
+    
+    duration = time.time() - start_time
+    print(f"Stopped ({report.stopped}) after {n_done} sims in {duration:.2f} seconds: "
+          f"max relative SE {report.worst:.2%}, {report.assessment.label}")
+    print_telemetry(telemetry.final)
+    print_absorbed(absorbing_stats(results))
+    return results, report
+
+def absorbing_stats(results: Union[SimResultBatch, StreamingAggregator]) -> dict:
+    """Collapse detection count, death probability and time-of-death quantiles for a run"""
+    if isinstance(results, StreamingAggregator):
+        return results.death_summary()
+    return death_summary(death_histogram(results))
+
+def print_absorbed(stats: dict):
+    if stats['n_absorbed']:
+        print(f"☠ {stats['n_absorbed']} paths absorbed ({stats['death_probability']:.1%}), "
+              f"median time of death: week {stats['time_of_death_median']:.0f}")
+
+def aggregate_results(results: Union[SimResultBatch, StreamingAggregator, List[List[SimResult]]], T: int):
+    if isinstance(results, StreamingAggregator):
+        return results.result()
+    if not isinstance(results, SimResultBatch):
+        results = SimResultBatch.from_paths(results)
+        
     # Extract time series for key metrics
     # Shape: (n_sims, T)
-    prices = np.zeros((len(results), T))
-    providers = np.zeros((len(results), T))
-    revenues = np.zeros((len(results), T))
-    
-    for i, res in enumerate(results):
-        for t in range(T):
-            prices[i, t] = res[t].price
-            providers[i, t] = res[t].providers
-            revenues[i, t] = res[t].demand_served * res[t].servicePrice
+    return aggregate_series(key_metrics(results, T))
+
+def aggregate_series(series: dict):
+    """aggregate_results over (n_sims, T) price / providers / revenue arrays (see key_metrics)"""
+    prices, providers, revenues = series['price'], series['providers'], series['revenue']
             
     # Calculate Percentiles
     agg = {
@@ -60,10 +246,10 @@ def aggregate_results(results: list[list[SimResult]], T: int):
     
     return agg
 
-if __name__ == "__main__":
+def baseline_params() -> SimulationParams:
     # Define Baseline Parameters (Onocoy V3 Calibrated)
     # Source: src/data/protocols.ts [ono_v3_calibrated]
-    params = SimulationParams(
+    return SimulationParams(
         T=52,
         initialSupply=410_000_000,
         initialPrice=0.10,
@@ -88,6 +274,9 @@ if __name__ == "__main__":
         emissionModel='fixed',
         revenueStrategy='burn'
     )
+
+if __name__ == "__main__":
+    params = baseline_params()
     
     # Run
     sim_results = run_monte_carlo(params, n_sims=1000)
@@ -0,0 +1,260 @@
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Sequence, Tuple
+from engine import SimulationParams, RESULT_FIELDS
+from backends import get_row_kernel
+from sweep import shock_stream, simulate_configs
+from sensitivity import configs_for
+
+MIN_POPULATION = 4  # a target plus three distinct DE/rand/1 partners
+
+STATS = {
+    'mean': np.mean,
+    'p05': lambda v: np.percentile(v, 5),
+    'p50': np.median,
+    'p95': lambda v: np.percentile(v, 95),
+}
+
+@dataclass(frozen=True)
+class Constraint:
+    """`stat` of `metric` at `week` must satisfy `op` ('>' or '<') against `value`"""
+    metric: str
+    stat: str
+    op: str
+    value: float
+    week: int = -1
+
+    def violation(self, observed: float) -> float:
+        """Shortfall relative to the threshold; 0 when satisfied"""
+        gap = self.value - observed if self.op == '>' else observed - self.value
+        return max(0.0, gap) / max(abs(self.value), 1e-12)
+
+@dataclass
+class Objective:
+    """
+    e.g. maximize p05 providers at the final week subject to p05 price > X:
+    Objective('providers', 'p05', constraints=[Constraint('price', 'p05', '>', X)])
+    """
+    metric: str = 'providers'
+    stat: str = 'p05'
+    week: int = -1
+    maximize: bool = True
+    constraints: List[Constraint] = field(default_factory=list)
+
+    def __post_init__(self):
+        for metric, stat, _ in self.series():
+            if metric not in RESULT_FIELDS:
+                raise ValueError(f"Unknown metric '{metric}' (available: {', '.join(RESULT_FIELDS)})")
+            if stat not in STATS:
+                raise ValueError(f"Unknown stat '{stat}' (available: {', '.join(STATS)})")
+        for c in self.constraints:
+            if c.op not in ('>', '<'):
+                raise ValueError(f"Constraint op must be '>' or '<', got '{c.op}'")
+
+    def series(self) -> List[Tuple[str, str, int]]:
+        return [(self.metric, self.stat, self.week)] + [(c.metric, c.stat, c.week) for c in self.constraints]
+
+    def keys(self) -> List[Tuple[str, int]]:
+        """Distinct (metric, week) path values the objective reads"""
+        return list(dict.fromkeys((metric, week) for metric, _, week in self.series()))
+
+@dataclass
+class Candidate:
+    """One parameter vector and the per-path values simulated for it so far"""
+    x: np.ndarray
+    samples: Dict[Tuple[str, int], np.ndarray]
+
+    @property
+    def n_sims(self) -> int:
+        return len(next(iter(self.samples.values())))
+
+    def score(self, objective: Objective, n: Optional[int] = None) -> Tuple[float, float]:
+        """(value, violation) on the first n paths (all by default)"""
+        def stat(metric, name, week):
+            return float(STATS[name](self.samples[(metric, week)][:n]))
+        value = stat(objective.metric, objective.stat, objective.week)
+        violation = sum(c.violation(stat(c.metric, c.stat, c.week)) for c in objective.constraints)
+        return value, violation
+
+    def rank(self, objective: Objective, n: Optional[int] = None) -> tuple:
+        """Sort key, lower is better: feasible first, then least violation, then best value"""
+        value, violation = self.score(objective, n)
+        return (violation > 0, violation, -value if objective.maximize else value)
+
+@dataclass
+class OptimizationResult:
+    best_params: SimulationParams
+    best_value: float
+    best_violation: float
+    names: List[str]
+    best_x: np.ndarray
+    history: List[dict]
+    paths_simulated: int
+    paths_full_budget: int  # what the same search costs without successive halving
+
+    @property
+    def feasible(self) -> bool:
+        return self.best_violation == 0
+
+def simulate_outputs(args) -> np.ndarray:
+    """Pool task: (n_configs, n_paths, n_keys) path values for one block of configs"""
+    configs, seeds, backend, keys = args
+    batch = simulate_configs(configs, get_row_kernel(backend), shock_stream(seeds))
+    n_sims = len(seeds)
+    return np.stack([batch[metric][:, week].reshape(len(configs), n_sims) for metric, week in keys], axis=-1)
+
+def halving_rungs(min_sims: int, n_sims: int, eta: int) -> List[int]:
+    """Path budgets min_sims, min_sims*eta, ... ending at exactly n_sims"""
+    rungs = []
+    budget = min_sims
+    while budget < n_sims:
+        rungs.append(budget)
+        budget *= eta
+    return rungs + [n_sims]
+
+class Optimizer:
+    """
+    Differential evolution (DE/rand/1/bin) over bounded SimulationParams.
+    Every generation's trials go through successive halving: all start on a
+    small path budget, and at each rung trials that already lose to their
+    parent on the same paths are pruned before the survivors get eta times
+    more paths. All candidates share one seed list, so comparisons at every
+    rung are paired (common random numbers).
+    """
+
+    def __init__(self, base_params: SimulationParams, bounds: Dict[str, Tuple[float, float]],
+                 objective: Objective, n_sims: int = 1000, min_sims: int = 50, eta: int = 3,
+                 backend: str = 'numpy', processes: Optional[int] = None, seed: Optional[int] = None,
+                 max_rows: int = 200_000):
+        self.base_params = base_params
+        self.names = list(bounds)
+        self.lows, self.highs = np.array(list(bounds.values()), dtype=float).T
+        self.objective = objective
+        self.keys = objective.keys()
+        self.rungs = halving_rungs(min_sims, n_sims, eta)
+        self.eta = eta
+        self.backend = backend
+        self.processes = processes or cpu_count()
+        self.max_rows = max_rows
+        self.rng = np.random.default_rng(base_params.seed if seed is None else seed)
+        self.seeds = self.rng.integers(0, 1000000, n_sims)
+        self.pool = None
+        self.paths_simulated = 0
+
+    def __enter__(self) -> 'Optimizer':
+        self.pool = Pool(processes=self.processes)
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.close()
+        self.pool.join()
+        self.pool = None
+
+    def extend(self, candidates: Sequence[Candidate], n: int):
+        """Simulates paths up to n for every candidate, reusing the paths it already has"""
+        groups: Dict[int, List[Candidate]] = {}
+        for c in candidates:
+            if c.n_sims < n:
+                groups.setdefault(c.n_sims, []).append(c)
+        for have, group in groups.items():
+            seeds = self.seeds[have:n]
+            configs = configs_for(self.base_params, self.names, np.stack([c.x for c in group]))
+            per_block = max(1, self.max_rows // len(seeds))
+            tasks = [(configs[i:i + per_block], seeds, self.backend, self.keys)
+                     for i in range(0, len(configs), per_block)]
+            values = np.concatenate(self.pool.map(simulate_outputs, tasks))
+            for c, v in zip(group, values):
+                for k, key in enumerate(self.keys):
+                    c.samples[key] = np.concatenate([c.samples[key], v[:, k]])
+            self.paths_simulated += len(group) * len(seeds)
+
+    def new_candidates(self, X: np.ndarray) -> List[Candidate]:
+        return [Candidate(x, {key: np.empty(0) for key in self.keys}) for x in X]
+
+    def trials(self, X: np.ndarray, mutation: float, crossover: float) -> np.ndarray:
+        """DE/rand/1/bin: x_a + F (x_b - x_c), binomial crossover with each parent, clipped to bounds"""
+        P, d = X.shape
+        picks = np.array([self.rng.choice(np.delete(np.arange(P), i), 3, replace=False) for i in range(P)])
+        mutant = X[picks[:, 0]] + mutation * (X[picks[:, 1]] - X[picks[:, 2]])
+        cross = self.rng.random((P, d)) < crossover
+        cross[np.arange(P), self.rng.integers(0, d, P)] = True  # at least one gene from the mutant
+        return np.clip(np.where(cross, mutant, X), self.lows, self.highs)
+
+    def successive_halving(self, trials: List[Candidate], parents: List[Candidate]) -> List[int]:
+        """Indices of trials that beat their parent at the full budget"""
+        alive = list(range(len(trials)))
+        for k, budget in enumerate(self.rungs):
+            self.extend([trials[i] for i in alive], budget)
+            # Doomed: already worse than the parent on the same paths
+            alive = [i for i in alive
+                     if trials[i].rank(self.objective, budget) < parents[i].rank(self.objective, budget)]
+            if k < len(self.rungs) - 1:
+                keep = max(1, -(-len(trials) // self.eta ** (k + 1)))
+                alive = sorted(alive, key=lambda i: trials[i].rank(self.objective, budget))[:keep]
+            if not alive:
+                break
+        return alive
+
+    def run(self, population: int = 16, generations: int = 20, mutation: float = 0.7,
+            crossover: float = 0.9) -> OptimizationResult:
+        check_population(population)
+        if self.pool is None:
+            raise RuntimeError("Optimizer must be used as a context manager")
+        d = len(self.names)
+        n_sims = self.rungs[-1]
+        began = time.perf_counter()
+
+        X = self.lows + self.rng.random((population, d)) * (self.highs - self.lows)
+        parents = self.new_candidates(X)
+        self.extend(parents, n_sims)
+
+        history = []
+        for g in range(generations):
+            trials = self.new_candidates(self.trials(X, mutation, crossover))
+            winners = self.successive_halving(trials, parents)
+            for i in winners:
+                parents[i] = trials[i]
+                X[i] = trials[i].x
+            best = min(parents, key=lambda c: c.rank(self.objective))
+            value, violation = best.score(self.objective)
+            history.append({'generation': g, 'best_value': value, 'best_violation': violation,
+                            'replaced': len(winners), 'paths_simulated': self.paths_simulated})
+            print(f"gen {g:>3}: best {self.objective.stat} {self.objective.metric} = {value:,.4g}"
+                  f"{'' if violation == 0 else f' (violation {violation:.3g})'}, {len(winners)} replaced, "
+                  f"{self.paths_simulated:,} paths ({time.perf_counter() - began:.1f}s)")
+
+        best = min(parents, key=lambda c: c.rank(self.objective))
+        value, violation = best.score(self.objective)
+        return OptimizationResult(
+            best_params=configs_for(self.base_params, self.names, best.x[None])[0],
+            best_value=value, best_violation=violation, names=self.names, best_x=best.x,
+            history=history, paths_simulated=self.paths_simulated,
+            paths_full_budget=population * (generations + 1) * n_sims,
+        )
+
+def check_population(population: int):
+    if population < MIN_POPULATION:
+        raise ValueError(f"population must be at least {MIN_POPULATION} for DE/rand/1 (got {population})")
+
+def optimize(base_params: SimulationParams, bounds: Dict[str, Tuple[float, float]], objective: Objective,
+             population: int = 16, generations: int = 20, n_sims: int = 1000, min_sims: int = 50,
+             eta: int = 3, backend: str = 'numpy', processes: Optional[int] = None,
+             seed: Optional[int] = None) -> OptimizationResult:
+    check_population(population)  # before the pool starts
+    with Optimizer(base_params, bounds, objective, n_sims, min_sims, eta, backend, processes, seed) as opt:
+        return opt.run(population, generations)
+
+if __name__ == "__main__":
+    from export_data import research_scenarios
+    _, params, _ = research_scenarios()[0]
+    bounds = {'maxMintWeekly': (1_000_000, 6_000_000), 'kMintPrice': (0.0, 0.2), 'burnPct': (0.3, 0.95),
+              'kDemandPrice': (0.05, 0.3)}
+    objective = Objective('providers', 'p05', constraints=[Constraint('price', 'p05', '>', 0.02, week=12)])
+    result = optimize(params, bounds, objective, population=12, generations=10)
+    print(f"\nBest ({'feasible' if result.feasible else 'infeasible'}): p05 providers = {result.best_value:,.0f}")
+    for name, value in zip(result.names, result.best_x):
+        print(f"  {name} = {value:,.4g}")
+    print(f"Paths simulated: {result.paths_simulated:,} "
+          f"({result.paths_simulated / result.paths_full_budget:.0%} of a full-budget search)")
@@ -0,0 +1,138 @@
+import dataclasses
+import sys
+import numpy as np
+from dataclasses import dataclass
+from multiprocessing import Pool, cpu_count
+from scipy.stats import norm, t as student_t
+from typing import Dict, Optional, Sequence
+from engine import SimulationParams
+from backends import simulate
+from results import key_metrics
+from parallel import chunk_bounds, default_chunk_size
+from monte_carlo import make_seeds
+from variance_reduction import shock_tensor, VARIANCE_REDUCTION_MODES
+
+# Higher is better for every compared metric; revenue is annualized as in aggregate_results
+PAIRED_METRICS = ('price', 'providers', 'revenue')
+ANNUALIZE = {'revenue': 52}
+
+def shared_shocks(params_a: SimulationParams, params_b: SimulationParams, seeds: Sequence[int],
+                  variance_reduction: str = 'none') -> np.ndarray:
+    """
+    One shock tensor that drives both variants. With equal unlock weeks it is
+    params_a's own tensor, so the A side reproduces a plain run of params_a.
+    Otherwise every week gets a price shock and each variant ignores the one
+    on its own unlock week.
+    """
+    if params_a.investorUnlockWeek == params_b.investorUnlockWeek:
+        return shock_tensor(params_a, seeds, variance_reduction)
+    return shock_tensor(dataclasses.replace(params_a, investorUnlockWeek=params_a.T), seeds, variance_reduction)
+
+def _run_paired_chunk(task):
+    """Wrapper for multiprocessing: (n, T) metric arrays of both variants over one shock block"""
+    params_a, params_b, seeds, backend, variance_reduction, start = task
+    shocks = shared_shocks(params_a, params_b, seeds, variance_reduction)
+    return (start, key_metrics(simulate(params_a, seeds, backend, shocks), params_a.T),
+            key_metrics(simulate(params_b, seeds, backend, shocks), params_b.T))
+
+@dataclass
+class PairedComparison:
+    """
+    Per-week paired statistics of A - B, one dict of (T,) arrays per metric:
+    mean_a, mean_b, delta, ci_low, ci_high (t-interval of the paired
+    difference), p_a_beats_b (share of paths where A ends the week higher,
+    ties counting half), p_delta_positive (normal-approximation confidence
+    that the mean delta is above zero), and variance_ratio: how many times
+    more paths two independent runs would need for the same CI width.
+    """
+    params_a: SimulationParams
+    params_b: SimulationParams
+    n_sims: int
+    confidence: float
+    metrics: Dict[str, Dict[str, np.ndarray]]
+
+    def final_week(self) -> Dict[str, Dict[str, float]]:
+        return {m: {stat: float(values[-1]) for stat, values in stats.items()} for m, stats in self.metrics.items()}
+
+    def to_dict(self) -> dict:
+        return {'n_sims': self.n_sims, 'confidence': self.confidence,
+                'params_a': dataclasses.asdict(self.params_a), 'params_b': dataclasses.asdict(self.params_b),
+                'metrics': {m: {stat: values.tolist() for stat, values in stats.items()}
+                            for m, stats in self.metrics.items()}}
+
+    def print_summary(self):
+        print(f"A - B over {self.n_sims} paired paths, final week ({self.confidence:.0%} CI):")
+        for metric, row in self.final_week().items():
+            print(f"  {metric:<10} {row['delta']:>+14.4g}  [{row['ci_low']:+.4g}, {row['ci_high']:+.4g}]  "
+                  f"P(A beats B) {row['p_a_beats_b']:.1%}  paths saved x{row['variance_ratio']:.1f}")
+
+def paired_stats(a: np.ndarray, b: np.ndarray, confidence: float = 0.95) -> Dict[str, np.ndarray]:
+    """Paired statistics (see PairedComparison) of two (n_sims, T) arrays driven by the same streams"""
+    n = a.shape[0]
+    diff = a - b
+    delta = diff.mean(axis=0)
+    sd = diff.std(axis=0, ddof=1) if n > 1 else np.zeros_like(delta)
+    se = sd / np.sqrt(n)
+    half = student_t.ppf(0.5 + confidence / 2, max(n - 1, 1)) * se
+    independent_var = a.var(axis=0, ddof=1) + b.var(axis=0, ddof=1) if n > 1 else np.zeros_like(delta)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(se > 0, delta / se, np.sign(delta) * np.inf)
+        ratio = np.where(sd > 0, independent_var / sd ** 2, np.inf)
+    return {
+        'mean_a': a.mean(axis=0),
+        'mean_b': b.mean(axis=0),
+        'delta': delta,
+        'ci_low': delta - half,
+        'ci_high': delta + half,
+        'p_a_beats_b': (diff > 0).mean(axis=0) + 0.5 * (diff == 0).mean(axis=0),
+        'p_delta_positive': np.where(np.isnan(z), 0.5, norm.cdf(z)),
+        'variance_ratio': ratio,
+    }
+
+def compare(params_a: SimulationParams, params_b: SimulationParams, n_sims: int = 1000,
+            seeds: Optional[Sequence[int]] = None, backend: str = 'numpy', variance_reduction: str = 'none',
+            confidence: float = 0.95, chunk_size: Optional[int] = None,
+            processes: Optional[int] = None) -> PairedComparison:
+    """
+    Paired A/B run: each path of A and B sees the same demand, provider-noise
+    and price-shock draws, so the deltas carry only the effect of the edit.
+    Without seeds they are derived from params_a.seed.
+    """
+    if params_a.T != params_b.T:
+        raise ValueError(f"Paired runs need the same horizon (T={params_a.T} vs T={params_b.T})")
+    if backend == 'python':
+        raise ValueError("Paired runs feed one shock tensor to both variants; use the 'numpy' or 'jit' backend")
+    if variance_reduction not in VARIANCE_REDUCTION_MODES:
+        raise ValueError(f"Unknown variance_reduction '{variance_reduction}' "
+                         f"(available: {', '.join(VARIANCE_REDUCTION_MODES)})")
+    seeds = np.asarray(seeds) if seeds is not None else make_seeds(n_sims, params_a.seed)
+    processes = processes or cpu_count()
+    bounds = chunk_bounds(len(seeds), chunk_size or default_chunk_size(len(seeds), processes))
+    if variance_reduction != 'none' and len(bounds) > 1:
+        # Antithetic pairs and Sobol blocks are balanced over the whole seed list
+        bounds = [(0, len(seeds))]
+    tasks = [(params_a, params_b, seeds[start:stop], backend, variance_reduction, start) for start, stop in bounds]
+    if len(tasks) == 1:
+        parts = [_run_paired_chunk(tasks[0])]
+    else:
+        with Pool(processes=processes) as pool:
+            parts = sorted(pool.imap_unordered(_run_paired_chunk, tasks), key=lambda part: part[0])
+
+    metrics = {}
+    for metric in PAIRED_METRICS:
+        scale = ANNUALIZE.get(metric, 1)
+        a = np.concatenate([part[1][metric] for part in parts]) * scale
+        b = np.concatenate([part[2][metric] for part in parts]) * scale
+        metrics[metric] = paired_stats(a, b, confidence)
+    return PairedComparison(params_a, params_b, len(seeds), confidence, metrics)
+
+def main() -> int:
+    from export_data import research_base_params
+    base = research_base_params()
+    for field, a, b in (('revenueStrategy', 'burn', 'reserve'), ('emissionModel', 'fixed', 'kpi')):
+        print(f"\n{field}: {a} (A) vs {b} (B)")
+        compare(dataclasses.replace(base, **{field: a}), dataclasses.replace(base, **{field: b}), 2000).print_summary()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import os
+import time
+import weakref
+from collections import OrderedDict
+import numpy as np
+from multiprocessing import Pool, cpu_count, resource_tracker, shared_memory
+from typing import List, Optional, Sequence, Tuple
+from engine import SimulationParams, RESULT_FIELDS
+from backends import get_backend
+from results import SimResultBatch
+
+def default_chunk_size(n_sims: int, processes: int) -> int:
+    """~4 chunks per worker: enough to balance load without per-task overhead"""
+    return max(1, -(-n_sims // (processes * 4)))
+
+def chunk_bounds(n_sims: int, chunk_size: int) -> List[Tuple[int, int]]:
+    return [(start, min(start + chunk_size, n_sims)) for start in range(0, n_sims, chunk_size)]
+
+def allocate_shared_batch(n_sims: int, T: int) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    shape = (n_sims, T, len(RESULT_FIELDS))
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+def release_on_collect(shm: shared_memory.SharedMemory, data: np.ndarray):
+    """Unlinks the segment name now; the mapping is closed once `data` is garbage collected"""
+    shm.unlink()
+    weakref.finalize(data, shm.close)
+
+def share_resource_tracker():
+    """
+    Call before starting a pool: workers then inherit the parent's resource
+    tracker, so their attachments don't look like leaks to a tracker of their own.
+    """
+    resource_tracker.ensure_running()
+
+# Per-worker state, set once by the pool initializer so tasks only carry seed ranges
+_worker = {}
+
+def _init_worker(shm_name: str, shape: tuple, params: SimulationParams, backend: str):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker.update(
+        shm=shm,
+        out=np.ndarray(shape, dtype=np.float64, buffer=shm.buf),
+        params=params,
+        backend=get_backend(backend),
+    )
+
+def _run_chunk(task):
+    """Simulates seeds[start:stop] straight into the shared result array"""
+    start, stop, seeds, shocks = task
+    began = time.time()
+    _worker['out'][start:stop] = _worker['backend'](_worker['params'], seeds, shocks).data
+    return start, stop, os.getpid(), began, time.time()
+
+# Attachments to parent-owned segments, for tasks that name their own output array
+_attached = OrderedDict()
+MAX_ATTACHED = 8
+
+def _attach(shm_name: str, shape: tuple) -> np.ndarray:
+    if shm_name not in _attached:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _attached[shm_name] = (shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+        while len(_attached) > MAX_ATTACHED:
+            _, (old_shm, old_out) = _attached.popitem(last=False)
+            del old_out
+            old_shm.close()
+    _attached.move_to_end(shm_name)
+    return _attached[shm_name][1]
+
+def run_shared_chunk(task):
+    """Self-contained chunk task for shared pools: carries its params and target segment"""
+    key, shm_name, shape, start, stop, params, backend, seeds = task
+    began = time.perf_counter()
+    _attach(shm_name, shape)[start:stop] = get_backend(backend)(params, seeds).data
+    return key, start, stop, time.perf_counter() - began
+
+def run_chunked(params: SimulationParams, seeds: Sequence[int], backend: str = 'python',
+                chunk_size: Optional[int] = None, processes: Optional[int] = None,
+                shocks: Optional[np.ndarray] = None, telemetry=None, checkpoint=None) -> SimResultBatch:
+    """
+    Runs seeds in chunks across a pool whose workers write into one
+    shared-memory (n_sims, T, n_fields) array. The returned batch is a
+    zero-copy view of that array; the segment is released with the batch.
+    A pre-generated (n_sims, T, N_SHOCKS) `shocks` tensor is sliced per chunk.
+    Chunks are collected as they finish and reported to `telemetry`
+    (telemetry.RunTelemetry) when given. With a checkpoint.ChunkCheckpoint,
+    chunks already on disk are loaded instead of run (its chunk size wins)
+    and each new chunk is saved as soon as it lands.
+    """
+    processes = processes or cpu_count()
+    seeds = np.asarray(seeds)
+    n_sims = len(seeds)
+    chunk_size = checkpoint.chunk_size if checkpoint is not None else chunk_size
+    chunk_size = chunk_size or default_chunk_size(n_sims, processes)
+
+    shm, data = allocate_shared_batch(n_sims, params.T)
+    share_resource_tracker()
+    try:
+        done = set()
+        if checkpoint is not None:
+            for start, stop, block in checkpoint.load():
+                data[start:stop] = block
+                done.add((start, stop))
+            if done:
+                restored = sum(stop - start for start, stop in done)
+                print(f"↻ Resuming: {restored} of {n_sims} sims restored from {checkpoint.dir}")
+                if telemetry is not None:
+                    telemetry.restore(restored, len(done))
+        tasks = [(start, stop, seeds[start:stop], None if shocks is None else shocks[start:stop])
+                 for start, stop in chunk_bounds(n_sims, chunk_size) if (start, stop) not in done]
+        with Pool(processes=processes, initializer=_init_worker,
+                  initargs=(shm.name, data.shape, params, backend)) as pool:
+            for chunk in pool.imap_unordered(_run_chunk, tasks):
+                if checkpoint is not None:
+                    checkpoint.save(chunk[0], chunk[1], data[chunk[0]:chunk[1]])
+                if telemetry is not None:
+                    telemetry.chunk_done(chunk[2], chunk[0], chunk[1], chunk[3], chunk[4])
+    except BaseException:
+        del data
+        shm.close()
+        shm.unlink()
+        raise
+
+    # The name is no longer needed once workers are done; the mapping lives until the array is collected
+    release_on_collect(shm, data)
+    return SimResultBatch(data)
+
+def scaling_curve(params: SimulationParams, n_sims: int, worker_counts: Sequence[int],
+                  backend: str = 'python', chunk_size: Optional[int] = None) -> List[dict]:
+    """Wall-clock throughput of run_chunked for each worker count (same seeds throughout)"""
+    seeds = np.arange(n_sims)
+    rows = []
+    for workers in worker_counts:
+        began = time.perf_counter()
+        run_chunked(params, seeds, backend, chunk_size, workers)
+        duration = time.perf_counter() - began
+        rows.append({'workers': workers, 'seconds': duration, 'sims_per_sec': n_sims / duration})
+    base = rows[0]['sims_per_sec'] / rows[0]['workers']
+    for row in rows:
+        row['efficiency'] = row['sims_per_sec'] / (base * row['workers'])
+    return rows
+
+if __name__ == "__main__":
+    from monte_carlo import baseline_params
+    counts = sorted({1, 2, 4, cpu_count()} & set(range(1, cpu_count() + 1)))
+    print(f"{'workers':>8} {'seconds':>9} {'sims/sec':>10} {'efficiency':>11}")
+    for row in scaling_curve(baseline_params(), 2000, counts):
+        print(f"{row['workers']:>8} {row['seconds']:>9.2f} {row['sims_per_sec']:>10.0f} {row['efficiency']:>11.2f}")
@@ -0,0 +1,156 @@
+import json
+import os
+import time
+import numpy as np
+from collections import Counter
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Sequence, Tuple
+from engine import SimulationParams, simulate_one, RESULT_FIELDS
+from parallel import chunk_bounds, default_chunk_size
+from results import SimResultBatch, path_to_array
+
+# Phases timed inside simulate_one, in the order they run within a week
+PHASES = ('demand', 'setup', 'emissions', 'rewards', 'churn', 'price', 'result')
+TRACE_PATHS_PER_WORKER = 50
+
+class PhaseProfiler:
+    """
+    Phase timers and event counters for simulate_one(..., profiler=...).
+    lap(phase) charges the time since the previous lap to `phase`; the first
+    `trace_paths` paths also keep their own phase split for the Chrome trace.
+    """
+
+    def __init__(self, trace_paths: int = TRACE_PATHS_PER_WORKER):
+        self.phase_ns = dict.fromkeys(PHASES, 0)
+        self.counters = Counter()
+        self.paths = 0
+        self.weeks = 0
+        self.trace_paths = trace_paths
+        self.traced: List[Tuple[int, int, Dict[str, int]]] = []  # (start ns, duration ns, phase ns)
+        self._last = 0
+        self._path_start = 0
+        self._path_base = None
+
+    def start_path(self):
+        self._path_start = self._last = time.perf_counter_ns()
+        if len(self.traced) < self.trace_paths:
+            self._path_base = dict(self.phase_ns)
+
+    def lap(self, phase: str):
+        now = time.perf_counter_ns()
+        self.phase_ns[phase] += now - self._last
+        self._last = now
+
+    def count(self, name: str):
+        self.counters[name] += 1
+
+    def end_path(self):
+        self.paths += 1
+        if self._path_base is not None:
+            split = {p: self.phase_ns[p] - self._path_base[p] for p in PHASES}
+            self.traced.append((self._path_start, self._last - self._path_start, split))
+            self._path_base = None
+
+    def merge(self, other: 'PhaseProfiler') -> 'PhaseProfiler':
+        for p in PHASES:
+            self.phase_ns[p] += other.phase_ns[p]
+        self.counters.update(other.counters)
+        self.paths += other.paths
+        self.weeks += other.weeks
+        self.traced += other.traced[:max(0, self.trace_paths - len(self.traced))]
+        return self
+
+    def summary(self) -> dict:
+        total = sum(self.phase_ns.values()) or 1
+        return {
+            'paths': self.paths,
+            'seconds': total / 1e9,
+            'phases': {p: {'seconds': ns / 1e9, 'share': ns / total,
+                           'ns_per_week': ns / self.weeks if self.weeks else 0.0}
+                       for p, ns in self.phase_ns.items()},
+            'counters': dict(sorted(self.counters.items())),
+            'counters_per_path': {k: v / self.paths for k, v in sorted(self.counters.items())} if self.paths else {},
+        }
+
+def _run_profiled_chunk(task):
+    """Wrapper for multiprocessing: one chunk through the instrumented python engine"""
+    params, seeds, start = task
+    profiler = PhaseProfiler()
+    began = time.perf_counter_ns()
+    data = np.stack([path_to_array(simulate_one(params, int(seed), profiler)) for seed in seeds])
+    profiler.weeks = len(seeds) * params.T
+    return start, data, os.getpid(), profiler, (began, time.perf_counter_ns())
+
+class ProfileReport:
+    """Per-worker and merged phase profiles of one run, plus the chunk timeline"""
+
+    def __init__(self, wall_seconds: float, workers: Dict[int, PhaseProfiler], chunks: List[tuple]):
+        self.wall_seconds = wall_seconds
+        self.workers = workers
+        self.chunks = chunks  # (pid, start sim, n paths, began ns, ended ns)
+        self.total = PhaseProfiler(trace_paths=0)
+        for profiler in workers.values():
+            self.total.merge(profiler)
+
+    def to_dict(self) -> dict:
+        return dict(self.total.summary(), wall_seconds=self.wall_seconds,
+                    workers={str(pid): dict(p.summary(), chunks=sum(1 for c in self.chunks if c[0] == pid))
+                             for pid, p in sorted(self.workers.items())})
+
+    def chrome_trace(self) -> dict:
+        """Trace Event Format (chrome://tracing, Perfetto): chunk and path spans per worker, phases stacked inside paths"""
+        origin = min((c[3] for c in self.chunks), default=0)
+        us = lambda ns: (ns - origin) / 1e3
+        events = []
+        for pid, start, n, began, ended in self.chunks:
+            events.append({'name': f'chunk {start}-{start + n}', 'cat': 'chunk', 'ph': 'X', 'pid': 0, 'tid': pid,
+                           'ts': us(began), 'dur': (ended - began) / 1e3, 'args': {'paths': n}})
+        for pid, profiler in self.workers.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': pid, 'args': {'name': f'worker {pid}'}})
+            for path_start, duration, split in profiler.traced:
+                events.append({'name': 'simulate_one', 'cat': 'path', 'ph': 'X', 'pid': 0, 'tid': pid,
+                               'ts': us(path_start), 'dur': duration / 1e3})
+                # Phases interleave every week; lay their totals end to end inside the path span
+                offset = path_start
+                for phase in PHASES:
+                    if split[phase]:
+                        events.append({'name': phase, 'cat': 'phase', 'ph': 'X', 'pid': 0, 'tid': pid,
+                                       'ts': us(offset), 'dur': split[phase] / 1e3})
+                        offset += split[phase]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path: str) -> Tuple[str, str]:
+        """Writes `path` (JSON report) and `<stem>.trace.json` next to it"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        trace_path = os.path.splitext(path)[0] + '.trace.json'
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        with open(trace_path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path, trace_path
+
+    def print_summary(self):
+        summary = self.total.summary()
+        print(f"Phase profile ({summary['paths']} paths, {summary['seconds']:.2f}s in simulate_one):")
+        for phase, row in sorted(summary['phases'].items(), key=lambda item: -item[1]['seconds']):
+            print(f"  {phase:<10} {row['share']:>6.1%}  {row['ns_per_week']:>8.0f} ns/week")
+        for name, per_path in summary['counters_per_path'].items():
+            print(f"  {name:<24} {per_path:>8.2f} /path")
+
+def run_profiled(params: SimulationParams, seeds: Sequence[int], chunk_size: Optional[int] = None,
+                 processes: Optional[int] = None) -> Tuple[SimResultBatch, ProfileReport]:
+    """Runs the python engine with a PhaseProfiler per chunk and merges them per worker"""
+    processes = processes or cpu_count()
+    seeds = np.asarray(seeds)
+    chunk_size = chunk_size or default_chunk_size(len(seeds), processes)
+    data = np.empty((len(seeds), params.T, len(RESULT_FIELDS)))
+    workers: Dict[int, PhaseProfiler] = {}
+    chunks = []
+    began = time.perf_counter()
+    tasks = [(params, seeds[start:stop], start) for start, stop in chunk_bounds(len(seeds), chunk_size)]
+    with Pool(processes=processes) as pool:
+        for start, block, pid, profiler, (t0, t1) in pool.imap_unordered(_run_profiled_chunk, tasks):
+            data[start:start + len(block)] = block
+            workers[pid] = workers[pid].merge(profiler) if pid in workers else profiler
+            chunks.append((pid, start, len(block), t0, t1))
+    return SimResultBatch(data), ProfileReport(time.perf_counter() - began, workers, chunks)
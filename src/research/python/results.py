@@ -0,0 +1,92 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Union
+from engine import SimResult, RESULT_FIELDS
+
+FIELD_INDEX = {name: i for i, name in enumerate(RESULT_FIELDS)}
+
+def path_to_array(path: List[SimResult]) -> np.ndarray:
+    """(T, n_fields) row block for one simulate_one path"""
+    return np.array([[getattr(r, name) for name in RESULT_FIELDS] for r in path], dtype=float)
+
+@dataclass
+class SimResultBatch:
+    """
+    Columnar Monte Carlo output: data[sim, week, field] as one float64 array.
+    Field order follows RESULT_FIELDS; `weeks` holds the week number of each column.
+    """
+    data: np.ndarray
+    weeks: np.ndarray = None
+
+    def __post_init__(self):
+        if self.data.ndim != 3 or self.data.shape[2] != len(RESULT_FIELDS):
+            raise ValueError(f"Expected (n_sims, T, {len(RESULT_FIELDS)}) array, got {self.data.shape}")
+        if self.weeks is None:
+            self.weeks = np.arange(self.data.shape[1])
+
+    @classmethod
+    def empty(cls, n_sims: int, T: int) -> 'SimResultBatch':
+        return cls(np.zeros((n_sims, T, len(RESULT_FIELDS))))
+
+    @classmethod
+    def from_paths(cls, paths: List[List[SimResult]]) -> 'SimResultBatch':
+        data = np.array([path_to_array(path) for path in paths], dtype=float)
+        weeks = np.array([r.t for r in paths[0]]) if paths else None
+        return cls(data.reshape(len(paths), -1, len(RESULT_FIELDS)), weeks)
+
+    @classmethod
+    def concat(cls, batches: Sequence['SimResultBatch']) -> 'SimResultBatch':
+        return cls(np.concatenate([b.data for b in batches], axis=0), batches[0].weeks)
+
+    @property
+    def n_sims(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def T(self) -> int:
+        return self.data.shape[1]
+
+    @property
+    def fields(self) -> tuple:
+        return RESULT_FIELDS
+
+    def __len__(self) -> int:
+        return self.n_sims
+
+    def __getitem__(self, key: Union[str, int]) -> Union[np.ndarray, List[SimResult]]:
+        """
+        batch['price'] is the (n_sims, T) view of one field; batch[i] is path i
+        as a list of SimResult, so legacy `results[i][t]` callers keep working
+        """
+        if isinstance(key, (int, np.integer)):
+            return self.path(int(key))
+        return self.data[:, :, FIELD_INDEX[key]]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: self[name] for name in RESULT_FIELDS}
+
+    def sims(self, index: Union[int, slice, np.ndarray]) -> 'SimResultBatch':
+        data = self.data[index]
+        if data.ndim == 2:
+            data = data[np.newaxis]
+        return SimResultBatch(data, self.weeks)
+
+    def week_slice(self, index: Union[int, slice, np.ndarray]) -> 'SimResultBatch':
+        weeks = np.atleast_1d(self.weeks[index])
+        return SimResultBatch(self.data[:, index].reshape(self.n_sims, len(weeks), -1), weeks)
+
+    def path(self, i: int) -> List[SimResult]:
+        """Lossless per-path view in the shape simulate_one returns"""
+        rows = self.data[i].tolist()
+        return [SimResult(int(t), *row) for t, row in zip(self.weeks, rows)]
+
+    def to_paths(self) -> List[List[SimResult]]:
+        return [self.path(i) for i in range(self.n_sims)]
+
+def key_metrics(batch: SimResultBatch, T: int) -> Dict[str, np.ndarray]:
+    """(n_sims, T) series for the metrics the research exports report"""
+    return {
+        'price': batch['price'][:, :T],
+        'providers': batch['providers'][:, :T],
+        'revenue': batch['demand_served'][:, :T] * batch['servicePrice'][:, :T]
+    }
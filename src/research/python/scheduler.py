@@ -0,0 +1,93 @@
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from multiprocessing import Pool, cpu_count
+from typing import Callable, Dict, List, Optional
+from engine import SimulationParams
+from parallel import (
+    allocate_shared_batch, chunk_bounds, default_chunk_size, release_on_collect, run_shared_chunk,
+    share_resource_tracker,
+)
+from results import SimResultBatch
+
+@dataclass
+class ScenarioJob:
+    name: str
+    params: SimulationParams
+    seeds: np.ndarray
+    on_complete: Optional[Callable[[SimResultBatch], None]] = None
+    remaining: int = 0
+    duration: float = 0.0
+    chunk_seconds: List[float] = field(default_factory=list)
+
+class ScenarioScheduler:
+    """
+    Keeps one warm pool and runs the chunks of many scenarios through a single
+    queue. Chunks are queued scenario by scenario, so earlier scenarios finish
+    (and fire on_complete) first while later ones keep every core busy.
+    """
+
+    def __init__(self, processes: Optional[int] = None, backend: str = 'python', chunk_size: Optional[int] = None):
+        self.processes = processes or cpu_count()
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.pool = None
+        self.jobs: Dict[str, ScenarioJob] = {}
+
+    def __enter__(self) -> 'ScenarioScheduler':
+        share_resource_tracker()
+        self.pool = Pool(processes=self.processes)
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.close()
+        self.pool.join()
+        self.pool = None
+
+    def submit(self, name: str, params: SimulationParams, n_sims: int = 1000,
+               seeds: Optional[np.ndarray] = None,
+               on_complete: Optional[Callable[[SimResultBatch], None]] = None):
+        if name in self.jobs:
+            raise ValueError(f"Scenario '{name}' is already queued")
+        if seeds is None:
+            seeds = np.random.randint(0, 1000000, n_sims)
+        self.jobs[name] = ScenarioJob(name, params, np.asarray(seeds), on_complete)
+
+    def run(self) -> Dict[str, ScenarioJob]:
+        """Runs every queued scenario; returns the finished jobs with timings"""
+        if self.pool is None:
+            raise RuntimeError("ScenarioScheduler must be used as a context manager")
+
+        jobs, self.jobs = self.jobs, {}
+        buffers = {}
+        tasks = []
+        total_sims = sum(len(job.seeds) for job in jobs.values())
+        chunk_size = self.chunk_size or default_chunk_size(total_sims, self.processes)
+        for name, job in jobs.items():
+            shm, data = allocate_shared_batch(len(job.seeds), job.params.T)
+            buffers[name] = (shm, data)
+            bounds = chunk_bounds(len(job.seeds), chunk_size)
+            job.remaining = len(bounds)
+            tasks += [(name, shm.name, data.shape, start, stop, job.params, self.backend, job.seeds[start:stop])
+                      for start, stop in bounds]
+
+        began = time.perf_counter()
+        try:
+            for name, start, stop, seconds in self.pool.imap_unordered(run_shared_chunk, tasks):
+                job = jobs[name]
+                job.chunk_seconds.append(seconds)
+                job.remaining -= 1
+                if job.remaining == 0:
+                    job.duration = time.perf_counter() - began
+                    shm, data = buffers.pop(name)
+                    release_on_collect(shm, data)
+                    print(f"✔ {name}: {len(job.seeds)} sims done at {job.duration:.2f}s")
+                    if job.on_complete:
+                        job.on_complete(SimResultBatch(data))
+        finally:
+            for shm, data in buffers.values():
+                release_on_collect(shm, data)
+
+        total = time.perf_counter() - began
+        print(f"All {len(jobs)} scenarios completed in {total:.2f} seconds ({total_sims / total:.0f} sims/sec)")
+        return jobs
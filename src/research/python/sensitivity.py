@@ -0,0 +1,153 @@
+import dataclasses
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from multiprocessing import Pool, cpu_count
+from scipy.stats import qmc
+from typing import Dict, List, Optional, Sequence, Tuple
+from engine import SimulationParams
+from backends import get_row_kernel
+from sweep import shock_stream, simulate_configs
+
+# Model outputs: name -> SimResult field, averaged over paths at the chosen week
+OUTPUTS = {'price': 'price', 'providers': 'providers', 'solvency': 'solvencyScore'}
+
+# Plausible design ranges for the tokenomics levers (absolute, since several base values are 0)
+DEFAULT_BOUNDS = {
+    'burnPct': (0.3, 0.95),
+    'kMintPrice': (0.0, 0.2),
+    'kDemandPrice': (0.05, 0.3),
+    'maxMintWeekly': (1_000_000, 6_000_000),
+    'investorSellPct': (0.0, 0.3),
+    'competitorYield': (0.0, 0.5),
+}
+
+INT_FIELDS = {f.name for f in dataclasses.fields(SimulationParams) if f.type is int}
+
+@dataclass
+class SensitivityResult:
+    """First-order (S1) and total (ST) Sobol indices per output, with bootstrap 95% half-widths"""
+    names: List[str]
+    bounds: Dict[str, Tuple[float, float]]
+    indices: Dict[str, Dict[str, np.ndarray]]  # output -> {'S1', 'S1_conf', 'ST', 'ST_conf'}
+    n_base: int
+    n_sims: int
+
+    @property
+    def n_evaluations(self) -> int:
+        return self.n_base * (len(self.names) + 2)
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per (output, param)"""
+        rows = []
+        for output, stats in self.indices.items():
+            for i, name in enumerate(self.names):
+                rows.append({'output': output, 'param': name, **{k: float(v[i]) for k, v in stats.items()}})
+        return pd.DataFrame(rows)
+
+def relative_bounds(params: SimulationParams, names: Sequence[str], spread: float = 0.5) -> Dict[str, Tuple[float, float]]:
+    """+-spread around each (non-zero) base value"""
+    return {name: (getattr(params, name) * (1 - spread), getattr(params, name) * (1 + spread)) for name in names}
+
+def saltelli_matrices(bounds: Dict[str, Tuple[float, float]], n_base: int,
+                      seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    A and B (n_base, d) from one scrambled Sobol sample of dimension 2d, and
+    AB (d, n_base, d) where AB[i] is A with column i taken from B.
+    """
+    d = len(bounds)
+    lows, highs = np.array(list(bounds.values()), dtype=float).T
+    m = int(np.ceil(np.log2(max(n_base, 2))))
+    points = qmc.Sobol(d=2 * d, scramble=True, seed=seed).random_base2(m)[:n_base]
+    A = qmc.scale(points[:, :d], lows, highs)
+    B = qmc.scale(points[:, d:], lows, highs)
+    AB = np.repeat(A[None], d, axis=0)
+    for i in range(d):
+        AB[i, :, i] = B[:, i]
+    return A, B, AB
+
+def configs_for(base_params: SimulationParams, names: Sequence[str], X: np.ndarray) -> List[SimulationParams]:
+    configs = []
+    for row in X:
+        values = {name: int(round(v)) if name in INT_FIELDS else float(v) for name, v in zip(names, row)}
+        configs.append(dataclasses.replace(base_params, **values))
+    return configs
+
+def evaluate_block(args) -> np.ndarray:
+    """Pool task: (n_configs, n_outputs) path-mean outputs for one block of configs"""
+    configs, seeds, backend, week = args
+    batch = simulate_configs(configs, get_row_kernel(backend), shock_stream(seeds))
+    n_sims = len(seeds)
+    columns = [batch[field][:, week].reshape(len(configs), n_sims).mean(axis=1) for field in OUTPUTS.values()]
+    return np.stack(columns, axis=1)
+
+def sobol_indices(fA: np.ndarray, fB: np.ndarray, fAB: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Saltelli (2010) first-order and Jansen total-effect estimators. fA, fB are
+    (..., N), fAB is (..., d, N); leading axes (e.g. bootstrap draws) broadcast.
+    """
+    both = np.concatenate([fA, fB], axis=-1)
+    variance = np.var(both, axis=-1)[..., None]
+    # Centering leaves the estimators' expectation alone but removes the mean's contribution to their variance
+    center = both.mean(axis=-1, keepdims=True)
+    fA, fB, fAB = fA - center, fB - center, fAB - center[..., None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        S1 = np.mean(fB[..., None, :] * (fAB - fA[..., None, :]), axis=-1) / variance
+        ST = 0.5 * np.mean((fA[..., None, :] - fAB) ** 2, axis=-1) / variance
+    return S1, ST
+
+def sensitivity(base_params: SimulationParams,
+                bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+                n_base: int = 256,
+                n_sims: int = 200,
+                seeds: Optional[Sequence[int]] = None,
+                backend: str = 'numpy',
+                week: int = -1,
+                n_bootstrap: int = 500,
+                processes: Optional[int] = None,
+                max_rows: int = 200_000) -> SensitivityResult:
+    """
+    Variance-based global sensitivity of final-week path means to the params
+    in `bounds`. All n_base * (d + 2) Saltelli points are evaluated as mixed
+    parameter batches on the process pool, sharing one seed list (common
+    random numbers), so the indices measure the params rather than path noise.
+    """
+    bounds = bounds or DEFAULT_BOUNDS
+    names = list(bounds)
+    if seeds is None:
+        seeds = np.random.default_rng(base_params.seed).integers(0, 1000000, n_sims)
+    seeds = np.asarray(seeds)
+    n_sims = len(seeds)
+
+    A, B, AB = saltelli_matrices(bounds, n_base, base_params.seed)
+    d = len(names)
+    configs = configs_for(base_params, names, np.concatenate([A, B, AB.reshape(-1, d)]))
+
+    configs_per_block = max(1, max_rows // n_sims)
+    blocks = [(configs[start:start + configs_per_block], seeds, backend, week)
+              for start in range(0, len(configs), configs_per_block)]
+    processes = min(processes or cpu_count(), len(blocks))
+    print(f"Evaluating {len(configs)} Saltelli points x {n_sims} paths in {len(blocks)} blocks...")
+    with Pool(processes=processes) as pool:
+        Y = np.concatenate(pool.map(evaluate_block, blocks))
+
+    # Bootstrap over the base rows: each draw resamples the same rows of A, B and every AB_i
+    resample = np.random.default_rng(base_params.seed).integers(0, n_base, (n_bootstrap, n_base))
+    indices = {}
+    for k, output in enumerate(OUTPUTS):
+        y = Y[:, k]
+        fA, fB, fAB = y[:n_base], y[n_base:2 * n_base], y[2 * n_base:].reshape(d, n_base)
+        S1, ST = sobol_indices(fA, fB, fAB)
+        S1_boot, ST_boot = sobol_indices(fA[resample], fB[resample], fAB[:, resample].transpose(1, 0, 2))
+        indices[output] = {
+            'S1': S1, 'S1_conf': 1.96 * np.std(S1_boot, axis=0, ddof=1),
+            'ST': ST, 'ST_conf': 1.96 * np.std(ST_boot, axis=0, ddof=1),
+        }
+    return SensitivityResult(names=names, bounds=bounds, indices=indices, n_base=n_base, n_sims=n_sims)
+
+if __name__ == "__main__":
+    from export_data import research_scenarios
+    _, params, _ = research_scenarios()[0]
+    result = sensitivity(params)
+    frame = result.to_frame()
+    print(frame.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
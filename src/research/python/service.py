@@ -0,0 +1,366 @@
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+from typing import Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+from urllib.parse import urlsplit, parse_qs
+from engine import SimulationParams
+from backends import BACKENDS, get_backend
+from cache import cache_key
+from parallel import chunk_bounds
+from results import key_metrics
+from monte_carlo import make_seeds, aggregate_series
+from streaming import StreamingAggregator
+from export_data import research_base_params, time_series_records
+from jobs import apply_overrides
+
+DEFAULT_PORT = 8765
+SERVICE_CHUNK = 250
+PARTIAL_INTERVAL = 0.5  # seconds between streamed partial aggregates
+MAX_SIMS = 50_000
+MAX_T = 520  # ten years of weeks
+MAX_PATH_WEEKS = 5_000_000  # n_sims * T bound on the (n, T) metric arrays held per request
+LRU_ENTRIES = 256
+MAX_BODY_BYTES = 1 << 20
+
+PARAM_TYPES = get_type_hints(SimulationParams)
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def check_param(name: str, value):
+    """ValueError unless `value` fits the SimulationParams annotation of `name` (Literal choices included)"""
+    hint = PARAM_TYPES[name]
+    if get_origin(hint) is Union:
+        if value is None and type(None) in get_args(hint):
+            return
+        hint = next(arg for arg in get_args(hint) if arg is not type(None))
+    if get_origin(hint) is Literal:
+        if value not in get_args(hint):
+            raise ValueError(f"params.{name}: {value!r} is not allowed "
+                             f"(available: {', '.join(map(str, get_args(hint)))})")
+    elif hint is int:
+        if not _is_int(value):
+            raise ValueError(f"params.{name} must be an integer, got {value!r}")
+    elif hint is float:
+        if _is_int(value) or (isinstance(value, float) and math.isfinite(value)):
+            return
+        raise ValueError(f"params.{name} must be a finite number, got {value!r}")
+
+def _run_metrics_chunk(params: SimulationParams, seeds: np.ndarray, backend: str) -> Dict[str, np.ndarray]:
+    """Pool task: (n, T) price / providers / revenue arrays for one seed range"""
+    return key_metrics(get_backend(backend)(params, seeds), params.T)
+
+def _fold(running: Optional[StreamingAggregator], parts: List[Dict[str, np.ndarray]],
+          T: int) -> Tuple[StreamingAggregator, List[dict]]:
+    """Folds newly finished chunks into the running sketch; returns it with its partial export rows"""
+    running = running or StreamingAggregator(T)
+    for part in parts:
+        running.add_series(part)
+    return running, time_series_records(running.result(), T)
+
+def _final_records(parts: List[Dict[str, np.ndarray]], T: int) -> List[dict]:
+    series = {m: np.concatenate([part[m] for part in parts]) for m in parts[0]}
+    return time_series_records(aggregate_series(series), T)
+
+def _warm_up():
+    """Imports the engine and touches every code path once in each pool process"""
+    params = apply_overrides(research_base_params(), {'T': 4}, 'warm-up')
+    get_backend('numpy')(params, [0])
+    return True
+
+class SimulationJob:
+    """
+    One in-flight request. Every caller with the same key subscribes to the
+    same job and replays its event list, so duplicates cost nothing and late
+    subscribers still see every partial.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.events: List[dict] = []
+        self.done = False
+        self.streamers = 0
+        self.changed = asyncio.Condition()
+
+    async def publish(self, event: dict, final: bool = False):
+        async with self.changed:
+            self.events.append(event)
+            self.done = final
+            self.changed.notify_all()
+
+    async def subscribe(self):
+        seen = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: len(self.events) > seen)
+                new, seen = self.events[seen:], len(self.events)
+            for event in new:
+                yield event
+                if event['event'] in ('done', 'error'):
+                    return
+
+class SimulationService:
+    """
+    Asyncio HTTP front end for the research engine:
+      GET  /health           pool, cache and in-flight counters
+      POST /simulate         {"params": {...overrides of the research base}, "n_sims": 1000,
+                              "backend": "numpy", "seed": 42} -> research-export JSON
+      POST /simulate?stream=1  the same, as NDJSON: 'partial' aggregates (t-digest bands,
+                              at most one per partial_interval) as chunks finish, then 'done'
+    A warm process pool runs the chunks; identical requests share one job and
+    finished results are served from an in-memory LRU.
+    """
+
+    def __init__(self, processes: Optional[int] = None, chunk_size: int = SERVICE_CHUNK,
+                 max_sims: int = MAX_SIMS, lru_entries: int = LRU_ENTRIES,
+                 partial_interval: float = PARTIAL_INTERVAL):
+        self.processes = processes or cpu_count()
+        self.chunk_size = chunk_size
+        self.partial_interval = partial_interval
+        self.max_sims = max_sims
+        self.lru_entries = lru_entries
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.lru: 'OrderedDict[str, dict]' = OrderedDict()
+        self.inflight: Dict[str, SimulationJob] = {}
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'simulated': 0}
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> Tuple[str, int]:
+        self.pool = ProcessPoolExecutor(max_workers=self.processes)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _warm_up) for _ in range(self.processes)))
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    # --- requests -------------------------------------------------------
+
+    def parse_request(self, body: dict) -> Tuple[SimulationParams, np.ndarray, str]:
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        unknown = set(body) - {'params', 'n_sims', 'backend', 'seed'}
+        if unknown:
+            raise ValueError(f"Unknown request field(s) {', '.join(sorted(unknown))}")
+        overrides = body.get('params', {})
+        if not isinstance(overrides, dict):
+            raise ValueError("params must be a JSON object of SimulationParams overrides")
+        for name, value in overrides.items():
+            if name in PARAM_TYPES:
+                check_param(name, value)
+        params = apply_overrides(research_base_params(), overrides, 'params')
+        if not 1 <= params.T <= MAX_T:
+            raise ValueError(f"T must be between 1 and {MAX_T}")
+        n_sims = body.get('n_sims', 1000)
+        if not _is_int(n_sims) or not 1 <= n_sims <= self.max_sims:
+            raise ValueError(f"n_sims must be an integer between 1 and {self.max_sims}")
+        if n_sims * params.T > MAX_PATH_WEEKS:
+            raise ValueError(f"n_sims * T must not exceed {MAX_PATH_WEEKS:,} (got {n_sims * params.T:,})")
+        backend = body.get('backend', 'numpy')
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}' (available: {', '.join(BACKENDS)})")
+        seed = body.get('seed', params.seed)
+        if not _is_int(seed) or seed < 0:
+            raise ValueError("seed must be a non-negative integer")
+        return params, make_seeds(n_sims, seed), backend
+
+    def job_for(self, params: SimulationParams, seeds: np.ndarray, backend: str) -> Tuple[str, Optional[SimulationJob]]:
+        """(key, job) for a request; job is None when the LRU already has the answer"""
+        key = cache_key(params, seeds, f'service-{backend}')
+        if key in self.lru:
+            self.lru.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return key, None
+        job = self.inflight.get(key)
+        if job is not None:
+            self.stats['coalesced'] += 1
+            return key, job
+        job = self.inflight[key] = SimulationJob(key)
+        self.stats['simulated'] += 1
+        asyncio.get_running_loop().create_task(self._run(job, params, seeds, backend))
+        return key, job
+
+    def _payload(self, records: List[dict], n_sims: int, started: float) -> dict:
+        return {"metadata": {"engine": "Python/NumPy v1.0", "scenario": "service", "n_sims": n_sims,
+                             "elapsed_ms": round((time.perf_counter() - started) * 1e3, 1)},
+                "time_series": records}
+
+    async def _run(self, job: SimulationJob, params: SimulationParams, seeds: np.ndarray, backend: str):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        bounds = chunk_bounds(len(seeds), self.chunk_size)
+        tasks = [_tagged(start, loop.run_in_executor(self.pool, _run_metrics_chunk, params, seeds[start:stop], backend))
+                 for start, stop in bounds]
+        parts = {}
+        running, unfolded = None, []
+        last_partial = float('-inf')
+        try:
+            for future in asyncio.as_completed(tasks):
+                start, part = await future
+                parts[start] = part
+                unfolded.append(part)
+                # Partials only for stream subscribers, at most one per partial_interval; chunks
+                # are folded into one mergeable aggregator off the event loop, never re-aggregated
+                if (job.streamers and len(parts) < len(bounds)
+                        and time.perf_counter() - last_partial >= self.partial_interval):
+                    running, records = await loop.run_in_executor(None, _fold, running, unfolded, params.T)
+                    unfolded = []
+                    last_partial = time.perf_counter()
+                    await job.publish(dict(self._payload(records, running.n_sims, started), event='partial'))
+            # Final aggregate: exact percentiles in seed order, so it never depends on which chunk finished first
+            records = await loop.run_in_executor(None, _final_records, [parts[s] for s, _ in bounds], params.T)
+            result = self._payload(records, len(seeds), started)
+            self.lru[job.key] = result
+            while len(self.lru) > self.lru_entries:
+                self.lru.popitem(last=False)
+            await job.publish(dict(result, event='done'), final=True)
+        except Exception as e:
+            await job.publish({'event': 'error', 'error': f'{type(e).__name__}: {e}'}, final=True)
+        finally:
+            self.inflight.pop(job.key, None)
+
+    # --- HTTP -----------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._route(method, target, body, writer, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            await _respond(writer, 400, {'error': str(e)}, keep_alive=False)
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes, writer: asyncio.StreamWriter, keep_alive: bool):
+        url = urlsplit(target)
+        if method == 'GET' and url.path == '/health':
+            await _respond(writer, 200, dict(self.stats, inflight=len(self.inflight), cached=len(self.lru),
+                                             processes=self.processes), keep_alive)
+            return
+        if url.path != '/simulate':
+            await _respond(writer, 404, {'error': f'No route {method} {url.path}'}, keep_alive)
+            return
+        if method != 'POST':
+            await _respond(writer, 405, {'error': 'Use POST'}, keep_alive)
+            return
+        self.stats['requests'] += 1
+        try:
+            params, seeds, backend = self.parse_request(json.loads(body or b'{}'))
+        except (ValueError, TypeError) as e:
+            await _respond(writer, 400, {'error': str(e)}, keep_alive)
+            return
+        key, job = self.job_for(params, seeds, backend)
+        stream = parse_qs(url.query).get('stream', ['0'])[0] not in ('0', 'false', '')
+
+        if job is None:
+            cached = dict(self.lru[key], cached=True)
+            if stream:
+                await _stream(writer, [dict(cached, event='done')], keep_alive)
+            else:
+                await _respond(writer, 200, cached, keep_alive)
+            return
+        if stream:
+            job.streamers += 1
+            await _stream(writer, job.subscribe(), keep_alive)
+            return
+        async for event in job.subscribe():
+            if event['event'] == 'error':
+                await _respond(writer, 500, event, keep_alive)
+            elif event['event'] == 'done':
+                await _respond(writer, 200, {k: v for k, v in event.items() if k != 'event'}, keep_alive)
+
+async def _tagged(start: int, future) -> Tuple[int, Dict[str, np.ndarray]]:
+    """Pairs a chunk's result with its first seed index, since as_completed() drops the mapping"""
+    return start, await future
+
+async def _read_request(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise ValueError("Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool = True):
+    body = json.dumps(payload).encode()
+    writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                 .encode() + body)
+    await writer.drain()
+
+async def _stream(writer: asyncio.StreamWriter, events, keep_alive: bool = True):
+    """NDJSON over chunked transfer encoding, one line per event"""
+    writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n"
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode())
+    if hasattr(events, '__aiter__'):
+        async for event in events:
+            await _write_chunk(writer, event)
+    else:
+        for event in events:
+            await _write_chunk(writer, event)
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+async def _write_chunk(writer: asyncio.StreamWriter, event: dict):
+    line = json.dumps(event).encode() + b'\n'
+    writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+    await writer.drain()
+
+async def serve(host: str, port: int, processes: Optional[int]):
+    service = SimulationService(processes)
+    address = await service.start(host, port)
+    print(f"Simulation service on http://{address[0]}:{address[1]} ({service.processes} warm workers)")
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Warm asyncio HTTP service around the research engine")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--processes', type=int)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.processes))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import numpy as np
+from typing import Dict, List, Sequence
+from results import SimResultBatch, key_metrics
+from absorbing import death_histogram, death_summary
+
+class WeeklyMoments:
+    """Per-week Welford accumulator (count, mean, M2), mergeable across workers"""
+
+    def __init__(self, T: int):
+        self.count = 0
+        self.mean = np.zeros(T)
+        self.m2 = np.zeros(T)
+
+    def update(self, values: np.ndarray):
+        """Folds an (n, T) block using Chan's parallel update"""
+        n = values.shape[0]
+        if n == 0:
+            return
+        block_mean = values.mean(axis=0)
+        block_m2 = ((values - block_mean) ** 2).sum(axis=0)
+        self._combine(n, block_mean, block_m2)
+
+    def merge(self, other: 'WeeklyMoments'):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+
+    def _combine(self, n: int, mean: np.ndarray, m2: np.ndarray):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self.m2 / (self.count - 1) if self.count > 1 else np.zeros_like(self.m2)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+class TDigest:
+    """
+    Merging t-digest (k1 scale) for one series. Centroids are rebuilt in one
+    vectorized pass per update: each sorted centroid is assigned to the unit
+    k-bucket of its cumulative-weight midpoint, so tails keep singletons while
+    the bulk is compressed to ~`compression / 2` centroids.
+    """
+
+    def __init__(self, compression: float = 500):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(values.size)]))
+
+    def merge(self, other: 'TDigest'):
+        if other.weights.size == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        bucket = np.floor(k - k[0]).astype(np.int64)
+
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q: float) -> float:
+        """Linear interpolation between centroid midpoints (numpy 'linear' percentile analogue)"""
+        if self.weights.size == 0:
+            return float('nan')
+        if self.weights.size == 1:
+            return float(self.means[0])
+        total = self.weights.sum()
+        # Rank positions of the centroid midpoints on the 0..total-1 scale used by np.percentile
+        positions = np.cumsum(self.weights) - self.weights / 2 - 0.5
+        xs = np.r_[self.min, self.means, self.max]
+        ps = np.r_[0.0, np.clip(positions, 0, total - 1), total - 1]
+        return float(np.interp(q * (total - 1), ps, xs))
+
+class WeeklySketch:
+    """One TDigest per week"""
+
+    def __init__(self, T: int, compression: float = 500):
+        self.digests = [TDigest(compression) for _ in range(T)]
+
+    def update(self, values: np.ndarray):
+        for t, digest in enumerate(self.digests):
+            digest.update(values[:, t])
+
+    def merge(self, other: 'WeeklySketch'):
+        for mine, theirs in zip(self.digests, other.digests):
+            mine.merge(theirs)
+
+    def quantile(self, q: float) -> np.ndarray:
+        return np.array([d.quantile(q) for d in self.digests])
+
+class StreamingAggregator:
+    """
+    O(T) replacement for holding every path: folds SimResultBatch blocks into
+    per-metric moments and quantile sketches, merges across workers, and
+    reports the aggregate_results dict shape.
+    """
+
+    def __init__(self, T: int, metrics: Sequence[str] = ('price', 'providers', 'revenue'), compression: float = 500):
+        self.T = T
+        self.metrics = tuple(metrics)
+        self.moments = {m: WeeklyMoments(T) for m in self.metrics}
+        self.sketches = {m: WeeklySketch(T, compression) for m in self.metrics}
+        self.deaths = np.zeros(T + 1, dtype=np.int64)  # time-of-death histogram, survivors last
+
+    @property
+    def n_sims(self) -> int:
+        return self.moments[self.metrics[0]].count
+
+    def add(self, batch: SimResultBatch):
+        self.add_series(key_metrics(batch, self.T))
+        self.deaths += death_histogram(batch)
+
+    def add_series(self, series: Dict[str, np.ndarray]):
+        """Folds (n, T) key_metrics arrays; the death histogram needs full batches and is left as is"""
+        for m in self.metrics:
+            self.moments[m].update(series[m])
+            self.sketches[m].update(series[m])
+
+    def merge(self, other: 'StreamingAggregator') -> 'StreamingAggregator':
+        for m in self.metrics:
+            self.moments[m].merge(other.moments[m])
+            self.sketches[m].merge(other.sketches[m])
+        self.deaths += other.deaths
+        return self
+
+    @classmethod
+    def merge_all(cls, parts: List['StreamingAggregator']) -> 'StreamingAggregator':
+        total = parts[0]
+        for part in parts[1:]:
+            total.merge(part)
+        return total
+
+    def death_summary(self) -> dict:
+        return death_summary(self.deaths)
+
+    def result(self) -> Dict[str, Dict[str, np.ndarray]]:
+        agg = {}
+        for m in self.metrics:
+            scale = 52 if m == 'revenue' else 1  # Annualized
+            agg[m] = {
+                'mean': self.moments[m].mean * scale,
+                'p05': self.sketches[m].quantile(0.05) * scale,
+                'p95': self.sketches[m].quantile(0.95) * scale
+            }
+        return agg
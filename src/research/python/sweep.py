@@ -0,0 +1,105 @@
+import itertools
+import dataclasses
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+from engine import SimulationParams, demand_from_noise
+from batch_engine import draw_shocks, resolve_plan, SHOCK_DEMAND
+from backends import get_row_kernel
+from monte_carlo import aggregate_results
+from results import SimResultBatch
+
+@dataclass
+class SweepResult:
+    """Per-config aggregates (aggregate_results shape), labeled by grid coordinates"""
+    coords: List[Dict[str, Any]]
+    aggregates: List[dict]
+    n_sims: int
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    def to_frame(self, week: int = -1) -> pd.DataFrame:
+        """One row per config: coordinates plus every metric/stat at `week`"""
+        rows = []
+        for coords, agg in zip(self.coords, self.aggregates):
+            row = dict(coords)
+            for metric, stats in agg.items():
+                for stat, series in stats.items():
+                    row[f"{metric}_{stat}"] = float(series[week])
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+def expand_grid(base_params: Union[SimulationParams, Dict[str, SimulationParams]],
+                grid: Dict[str, Sequence[Any]]) -> tuple[List[Dict[str, Any]], List[SimulationParams]]:
+    """Cartesian product of grid values over one or several base profiles"""
+    profiles = base_params if isinstance(base_params, dict) else {None: base_params}
+    valid = {f.name for f in dataclasses.fields(SimulationParams)}
+    unknown = set(grid) - valid
+    if unknown:
+        raise ValueError(f"Unknown SimulationParams fields in grid: {sorted(unknown)}")
+
+    coords, configs = [], []
+    keys = list(grid)
+    for profile_id, profile in profiles.items():
+        for values in itertools.product(*(grid[k] for k in keys)):
+            point = dict(zip(keys, values))
+            coords.append(point if profile_id is None else {'profile': profile_id, **point})
+            configs.append(dataclasses.replace(profile, **point))
+    return coords, configs
+
+def shock_stream(seeds: Sequence[int]) -> Callable[[SimulationParams], np.ndarray]:
+    """Shock tensor for `seeds` per config, drawn once per unlock week (it decides the draw order)"""
+    shock_cache: Dict[int, np.ndarray] = {}
+    def shocks_for(params: SimulationParams) -> np.ndarray:
+        if params.investorUnlockWeek not in shock_cache:
+            shock_cache[params.investorUnlockWeek] = draw_shocks(params, seeds)
+        return shock_cache[params.investorUnlockWeek]
+    return shocks_for
+
+def simulate_configs(configs: Sequence[SimulationParams], kernel: Callable[..., SimResultBatch],
+                     shocks_for: Callable[[SimulationParams], np.ndarray]) -> SimResultBatch:
+    """One row-kernel call over every config x seed; rows are grouped by config"""
+    T = configs[0].T
+    shocks = np.concatenate([shocks_for(c) for c in configs])
+    demands = np.concatenate([
+        demand_from_noise(T, 12000, c.demandType, shocks_for(c)[:, :, SHOCK_DEMAND]) for c in configs
+    ])
+    n_sims = shocks.shape[0] // len(configs)
+    plan = np.repeat(np.stack([resolve_plan(c) for c in configs]), n_sims, axis=0)
+    return kernel(plan, demands, shocks)
+
+def sweep(base_params: Union[SimulationParams, Dict[str, SimulationParams]],
+          grid: Dict[str, Sequence[Any]],
+          n_sims: int = 1000,
+          seeds: Optional[Sequence[int]] = None,
+          backend: str = 'numpy',
+          max_rows: int = 200_000) -> SweepResult:
+    """
+    Simulates every grid point as rows of one (n_configs * n_sims) batch.
+    All configs share the same seeds, so differences between grid points are
+    not masked by independent Monte Carlo noise. `max_rows` bounds how many
+    paths are held in memory at once.
+    """
+    coords, configs = expand_grid(base_params, grid)
+    horizons = {c.T for c in configs}
+    if len(horizons) != 1:
+        raise ValueError(f"All sweep configs must share the same horizon T, got {sorted(horizons)}")
+    T = horizons.pop()
+
+    if seeds is None:
+        seeds = np.random.randint(0, 1000000, n_sims)
+    n_sims = len(seeds)
+    kernel = get_row_kernel(backend)
+    shocks_for = shock_stream(seeds)
+
+    configs_per_block = max(1, max_rows // n_sims)
+    aggregates = []
+    for start in range(0, len(configs), configs_per_block):
+        block = configs[start:start + configs_per_block]
+        batch = simulate_configs(block, kernel, shocks_for)
+        for j in range(len(block)):
+            aggregates.append(aggregate_results(batch.sims(slice(j * n_sims, (j + 1) * n_sims)), T))
+
+    return SweepResult(coords=coords, aggregates=aggregates, n_sims=n_sims)
@@ -0,0 +1,136 @@
+import json
+import time
+import numpy as np
+from collections import defaultdict, deque
+from typing import Optional
+from tqdm import tqdm
+
+# A chunk is a straggler when its per-sim time exceeds this multiple of the running median
+STRAGGLER_FACTOR = 2.0
+STRAGGLER_MIN_CHUNKS = 3
+RATE_WINDOW_SECONDS = 10.0
+
+class RunTelemetry:
+    """
+    Live view of a chunked Monte Carlo run: a tqdm bar with ETA and rolling
+    sims/sec, plus an optional JSON-lines stream (one 'start' record, one
+    'chunk' record per finished chunk, one 'summary') for per-worker
+    durations, queue depth and stragglers.
+    progress=None shows the bar only on a terminal.
+    """
+
+    def __init__(self, n_sims: int, n_chunks: int, processes: int, path: Optional[str] = None,
+                 progress: Optional[bool] = None, desc: str = 'Monte Carlo'):
+        self.n_sims = n_sims
+        self.n_chunks = n_chunks
+        self.processes = processes
+        self.started = time.time()
+        self.done_sims = 0
+        self.done_chunks = 0
+        self.restored_sims = 0
+        self.offset = 0  # path index of the current batch's first seed (adaptive runs)
+        self.per_sim = []  # seconds per sim of each finished chunk
+        self.stragglers = []
+        self.workers = defaultdict(lambda: {'chunks': 0, 'sims': 0, 'busy_seconds': 0.0})
+        self._recent = deque()  # (finished at, sims) inside the rolling window
+        self._stream = open(path, 'w') if path else None
+        self._bar = tqdm(total=n_sims, desc=desc, unit='sims', disable=None if progress is None else not progress,
+                         dynamic_ncols=True)
+        self._emit({'event': 'start', 'n_sims': n_sims, 'n_chunks': n_chunks, 'processes': processes,
+                    'time': self.started})
+
+    def _emit(self, record: dict):
+        if self._stream is not None:
+            self._stream.write(json.dumps(record) + '\n')
+            self._stream.flush()
+
+    def rolling_rate(self, now: float) -> float:
+        while self._recent and self._recent[0][0] < now - RATE_WINDOW_SECONDS:
+            self._recent.popleft()
+        window = min(RATE_WINDOW_SECONDS, now - self.started) or 1e-9
+        return sum(n for _, n in self._recent) / window
+
+    def restore(self, n_sims: int, n_chunks: int):
+        """Counts chunks reloaded from a checkpoint as done, without touching the rolling rate or worker stats"""
+        self.restored_sims += n_sims
+        self.done_sims += n_sims
+        self.done_chunks += n_chunks
+        self._bar.update(n_sims)
+        self._emit({'event': 'restored', 'n_sims': n_sims, 'n_chunks': n_chunks, 'time': time.time()})
+
+    def next_batch(self, offset: int, n_chunks: int):
+        """Adaptive runs: the next batch starts at path `offset` and adds n_chunks to the plan"""
+        self.offset = offset
+        self.n_chunks += n_chunks
+
+    def chunk_done(self, pid: int, start: int, stop: int, began: float, ended: float):
+        """Records one finished chunk; began/ended are the worker's time.time() stamps"""
+        now = time.time()
+        start, stop = start + self.offset, stop + self.offset
+        n = stop - start
+        seconds = ended - began
+        self.done_sims += n
+        self.done_chunks += 1
+        worker = self.workers[pid]
+        worker['chunks'] += 1
+        worker['sims'] += n
+        worker['busy_seconds'] += seconds
+        self._recent.append((now, n))
+
+        per_sim = seconds / max(n, 1)
+        straggler = (len(self.per_sim) >= STRAGGLER_MIN_CHUNKS
+                     and per_sim > STRAGGLER_FACTOR * float(np.median(self.per_sim)))
+        self.per_sim.append(per_sim)
+        if straggler:
+            self.stragglers.append({'pid': pid, 'start': start, 'stop': stop, 'seconds': seconds})
+
+        remaining = self.n_chunks - self.done_chunks
+        in_flight = min(self.processes, remaining)
+        rate = self.rolling_rate(now)
+        self._bar.update(n)
+        self._bar.set_postfix({'sims/s': f'{rate:.0f}', 'queued': remaining - in_flight}, refresh=False)
+        self._emit({'event': 'chunk', 'pid': pid, 'start': start, 'stop': stop, 'began': began, 'ended': ended,
+                    'seconds': seconds, 'queue_depth': remaining - in_flight, 'in_flight': in_flight,
+                    'done_sims': self.done_sims, 'rolling_sims_per_sec': rate, 'straggler': straggler})
+
+    def summary(self) -> dict:
+        wall = time.time() - self.started
+        busy = [w['busy_seconds'] for w in self.workers.values()]
+        per_sim = np.array(self.per_sim) if self.per_sim else np.zeros(1)
+        simulated = self.done_sims - self.restored_sims
+        return {
+            'n_sims': self.done_sims,
+            'simulated_sims': simulated,
+            'restored_sims': self.restored_sims,
+            'wall_seconds': wall,
+            # Compute rate of this run; effective_sims_per_sec also counts paths reloaded from a checkpoint
+            'sims_per_sec': simulated / wall if wall > 0 else 0.0,
+            'effective_sims_per_sec': self.done_sims / wall if wall > 0 else 0.0,
+            'chunk_ms_per_sim': {'p50': float(np.percentile(per_sim, 50)) * 1e3,
+                                 'p95': float(np.percentile(per_sim, 95)) * 1e3},
+            # max / mean busy time across workers: 1.0 is a perfectly balanced pool
+            'imbalance': max(busy) / np.mean(busy) if busy and np.mean(busy) > 0 else 1.0,
+            'utilization': sum(busy) / (wall * self.processes) if wall > 0 else 0.0,
+            'stragglers': self.stragglers,
+            'workers': {str(pid): dict(w) for pid, w in sorted(self.workers.items())},
+        }
+
+    def close(self) -> dict:
+        self._bar.close()
+        summary = self.final = self.summary()
+        self._emit(dict(summary, event='summary'))
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        return summary
+
+    def __enter__(self) -> 'RunTelemetry':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def print_telemetry(summary: dict):
+    print(f"Workers: {len(summary['workers'])}, utilization {summary['utilization']:.0%}, "
+          f"imbalance {summary['imbalance']:.2f}, chunk p50/p95 {summary['chunk_ms_per_sim']['p50']:.2f}/"
+          f"{summary['chunk_ms_per_sim']['p95']:.2f} ms/sim, {len(summary['stragglers'])} stragglers")
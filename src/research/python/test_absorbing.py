@@ -0,0 +1,32 @@
+import numpy as np
+from absorbing import time_of_death, death_histogram, death_summary, PRICE_FLOOR
+from batch_engine import simulate_batch
+from results import SimResultBatch
+from streaming import StreamingAggregator
+from test_engine import make_params, SCENARIOS
+
+def test_time_of_death_needs_collapse_through_the_horizon():
+    batch = SimResultBatch.empty(4, 6)
+    batch['price'][:] = 1.0
+    batch['providers'][:] = 100.0
+    batch['price'][0, 2:] = PRICE_FLOOR * 1.001        # dies at week 2
+    batch['price'][1, 1:3] = PRICE_FLOOR                # recovers: alive
+    batch['providers'][2, 4:] = 2.0                     # network collapse at week 4
+    weeks = time_of_death(batch)
+    np.testing.assert_array_equal(weeks, [2, np.nan, 4, np.nan])
+
+    summary = death_summary(death_histogram(batch))
+    assert summary['n_absorbed'] == 2 and summary['death_probability'] == 0.5
+    assert summary['time_of_death_p05'] == 2 and summary['time_of_death_p95'] == 4
+    assert summary['survival'] == [1, 1, 0.75, 0.75, 0.5, 0.5]
+
+def test_streaming_death_counts_match_batch():
+    params = make_params(**SCENARIOS['death_spiral'])
+    batch = simulate_batch(params, np.arange(300))
+    agg = StreamingAggregator(params.T)
+    for i in range(0, 300, 70):
+        part = StreamingAggregator(params.T)
+        part.add(batch.sims(slice(i, i + 70)))
+        agg.merge(part)
+    assert agg.death_summary() == death_summary(death_histogram(batch))
+    assert agg.death_summary()['death_probability'] > 0.9
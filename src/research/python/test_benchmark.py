@@ -0,0 +1,37 @@
+import json
+import benchmark
+from benchmark import BenchCase, build_cases, compare, measure, main
+
+def report(**results):
+    return {'results': {key: dict(throughput=t, p95=p95, peak_rss_mb=rss, config={})
+                        for key, (t, p95, rss) in results.items()}}
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = report(a=(1000, 0.10, 100), b=(1000, 0.10, 100), c=(1000, 0.10, 100), gone=(1, 1, 1))
+    current = report(a=(900, 0.11, 110), b=(800, 0.10, 100), c=(1000, 0.10, 150), new=(1, 1, 1))
+    regressions = compare(baseline, current, threshold=0.15)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('b: throughput') and regressions[1].startswith('c: peak_rss_mb')
+    assert compare(baseline, current, threshold=0.6) == []
+
+def test_isolated_measurement_and_grid():
+    result = measure(BenchCase('sum', lambda: lambda: sum(range(1000)), units=1000, repeat=3))
+    assert result['throughput'] > 0 and result['p95'] >= result['p50'] > 0 and result['peak_rss_mb'] > 0
+    keys = [c.key for c in build_cases('full', max_tensor_bytes=2 * 2**30)]
+    assert 'run_monte_carlo T=520 n_sims=10000 workers=1 backend=python' in keys
+    assert not any('T=520 n_sims=100000' in key for key in keys)
+    assert len(keys) == len(set(keys))
+
+def test_cli_saves_baseline_then_gates(tmp_path, monkeypatch):
+    monkeypatch.setitem(benchmark.PROFILES, 'quick', {'T': (8,), 'n_sims': (20,), 'workers': (1,), 'export_sims': 10})
+    baseline = str(tmp_path / 'baseline.json')
+    args = ['--only', 'simulate_one', '--only', 'aggregate', '--baseline', baseline, '--no-isolate']
+    assert main(args + ['--save']) == 0
+    with open(baseline) as f:
+        saved = json.load(f)
+    assert set(saved['results']) == {'simulate_one T=8', 'aggregate_results T=8 n_sims=20'}
+    for r in saved['results'].values():
+        r['throughput'] *= 10  # pretend the baseline was much faster
+    with open(baseline, 'w') as f:
+        json.dump(saved, f)
+    assert main(args) == 1
@@ -0,0 +1,94 @@
+import json
+import os
+import dataclasses
+import numpy as np
+from cache import ENGINE_SOURCES, ResultCache, cache_key, flatten_stats, unflatten_stats
+from monte_carlo import run_monte_carlo
+import export_data
+from test_engine import make_params
+
+def test_key_tracks_params_seeds_and_engine_only():
+    params = make_params()
+    seeds = np.arange(10)
+    key = cache_key(params, seeds, 'paths', engine='v1')
+    assert key == cache_key(dataclasses.replace(params, nSims=5, seed=3), seeds, 'paths', engine='v1')
+    assert key != cache_key(dataclasses.replace(params, burnPct=0.9), seeds, 'paths', engine='v1')
+    assert key != cache_key(params, seeds[::-1], 'paths', engine='v1')
+    assert key != cache_key(params, seeds, 'aggregate', engine='v1')
+    assert key != cache_key(params, seeds, 'paths', engine='v2')
+    # Antithetic / Sobol path entries depend on the shock generators too
+    assert 'variance_reduction.py' in ENGINE_SOURCES
+
+def test_aggregate_keys_also_track_aggregation_code(tmp_path, monkeypatch):
+    import cache as cache_module
+    params, seeds = make_params(), np.arange(10)
+    before = ResultCache(str(tmp_path))
+    monkeypatch.setattr(cache_module, 'AGGREGATE_SOURCES', ('results.py', 'streaming.py'))
+    after = ResultCache(str(tmp_path))
+    assert before.key(params, seeds, 'paths') == after.key(params, seeds, 'paths')
+    assert before.key(params, seeds, 'aggregate') != after.key(params, seeds, 'aggregate')
+    assert before.key(params, seeds, 'aggregate-streaming') != after.key(params, seeds, 'aggregate-streaming')
+
+    before.put('stale', {'x': np.zeros(1)}, meta={'kind': 'aggregate'})
+    after.put('fresh', {'x': np.zeros(1)}, meta={'kind': 'aggregate'})
+    assert after.prune_stale() == 1 and after.get('fresh') is not None
+
+def test_stats_round_trip_and_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    stats = {'price': {'mean': np.arange(4.0), 'p05': np.zeros(4)}, 'revenue': {'p95': np.ones(4)}}
+    cache.put('a', flatten_stats(stats), meta={'kind': 'aggregate'})
+    restored = unflatten_stats(cache.get('a'))
+    assert restored.keys() == stats.keys()
+    np.testing.assert_array_equal(restored['price']['mean'], stats['price']['mean'])
+    assert cache.meta('a')['kind'] == 'aggregate' and cache.hits == 1
+
+    payload = {'data': np.random.default_rng(0).normal(size=20_000)}
+    cache.put('b', payload)
+    os.utime(tmp_path / 'a.npz', (0, 0))  # 'a' becomes least recently used
+    cache.max_bytes = cache.size_bytes() - 1
+    cache.evict()
+    assert cache.get('a') is None and cache.get('b') is not None
+    assert cache.invalidate('b') and not cache.invalidate('b')
+
+def test_monte_carlo_cache_hit_is_identical(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    params = make_params(seed=11)
+    first = run_monte_carlo(params, n_sims=40, backend='numpy', processes=1, cache=cache)
+    second = run_monte_carlo(params, n_sims=40, backend='numpy', processes=1, cache=cache)
+    assert cache.misses == 1 and cache.hits == 1
+    np.testing.assert_array_equal(first.data, second.data)
+
+def test_cache_entries_are_per_backend(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    params = make_params(seed=11)
+    run_monte_carlo(params, n_sims=20, backend='numpy', processes=1, cache=cache)
+    run_monte_carlo(params, n_sims=20, backend='python', processes=1, cache=cache)
+    assert cache.misses == 2 and cache.hits == 0
+    assert export_data.aggregate_kind('numpy') != export_data.aggregate_kind('python')
+    assert export_data.aggregate_kind('numpy', target_precision=0.02) != \
+        export_data.aggregate_kind('python', target_precision=0.02)
+
+def test_export_recomputes_only_changed_scenarios(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    out = str(tmp_path / 'out')
+    export_data.export_all_research_data(n_sims=20, processes=1, output_dir=out, cache=cache)
+    assert cache.misses == 4
+    with open(os.path.join(out, 'research_neutral.json')) as f:
+        before = json.load(f)
+
+    original = export_data.research_scenarios
+    def touched():
+        scenarios = original()
+        name, params, filename = scenarios[1]
+        scenarios[1] = (name, dataclasses.replace(params, burnPct=0.77), filename)
+        return scenarios
+    monkeypatch.setattr(export_data, 'research_scenarios', touched)
+
+    submitted = []
+    monkeypatch.setattr(export_data.ScenarioScheduler, 'submit',
+                        lambda self, name, *a, _orig=export_data.ScenarioScheduler.submit, **kw:
+                        (submitted.append(name), _orig(self, name, *a, **kw)))
+    export_data.export_all_research_data(n_sims=20, processes=1, output_dir=out, cache=cache)
+    assert len(submitted) == 1 and cache.hits == 3
+    with open(os.path.join(out, 'research_neutral.json')) as f:
+        assert json.load(f) == before
@@ -0,0 +1,59 @@
+import json
+import os
+import numpy as np
+import pytest
+import checkpoint as checkpoint_module
+from checkpoint import ChunkCheckpoint
+from monte_carlo import run_monte_carlo, aggregate_results
+from parallel import run_chunked
+from test_engine import make_params
+
+class Interrupt:
+    """Telemetry stand-in that kills the run after `after` chunks"""
+
+    def __init__(self, after: int):
+        self.after = after
+
+    def chunk_done(self, *chunk):
+        self.after -= 1
+        if self.after == 0:
+            raise KeyboardInterrupt
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_resumed_run_is_bit_identical(tmp_path, backend):
+    params = make_params(T=16)
+    seeds = np.arange(40)
+    checkpoint = ChunkCheckpoint(params, seeds, backend, chunk_size=6, root=str(tmp_path))
+    with pytest.raises(KeyboardInterrupt):
+        run_chunked(params, seeds, backend, processes=1, telemetry=Interrupt(3), checkpoint=checkpoint)
+    finished = checkpoint.completed()
+    assert (0, 6) in finished and 3 <= len(finished) < 7
+
+    telemetry_path = tmp_path / 'telemetry.jsonl'
+    resumed = run_monte_carlo(params, seeds=seeds, backend=backend, chunk_size=6, processes=2,
+                              checkpoint_dir=str(tmp_path), progress=False, telemetry_path=str(telemetry_path))
+    assert not os.path.exists(checkpoint.dir)  # removed once complete
+    summary = json.loads(telemetry_path.read_text().splitlines()[-1])
+    restored = sum(stop - start for start, stop in finished)
+    assert summary['n_sims'] == 40 and summary['restored_sims'] == restored
+    assert summary['simulated_sims'] == 40 - restored
+    fresh = run_monte_carlo(params, seeds=seeds, backend=backend, processes=2, progress=False)
+    np.testing.assert_array_equal(resumed.data, fresh.data)
+    for metric, stats in aggregate_results(resumed, params.T).items():
+        for stat, values in stats.items():
+            np.testing.assert_array_equal(values, aggregate_results(fresh, params.T)[metric][stat])
+
+def test_checkpoint_key_tracks_run_identity(tmp_path, monkeypatch):
+    params = make_params(T=8)
+    seeds = np.arange(10)
+    base = ChunkCheckpoint(params, seeds, 'numpy', root=str(tmp_path))
+    assert base.dir == ChunkCheckpoint(params, seeds, 'numpy', root=str(tmp_path)).dir
+    assert base.dir != ChunkCheckpoint(params, seeds[::-1], 'numpy', root=str(tmp_path)).dir
+    assert base.dir != ChunkCheckpoint(params, seeds, 'numpy', 'antithetic', root=str(tmp_path)).dir
+    assert base.dir != ChunkCheckpoint(params, seeds, 'numpy', chunk_size=7, root=str(tmp_path)).dir
+    # An edit to the shock generators or backend dispatch between kill and restart starts over
+    assert {'variance_reduction.py', 'backends.py'} <= set(checkpoint_module.CHECKPOINT_SOURCES)
+    monkeypatch.setattr(checkpoint_module, 'CHECKPOINT_SOURCES', ('engine.py',))
+    assert base.dir != ChunkCheckpoint(params, seeds, 'numpy', root=str(tmp_path)).dir
+    with pytest.raises(ValueError):
+        run_monte_carlo(params, n_sims=4, streaming=True, checkpoint_dir=str(tmp_path))
@@ -0,0 +1,44 @@
+import json
+import os
+import numpy as np
+import pytest
+from columnar import write_columnar, load_columnar
+import export_data
+from test_engine import make_params
+
+def test_round_trip_float32_and_quantized(tmp_path):
+    rng = np.random.default_rng(0)
+    columns = {'week': np.arange(7), 'price': rng.lognormal(size=7), 'gap': np.r_[1.0, np.nan, 3, 4, 5, 6, 7]}
+    path = str(tmp_path / 'data.bin')
+    write_columnar(path, columns, {'scenario': 'x'})
+    loaded = load_columnar(path)
+    assert loaded.metadata == {'scenario': 'x'}
+    assert not loaded['price'].flags.writeable  # view of the read-only map
+    for name, values in columns.items():
+        np.testing.assert_array_equal(loaded[name], values.astype(np.float32))
+
+    write_columnar(path, columns, quantized=True)
+    loaded = load_columnar(path, mmap=False)
+    span = np.ptp(columns['price'])
+    np.testing.assert_allclose(loaded['price'], columns['price'], atol=span / 65534, rtol=1e-6)
+    assert np.isnan(loaded['gap'][1]) and loaded['week'][-1] == 6
+
+    with open(path, 'r+b') as f:
+        f.write(b'JSON')
+    with pytest.raises(ValueError):
+        load_columnar(path)
+
+def test_binary_export_matches_json(tmp_path):
+    params = make_params(T=12)
+    export_data.write_stats('Test', params, 'research_test.json',
+                            export_data.aggregate_results(
+                                export_data.run_monte_carlo(params, n_sims=30, backend='numpy', processes=1),
+                                params.T),
+                            30, str(tmp_path), export_format='both')
+    with open(os.path.join(tmp_path, 'research_test.json')) as f:
+        exported = json.load(f)
+    binary = load_columnar(os.path.join(tmp_path, 'research_test.bin'))
+    assert binary.metadata == exported['metadata']
+    for point, record in zip(exported['time_series'], binary.records()):
+        assert point.keys() == record.keys()
+        np.testing.assert_allclose(list(record.values()), list(point.values()), rtol=1e-6)
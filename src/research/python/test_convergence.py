@@ -0,0 +1,48 @@
+import json
+import os
+import numpy as np
+from convergence import assess_convergence, average_cv, standard_errors
+from backends import simulate
+from monte_carlo import run_adaptive, make_seeds
+import export_data
+from test_engine import make_params
+
+def test_assessment_matches_dashboard_thresholds():
+    assert assess_convergence(100, 0.099).level == 'high'
+    assert assess_convergence(100, 0.1).level == 'medium'
+    assert assess_convergence(99, 0.01).level == 'medium'
+    assert assess_convergence(30, 5.0).level == 'medium'
+    assert assess_convergence(20, 0.19).level == 'medium'
+    assert assess_convergence(20, 0.2).level == 'low'
+    assert assess_convergence(19, 0.0).level == 'low'
+    assert average_cv([], []) == 1
+    assert average_cv([0, np.nan], [1, 1]) == 1
+    assert np.isclose(average_cv([2, -4, 0], [1, 1, 9]), 0.375)
+
+def test_quantile_standard_error_tracks_sampling_spread():
+    rng = np.random.default_rng(3)
+    estimates = np.percentile(rng.normal(size=(400, 1000)), 5, axis=1)
+    _, se = standard_errors(rng.normal(size=(1000, 400)))['p05']
+    assert abs(se.mean() / estimates.std() - 1) < 0.1
+
+def test_adaptive_run_stops_early_and_matches_fixed_prefix():
+    params = make_params(seed=5)
+    results, report = run_adaptive(params, target_precision=0.05, max_sims=5000, backend='numpy', processes=1)
+    assert report.stopped == 'converged' and report.worst <= 0.05
+    assert report.assessment.level == 'high'
+    assert 100 <= results.n_sims < 5000
+    fixed = simulate(params, make_seeds(5000, params.seed)[:results.n_sims], backend='numpy')
+    np.testing.assert_array_equal(results.data, fixed.data)
+
+    _, tight = run_adaptive(params, target_precision=1e-4, max_sims=600, backend='numpy', processes=1)
+    assert tight.stopped == 'budget' and tight.n_sims == 600
+
+def test_export_reports_achieved_precision(tmp_path):
+    name, params, filename = export_data.research_scenarios()[0]
+    export_data.export_scenario(name, params, filename, n_sims=2000, output_dir=str(tmp_path),
+                                adaptive=True, target_precision=0.05, backend='numpy')
+    with open(os.path.join(tmp_path, filename)) as f:
+        meta = json.load(f)['metadata']
+    assert meta['convergence']['stopped'] == 'converged'
+    assert meta['convergence']['n_sims'] == meta['n_sims'] < 2000
+    assert set(meta['convergence']['relative_se']['price']) == {'mean', 'p05', 'p95'}
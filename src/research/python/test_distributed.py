@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from multiprocessing.connection import Client
+from batch_engine import simulate_batch
+from distributed import Coordinator, WorkQueue, run_distributed, spawn_local_workers
+from monte_carlo import aggregate_results
+from test_engine import make_params
+
+def test_expired_leases_are_requeued_and_late_results_ignored():
+    params = make_params(T=4)
+    queue = WorkQueue(params, np.arange(10), chunk_size=4, backend='numpy', mode='paths', lease_seconds=-1)
+    first = queue.lease('a')
+    assert first['chunk'] == 0 and len(first['seeds']) == 4
+    second = queue.lease('b')  # a's lease already expired, so chunk 0 goes out again
+    assert second['chunk'] == 0 and queue.requeued == 1
+    assert queue.complete('b', 0, 'result', 0.1) and not queue.complete('a', 0, 'late', 0.2)
+    assert queue.results[0] == 'result'
+
+def test_localhost_workers_match_local_run_despite_a_lost_worker():
+    params = make_params(T=12)
+    seeds = np.arange(60)
+    with Coordinator(params, seeds, chunk_size=7, lease_seconds=1.0) as coordinator:
+        procs = spawn_local_workers(coordinator.address, coordinator.authkey, 2)
+        procs += spawn_local_workers(coordinator.address, coordinator.authkey, 1, fail_after=1)
+        batch = coordinator.run(timeout=60, log_every=0.5)
+        progress = coordinator.queue.progress()
+    for proc in procs:
+        proc.join(timeout=5)
+    np.testing.assert_array_equal(batch.data, simulate_batch(params, seeds).data)
+    assert progress['workers'] == 3 and progress['requeued'] >= 1
+
+def test_streaming_mode_and_authentication():
+    params = make_params(T=8)
+    seeds = np.arange(40)
+    agg = run_distributed(params, seeds=seeds, chunk_size=10, streaming=True, local_workers=2, timeout=60)
+    expected = aggregate_results(simulate_batch(params, seeds), params.T)
+    assert agg.n_sims == 40
+    np.testing.assert_allclose(aggregate_results(agg, params.T)['price']['mean'], expected['price']['mean'])
+
+    with Coordinator(params, seeds, authkey=b'secret') as coordinator:
+        with pytest.raises(Exception):
+            Client(coordinator.address, authkey=b'wrong')
@@ -0,0 +1,111 @@
+import dataclasses
+import numpy as np
+import pytest
+from engine import SimulationParams, simulate_one, RESULT_FIELDS
+from batch_engine import simulate_batch
+from backends import BACKENDS
+import jit_kernel
+from results import SimResultBatch
+from monte_carlo import aggregate_results
+from sweep import sweep
+
+SEEDS = [1, 7, 42, 1234, 99999]
+
+def make_params(**overrides) -> SimulationParams:
+    params = SimulationParams(
+        T=52,
+        initialSupply=410_000_000,
+        initialPrice=0.10,
+        initialProviders=3200,
+        maxMintWeekly=2_000_000,
+        burnPct=0.65,
+        initialLiquidity=10_000_000,
+        investorUnlockWeek=24,
+        investorSellPct=0.10,
+        demandType='growth',
+        macro='neutral',
+        nSims=len(SEEDS),
+        seed=42,
+        providerCostPerWeek=5.0,
+        baseCapacityPerProvider=100.0,
+        kDemandPrice=0.15,
+        kMintPrice=0.05,
+        rewardLagWeeks=4,
+        churnThreshold=10.0,
+        hardwareCost=150.0,
+        competitorYield=0.0,
+        emissionModel='fixed',
+        revenueStrategy='burn'
+    )
+    return dataclasses.replace(params, **overrides)
+
+SCENARIOS = {
+    'baseline': {},
+    'bear_kpi_reserve': dict(macro='bearish', demandType='consistent', emissionModel='kpi', revenueStrategy='reserve', investorSellPct=0.2),
+    'vampire_volatile': dict(macro='bullish', demandType='volatile', competitorYield=0.5, rewardLagWeeks=1),
+    'decay_no_unlock': dict(demandType='high-to-decay', investorUnlockWeek=80, T=30),
+    'death_spiral': dict(initialProviders=50, maxMintWeekly=50_000_000, kMintPrice=0.35, hardwareCost=5000.0),
+}
+
+def scalar_paths(params, seeds):
+    return {
+        name: np.array([[getattr(r, name) for r in simulate_one(params, s)] for s in seeds])
+        for name in RESULT_FIELDS
+    }
+
+@pytest.mark.parametrize('backend', list(BACKENDS))
+@pytest.mark.parametrize('scenario', list(SCENARIOS))
+def test_backends_are_equivalent(backend, scenario):
+    params = make_params(**SCENARIOS[scenario])
+    expected = scalar_paths(params, SEEDS)
+    actual = BACKENDS[backend](params, SEEDS)
+    for name in RESULT_FIELDS:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-7, atol=1e-9, err_msg=name)
+
+def test_interpreted_plan_kernel_matches_scalar_engine():
+    # Same kernel the jit backend compiles, run as plain Python
+    params = make_params(**SCENARIOS['bear_kpi_reserve'])
+    expected = scalar_paths(params, SEEDS[:2])
+    actual = jit_kernel.simulate_plan(params, SEEDS[:2], compiled=False)
+    for name in RESULT_FIELDS:
+        np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+def test_result_batch_round_trips_scalar_paths():
+    params = make_params(T=12)
+    paths = [simulate_one(params, s) for s in SEEDS]
+    batch = SimResultBatch.from_paths(paths)
+    assert batch.data.shape == (len(SEEDS), 12, len(RESULT_FIELDS))
+    assert batch.to_paths() == paths
+    assert batch.sims(2).path(0) == paths[2]
+    assert batch.week_slice(slice(4, 8)).path(1) == paths[1][4:8]
+    np.testing.assert_array_equal(batch['price'][:, 3], [p[3].price for p in paths])
+    # Legacy list-of-paths indexing
+    assert batch[1] == paths[1] and batch[np.int64(2)][5] == paths[2][5] and batch[-1] == paths[-1]
+
+def test_aggregate_accepts_batch_and_legacy_paths():
+    params = make_params(T=12)
+    batch = simulate_batch(params, SEEDS)
+    from_batch = aggregate_results(batch, params.T)
+    from_paths = aggregate_results(batch.to_paths(), params.T)
+    for metric in from_batch:
+        for stat in from_batch[metric]:
+            np.testing.assert_array_equal(from_batch[metric][stat], from_paths[metric][stat])
+
+@pytest.mark.parametrize('backend', ['numpy', 'jit'])
+def test_sweep_matches_per_config_runs(backend):
+    profiles = {'base': make_params(T=20), 'bear': make_params(T=20, **SCENARIOS['bear_kpi_reserve'])}
+    grid = {'burnPct': [0.3, 0.9], 'revenueStrategy': ['burn', 'reserve'], 'investorUnlockWeek': [5, 12]}
+    result = sweep(profiles, grid, seeds=SEEDS, backend=backend, max_rows=3 * len(SEEDS))
+
+    assert len(result) == 16
+    assert result.coords[0] == {'profile': 'base', 'burnPct': 0.3, 'revenueStrategy': 'burn', 'investorUnlockWeek': 5}
+    for coords, agg in zip(result.coords, result.aggregates):
+        point = {k: v for k, v in coords.items() if k != 'profile'}
+        params = dataclasses.replace(profiles[coords['profile']], **point)
+        expected = aggregate_results(simulate_batch(params, SEEDS), params.T)
+        np.testing.assert_allclose(agg['price']['p95'], expected['price']['p95'], rtol=1e-7)
+        np.testing.assert_allclose(agg['providers']['mean'], expected['providers']['mean'], rtol=1e-7)
+
+    frame = result.to_frame()
+    assert list(frame.columns[:4]) == ['profile', 'burnPct', 'revenueStrategy', 'investorUnlockWeek']
+    assert len(frame) == 16
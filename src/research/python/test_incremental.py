@@ -0,0 +1,45 @@
+import dataclasses
+import numpy as np
+import pytest
+from backends import run_python
+from engine import simulate_one
+from incremental import first_affected_week, run_with_snapshots
+from results import path_to_array
+from test_engine import make_params
+
+def test_first_affected_week_covers_late_and_global_fields():
+    base = make_params(T=40, investorUnlockWeek=24)
+    edit = lambda **kw: dataclasses.replace(base, **kw)
+    assert first_affected_week(base, base) == 40
+    assert first_affected_week(base, edit(investorUnlockWeek=30)) == 24
+    assert first_affected_week(base, edit(investorUnlockWeek=60)) == 24
+    assert first_affected_week(base, edit(investorSellPct=0.3)) == 24
+    assert first_affected_week(base, edit(growthCallEventWeek=32, growthCallEventPct=0.5)) == 32
+    assert first_affected_week(base, edit(nSims=5)) == 40
+    assert first_affected_week(base, edit(investorSellPct=0.3, burnPct=0.5)) == 0
+
+def test_resume_from_snapshot_matches_full_path():
+    params = make_params(T=30, rewardLagWeeks=3)
+    taken = {12: None, 25: None}
+    full = path_to_array(simulate_one(params, 7, snapshots=taken))
+    for week, snapshot in taken.items():
+        np.testing.assert_array_equal(path_to_array(simulate_one(params, 7, resume=snapshot)), full[week:])
+
+@pytest.mark.parametrize('overrides, resumed_from', [
+    ({'investorUnlockWeek': 30}, 20),
+    ({'investorSellPct': 0.35}, 20),
+    ({'investorUnlockWeek': 9}, 8),
+    ({'macro': 'bearish'}, 0),
+    ({'T': 20}, 0),
+])
+def test_what_if_matches_a_fresh_run(overrides, resumed_from):
+    params = make_params(T=36, investorUnlockWeek=22)
+    seeds = np.arange(12)
+    run = run_with_snapshots(params, seeds, chunk_size=5, processes=2)
+    edited = dataclasses.replace(params, **overrides)
+    assert run.resume_week(edited) == resumed_from
+    np.testing.assert_array_equal(run.what_if(overrides).data, run_python(edited, seeds).data)
+
+def test_snapshot_weeks_must_lie_in_the_horizon():
+    with pytest.raises(ValueError, match="outside the horizon"):
+        run_with_snapshots(make_params(T=10), np.arange(2), weeks=[4, 10])
@@ -0,0 +1,46 @@
+import json
+import os
+import numpy as np
+import pytest
+from jobs import load_spec, parse_spec, scenario_seeds, main
+from export_data import research_scenarios
+
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'job_specs')
+
+def test_bundled_research_spec_matches_builtin_scenarios():
+    job = load_spec(os.path.join(SPEC_DIR, 'research.json'))
+    assert [(s.name, s.params, s.filename) for s in job.scenarios] == research_scenarios()
+    toml_job = load_spec(os.path.join(SPEC_DIR, 'unlock_timing.toml'))
+    assert [s.params.investorUnlockWeek for s in toml_job.scenarios] == [12, 24, 40]
+    assert toml_job.scenarios[0].filename == 'research_unlock_week_12.json'
+    np.testing.assert_array_equal(scenario_seeds(toml_job, toml_job.scenarios[0]),
+                                  scenario_seeds(toml_job, toml_job.scenarios[2]))
+
+@pytest.mark.parametrize('spec', [
+    {'scenarios': [{'name': 'a', 'overrides': {'burnPCT': 0.5}}]},
+    {'scenarios': [{'name': 'a'}, {'name': 'a'}]},
+    {'execution': {'backend': 'gpu'}, 'scenarios': [{'name': 'a'}]},
+    {'execution': {'seed_policy': 'random', 'cache': True}, 'scenarios': [{'name': 'a'}]},
+    {'execution': {'threads': 4}, 'scenarios': [{'name': 'a'}]},
+    {'scenarios': []},
+])
+def test_invalid_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_spec(spec)
+
+def test_cli_runs_every_scenario_and_reports_timings(tmp_path):
+    spec = {'execution': {'backend': 'numpy', 'workers': 2, 'chunk_size': 10, 'n_sims': 30},
+            'base': {'T': 12},
+            'scenarios': [{'name': 'Base'}, {'name': 'Bear', 'overrides': {'macro': 'bearish'}, 'n_sims': 20}]}
+    path = str(tmp_path / 'job.json')
+    with open(path, 'w') as f:
+        json.dump(spec, f)
+    timings = str(tmp_path / 'timings.json')
+    assert main([path, '--output-dir', str(tmp_path), '--output-format', 'both', '--timings', timings]) == 0
+    with open(timings) as f:
+        rows = json.load(f)
+    assert [(r['scenario'], r['n_sims'], r['chunks']) for r in rows] == [('Base', 30, 3), ('Bear', 20, 2)]
+    for name in ('research_base', 'research_bear'):
+        with open(tmp_path / f'{name}.json') as f:
+            assert len(json.load(f)['time_series']) == 12
+        assert os.path.exists(tmp_path / f'{name}.bin')
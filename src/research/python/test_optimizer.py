@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from backends import simulate
+from optimizer import Constraint, Objective, halving_rungs, optimize
+from test_engine import make_params
+
+def test_rungs_and_constraints():
+    assert halving_rungs(50, 1000, 3) == [50, 150, 450, 1000]
+    assert halving_rungs(100, 100, 3) == [100]
+    assert Constraint('price', 'p05', '>', 0.02).violation(0.03) == 0
+    assert np.isclose(Constraint('price', 'p05', '>', 0.02).violation(0.015), 0.25)
+    assert np.isclose(Constraint('solvencyScore', 'mean', '<', 2.0).violation(3.0), 0.5)
+    with pytest.raises(ValueError):
+        Objective('nodes')
+    with pytest.raises(ValueError):
+        Objective(constraints=[Constraint('price', 'p05', '>=', 0.1)])
+    with pytest.raises(ValueError, match="at least 4"):
+        optimize(make_params(), {'burnPct': (0.3, 0.9)}, Objective(), population=3, generations=1)
+
+def test_optimizer_prunes_and_reports_paired_scores():
+    params = make_params(seed=6)
+    bounds = {'maxMintWeekly': (1e6, 6e6), 'burnPct': (0.3, 0.95), 'kMintPrice': (0.0, 0.2)}
+    objective = Objective('providers', 'p05', constraints=[Constraint('price', 'p50', '>', 0.01, week=10)])
+    result = optimize(params, bounds, objective, population=8, generations=4, n_sims=90, min_sims=10,
+                      processes=1, seed=1)
+    assert result.paths_simulated < result.paths_full_budget
+    assert len(result.history) == 4
+    values = [h['best_value'] for h in result.history if h['best_violation'] == 0]
+    assert values == sorted(values)
+
+    # The reported score is the best params' statistic on the optimizer's own seed list
+    seeds = np.random.default_rng(1).integers(0, 1000000, 90)
+    providers = simulate(result.best_params, seeds, 'numpy')['providers'][:, -1]
+    assert np.isclose(result.best_value, np.percentile(providers, 5))
@@ -0,0 +1,50 @@
+import dataclasses
+import numpy as np
+import pytest
+from backends import simulate
+from paired import compare, paired_stats
+from results import key_metrics
+from test_engine import make_params
+
+def test_a_side_reproduces_a_plain_run_and_identical_variants_tie():
+    params = make_params(T=20)
+    seeds = np.arange(30)
+    result = compare(params, params, seeds=seeds)
+    plain = key_metrics(simulate(params, seeds, 'numpy'), params.T)
+    np.testing.assert_allclose(result.metrics['price']['mean_a'], plain['price'].mean(axis=0))
+    for stats in result.metrics.values():
+        assert np.all(stats['delta'] == 0) and np.all(stats['ci_low'] == stats['ci_high'])
+        assert np.all(stats['p_a_beats_b'] == 0.5)
+
+def test_shared_streams_shrink_the_interval():
+    params = make_params(T=30)
+    a, b = dataclasses.replace(params, revenueStrategy='burn'), dataclasses.replace(params, revenueStrategy='reserve')
+    result = compare(a, b, n_sims=200, chunk_size=60, processes=2)
+    price = result.final_week()['price']
+    assert price['ci_low'] <= price['delta'] <= price['ci_high']
+    assert price['variance_ratio'] > 1
+    assert 0 <= price['p_a_beats_b'] <= 1 and 0 <= price['p_delta_positive'] <= 1
+
+def test_different_unlock_weeks_share_every_week_before_the_first_unlock():
+    params = make_params(T=30, investorUnlockWeek=12)
+    result = compare(params, dataclasses.replace(params, investorUnlockWeek=20), n_sims=40)
+    delta = result.metrics['price']['delta']
+    assert np.all(delta[:13] == 0) and np.any(delta[13:] != 0)
+
+def test_paired_stats_interval_matches_hand_computation():
+    rng = np.random.default_rng(0)
+    b = rng.normal(size=(50, 1))
+    a = b + 1 + 0.1 * rng.normal(size=(50, 1))
+    stats = paired_stats(a, b)
+    diff = (a - b)[:, 0]
+    half = 2.0096 * diff.std(ddof=1) / np.sqrt(50)
+    np.testing.assert_allclose([stats['ci_low'][0], stats['ci_high'][0]], [diff.mean() - half, diff.mean() + half],
+                               rtol=1e-4)
+    assert stats['p_a_beats_b'][0] == 1.0 and stats['variance_ratio'][0] > 10
+
+def test_rejects_mismatched_horizons_and_the_python_backend():
+    params = make_params(T=10)
+    with pytest.raises(ValueError, match="same horizon"):
+        compare(params, dataclasses.replace(params, T=12), n_sims=4)
+    with pytest.raises(ValueError, match="numpy"):
+        compare(params, params, n_sims=4, backend='python')
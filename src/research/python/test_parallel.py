@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from batch_engine import simulate_batch
+from monte_carlo import aggregate_results
+from parallel import run_chunked
+from scheduler import ScenarioScheduler
+from test_engine import make_params, SCENARIOS
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_chunked_shared_memory_dispatch_matches_in_process(backend):
+    params = make_params(T=16)
+    seeds = list(range(23))
+    shared = run_chunked(params, seeds, backend=backend, chunk_size=4, processes=2)
+    np.testing.assert_allclose(shared.data, simulate_batch(params, seeds).data, rtol=1e-7, atol=1e-9)
+
+def test_scheduler_runs_all_scenarios_on_one_pool():
+    scenarios = {
+        'base': make_params(T=12),
+        'bear': make_params(T=12, **SCENARIOS['bear_kpi_reserve']),
+        'vampire': make_params(T=20, **SCENARIOS['vampire_volatile']),
+    }
+    seeds = np.arange(30)
+    finished = {}
+    with ScenarioScheduler(processes=2, backend='numpy', chunk_size=7) as scheduler:
+        for name, params in scenarios.items():
+            scheduler.submit(name, params, seeds=seeds,
+                             on_complete=lambda batch, name=name: finished.update({name: aggregate_results(batch, batch.T)}))
+        jobs = scheduler.run()
+
+    assert set(finished) == set(scenarios)
+    assert all(job.remaining == 0 and len(job.chunk_seconds) == 5 for job in jobs.values())
+    for name, params in scenarios.items():
+        expected = aggregate_results(simulate_batch(params, seeds), params.T)
+        np.testing.assert_allclose(finished[name]['providers']['p05'], expected['providers']['p05'], rtol=1e-12)
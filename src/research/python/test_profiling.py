@@ -0,0 +1,36 @@
+import json
+import numpy as np
+import pytest
+from engine import simulate_one
+from monte_carlo import run_monte_carlo
+from profiling import PhaseProfiler, PHASES
+from results import path_to_array
+from test_engine import make_params, SCENARIOS
+
+def test_instrumented_path_is_unchanged_and_counts_events():
+    params = make_params(**SCENARIOS['bear_kpi_reserve'])
+    profiler = PhaseProfiler()
+    for seed in (1, 7, 42):
+        plain = path_to_array(simulate_one(params, seed))
+        np.testing.assert_array_equal(path_to_array(simulate_one(params, seed, profiler)), plain)
+    assert profiler.paths == 3 and len(profiler.traced) == 3
+    assert all(profiler.phase_ns[p] > 0 for p in PHASES)
+    assert profiler.counters['amm_unlock'] == 3
+    assert profiler.counters['churn_multiplier_1.8x'] + profiler.counters['churn_multiplier_4x'] > 0
+
+def test_run_monte_carlo_writes_report_and_chrome_trace(tmp_path):
+    params = make_params(T=30)
+    path = str(tmp_path / 'profile.json')
+    batch = run_monte_carlo(params, seeds=np.arange(12), chunk_size=3, processes=2, profile_path=path)
+    np.testing.assert_array_equal(batch.data, run_monte_carlo(params, seeds=np.arange(12), processes=1).data)
+    with open(path) as f:
+        report = json.load(f)
+    assert report['paths'] == 12 and set(report['phases']) == set(PHASES)
+    assert abs(sum(p['share'] for p in report['phases'].values()) - 1) < 1e-9
+    assert sum(w['chunks'] for w in report['workers'].values()) == 4
+    assert report['counters']['amm_unlock'] == 12
+    with open(str(tmp_path / 'profile.trace.json')) as f:
+        events = json.load(f)['traceEvents']
+    assert {e['cat'] for e in events if e['ph'] == 'X'} == {'chunk', 'path', 'phase'}
+    with pytest.raises(ValueError):
+        run_monte_carlo(params, n_sims=4, backend='numpy', profile_path=path)
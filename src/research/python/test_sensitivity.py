@@ -0,0 +1,25 @@
+import numpy as np
+from sensitivity import saltelli_matrices, sobol_indices, sensitivity
+from test_engine import make_params
+
+def test_estimators_recover_analytic_indices():
+    # y = x1 + 2 x2 + x1 x3 on U(0,1)^3
+    bounds = {'x1': (0, 1), 'x2': (0, 1), 'x3': (0, 1)}
+    A, B, AB = saltelli_matrices(bounds, 4096, seed=0)
+    f = lambda X: X[..., 0] + 2 * X[..., 1] + X[..., 0] * X[..., 2]
+    S1, ST = sobol_indices(f(A), f(B), f(AB))
+    # Exact: V1 = Var(1.5 x1) = 2.25/12, V2 = 4/12, V3 = Var(0.5 x3) = 0.25/12, V13 = 1/144
+    V1, V2, V3, V13 = 2.25 / 12, 4 / 12, 0.25 / 12, 1 / 144
+    V = V1 + V2 + V3 + V13
+    np.testing.assert_allclose(S1, [V1 / V, V2 / V, V3 / V], atol=0.02)
+    np.testing.assert_allclose(ST, [(V1 + V13) / V, V2 / V, (V3 + V13) / V], atol=0.02)
+
+def test_sensitivity_runs_batched_and_flags_inert_params():
+    bounds = {'investorSellPct': (0.0, 0.3), 'maxMintWeekly': (1e6, 6e6), 'burnPct': (0.3, 0.9)}
+    result = sensitivity(make_params(seed=4), bounds, n_base=64, n_sims=30, processes=1, n_bootstrap=100)
+    frame = result.to_frame()
+    assert len(frame) == 9 and result.n_evaluations == 64 * 5
+    providers = frame[frame.output == 'providers'].set_index('param')
+    assert providers.loc['burnPct', 'ST'] < 0.01
+    assert providers.loc['investorSellPct', 'ST'] > providers.loc['burnPct', 'ST']
+    assert (frame['ST_conf'].dropna() >= 0).all()
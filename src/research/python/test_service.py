@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from batch_engine import simulate_batch
+from export_data import research_base_params, time_series_records
+from jobs import apply_overrides
+from monte_carlo import aggregate_results, make_seeds
+from service import SimulationService
+
+@pytest.fixture(scope='module')
+def service():
+    loop = asyncio.new_event_loop()
+    svc = SimulationService(processes=2, chunk_size=10, partial_interval=0)
+    address = loop.run_until_complete(svc.start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield svc, f"http://{address[0]}:{address[1]}"
+    asyncio.run_coroutine_threadsafe(svc.close(), loop).result(timeout=30)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+
+def post(url, body, stream=False):
+    request = urllib.request.Request(url + ('/simulate?stream=1' if stream else '/simulate'),
+                                     data=json.dumps(body).encode(), headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        if stream:
+            return [json.loads(line) for line in response.read().splitlines() if line]
+        return json.loads(response.read())
+
+def test_result_matches_local_aggregate_and_repeats_hit_the_cache(service):
+    svc, url = service
+    body = {'params': {'T': 12}, 'n_sims': 40, 'seed': 3}
+    first = post(url, body)
+    params = apply_overrides(research_base_params(), {'T': 12}, 'test')
+    expected = time_series_records(aggregate_results(simulate_batch(params, make_seeds(40, 3)), 12), 12)
+    assert first['metadata']['n_sims'] == 40
+    for got, want in zip(first['time_series'], expected):
+        assert got['week'] == want['week']
+        np.testing.assert_allclose(got['price_mean'], want['price_mean'])
+        np.testing.assert_allclose(got['nodes_p95'], want['nodes_p95'])
+
+    hits = svc.stats['cache_hits']
+    again = post(url, body)
+    assert again['cached'] and again['time_series'] == first['time_series']
+    assert svc.stats['cache_hits'] == hits + 1
+
+def test_concurrent_identical_requests_share_one_job(service):
+    svc, url = service
+    body = {'params': {'T': 16}, 'n_sims': 60, 'seed': 11}
+    simulated = svc.stats['simulated']
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: post(url, body), range(4)))
+    assert svc.stats['simulated'] == simulated + 1
+    assert all(r['time_series'] == results[0]['time_series'] for r in results)
+
+def test_stream_emits_partials_then_final(service):
+    _, url = service
+    events = post(url, {'params': {'T': 10}, 'n_sims': 35, 'seed': 5}, stream=True)
+    assert [e['event'] for e in events] == ['partial'] * 3 + ['done']
+    assert [e['metadata']['n_sims'] for e in events] == sorted(e['metadata']['n_sims'] for e in events)
+    assert events[-1]['metadata']['n_sims'] == 35 and len(events[-1]['time_series']) == 10
+
+def test_partials_are_throttled(service):
+    svc, url = service
+    svc.partial_interval = 3600
+    try:
+        events = post(url, {'params': {'T': 10}, 'n_sims': 45, 'seed': 6}, stream=True)
+    finally:
+        svc.partial_interval = 0
+    assert [e['event'] for e in events] == ['partial', 'done']
+
+def test_bad_requests_are_rejected(service):
+    _, url = service
+    for body in ({'params': {'no_such_field': 1}}, {'n_sims': 0}, {'backend': 'gpu'}, {'unexpected': 1},
+                 {'params': {'T': 'abc'}}, {'params': {'macro': 'sideways'}}, {'params': {'revenueStrategy': 'x'}},
+                 {'params': {'T': 0}}, {'params': {'T': 100_000}}, {'n_sims': 50_000, 'params': {'T': 500}},
+                 {'params': {'burnPct': 'high'}}, {'seed': 'abc'}, [1, 2]):
+        with pytest.raises(urllib.error.HTTPError) as err:
+            post(url, body)
+        assert err.value.code == 400
+    with urllib.request.urlopen(url + '/health', timeout=10) as response:
+        health = json.loads(response.read())
+    assert health['processes'] == 2 and health['inflight'] == 0
@@ -0,0 +1,57 @@
+import numpy as np
+from streaming import TDigest, WeeklyMoments, StreamingAggregator
+from batch_engine import simulate_batch
+from monte_carlo import aggregate_results, run_monte_carlo
+from test_engine import make_params
+
+def test_moments_merge_matches_numpy():
+    values = np.random.default_rng(0).lognormal(size=(1000, 6))
+    left, right = WeeklyMoments(6), WeeklyMoments(6)
+    for block in np.array_split(values[:700], 5):
+        left.update(block)
+    right.update(values[700:])
+    left.merge(right)
+    np.testing.assert_allclose(left.mean, values.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(left.std, values.std(axis=0, ddof=1), rtol=1e-10)
+
+def test_tdigest_is_exact_below_compression_and_close_above():
+    rng = np.random.default_rng(1)
+    small = rng.normal(size=40)
+    digest = TDigest()
+    digest.update(small)
+    for q in (0.05, 0.5, 0.95):
+        assert np.isclose(digest.quantile(q), np.percentile(small, q * 100))
+
+    values = rng.lognormal(sigma=1.0, size=200_000)
+    parts = [TDigest() for _ in range(8)]
+    for part, chunk in zip(parts, np.array_split(values, 8)):
+        for block in np.array_split(chunk, 10):
+            part.update(block)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert merged.count == values.size
+    for q in (0.01, 0.05, 0.5, 0.95, 0.99):
+        exact = np.percentile(values, q * 100)
+        assert abs(merged.quantile(q) - exact) / exact < 0.01
+
+def test_streaming_aggregate_tracks_exact_aggregate():
+    params = make_params()
+    seeds = np.arange(2000)
+    batch = simulate_batch(params, seeds)
+    agg = StreamingAggregator(params.T)
+    for i in range(0, len(seeds), 250):
+        agg.add(batch.sims(slice(i, i + 250)))
+    exact = aggregate_results(batch, params.T)
+    approx = aggregate_results(agg, params.T)
+    assert agg.n_sims == 2000
+    for metric in exact:
+        np.testing.assert_allclose(approx[metric]['mean'], exact[metric]['mean'], rtol=1e-9)
+        for stat in ('p05', 'p95'):
+            np.testing.assert_allclose(approx[metric][stat], exact[metric][stat], rtol=0.01)
+
+def test_run_monte_carlo_streaming_returns_export_shape():
+    params = make_params(T=10)
+    stats = aggregate_results(run_monte_carlo(params, n_sims=200, backend='numpy', streaming=True, chunk_size=50), params.T)
+    assert set(stats) == {'price', 'providers', 'revenue'}
+    assert all(stats[m][s].shape == (10,) for m in stats for s in ('mean', 'p05', 'p95'))
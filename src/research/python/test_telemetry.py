@@ -0,0 +1,41 @@
+import json
+import numpy as np
+from monte_carlo import run_monte_carlo
+from telemetry import RunTelemetry
+from test_engine import make_params
+
+def test_stream_records_every_chunk_and_flags_stragglers(tmp_path):
+    path = str(tmp_path / 'telemetry.jsonl')
+    with RunTelemetry(n_sims=50, n_chunks=5, processes=2, path=path, progress=False) as telemetry:
+        for i, seconds in enumerate([1.0, 1.1, 0.9, 1.0, 3.0]):
+            telemetry.chunk_done(pid=100 + i % 2, start=10 * i, stop=10 * i + 10, began=0.0, ended=seconds)
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r['event'] for r in records] == ['start'] + ['chunk'] * 5 + ['summary']
+    assert [r['queue_depth'] for r in records[1:6]] == [2, 1, 0, 0, 0]
+    summary = telemetry.final
+    assert summary['n_sims'] == 50 and summary['stragglers'] == [{'pid': 100, 'start': 40, 'stop': 50, 'seconds': 3.0}]
+    assert summary['workers']['100']['chunks'] == 3 and summary['imbalance'] > 1
+
+def test_run_monte_carlo_reports_chunks_as_they_finish(tmp_path):
+    params = make_params(T=10)
+    path = str(tmp_path / 'telemetry.jsonl')
+    for streaming in (False, True):
+        run_monte_carlo(params, seeds=np.arange(40), backend='numpy', chunk_size=8, processes=2,
+                        streaming=streaming, progress=False, telemetry_path=path)
+        with open(path) as f:
+            chunks = [r for r in map(json.loads, f) if r['event'] == 'chunk']
+        assert sorted(r['start'] for r in chunks) == [0, 8, 16, 24, 32]
+        assert chunks[-1]['done_sims'] == 40 and all(r['seconds'] >= 0 for r in chunks)
+
+def test_adaptive_run_reports_every_batch_on_one_stream(tmp_path):
+    params = make_params(seed=5)
+    path = str(tmp_path / 'telemetry.jsonl')
+    results = run_monte_carlo(params, n_sims=5000, backend='numpy', chunk_size=50, processes=1, adaptive=True,
+                              target_precision=0.05, progress=False, telemetry_path=path)
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    chunks = [r for r in records if r['event'] == 'chunk']
+    assert records[0]['event'] == 'start' and records[-1]['event'] == 'summary'
+    assert sorted(r['start'] for r in chunks) == list(range(0, results.n_sims, 50))
+    assert records[-1]['n_sims'] == chunks[-1]['done_sims'] == results.n_sims < 5000
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+import tidy_export
+from tidy_export import export_tidy, TIDY_COLUMNS
+from batch_engine import simulate_batch
+from engine import RESULT_FIELDS
+from test_engine import make_params
+
+def expected_frame(params, seeds):
+    data = simulate_batch(params, seeds).data
+    n, T, F = data.shape
+    return data, pd.DataFrame({
+        'week': np.tile(np.repeat(np.arange(T), F), n),
+        'sim_index': np.repeat(np.arange(n), T * F),
+        'metric': np.tile(RESULT_FIELDS, n * T),
+    })
+
+def test_csv_export_streams_every_path_in_seed_order(tmp_path):
+    params = make_params(T=6)
+    seeds = np.arange(11)
+    path = export_tidy(params, str(tmp_path / 'tidy.csv'), seeds=seeds, profile_id='neutral',
+                       backend='numpy', chunk_size=3, processes=2)
+    frame = pd.read_csv(path)
+    data, expected = expected_frame(params, seeds)
+    assert tuple(frame.columns) == TIDY_COLUMNS
+    assert (frame['profile_id'] == 'neutral').all()
+    pd.testing.assert_frame_equal(frame[['week', 'sim_index', 'metric']], expected, check_dtype=False)
+    np.testing.assert_allclose(frame['value'], data.ravel(), atol=5e-7)
+
+def test_parquet_export_is_dictionary_encoded_with_row_group_per_chunk(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    params = make_params(T=5)
+    seeds = np.arange(10)
+    path = export_tidy(params, str(tmp_path / 'tidy.parquet'), seeds=seeds, backend='numpy',
+                       chunk_size=4, processes=2)
+    meta = pq.ParquetFile(path).metadata
+    assert meta.num_row_groups == 3 and meta.num_rows == 10 * 5 * len(RESULT_FIELDS)
+    table = pq.read_table(path)
+    assert str(table.schema.field('metric').type).startswith('dictionary')
+    data, expected = expected_frame(params, seeds)
+    frame = table.to_pandas()
+    np.testing.assert_array_equal(frame['value'], data.ravel())
+    np.testing.assert_array_equal(frame['metric'].astype(str), expected['metric'])
+
+def test_parquet_falls_back_to_csv_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(tidy_export, 'HAS_PYARROW', False)
+    with pytest.warns(UserWarning):
+        path = export_tidy(make_params(T=3), str(tmp_path / 'tidy.parquet'), seeds=[1, 2],
+                           backend='numpy', processes=1)
+    assert path.endswith('tidy.csv') and len(pd.read_csv(path)) == 2 * 3 * len(RESULT_FIELDS)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from trajectory_store import TrajectoryStore, run_to_store
+from batch_engine import simulate_batch
+from test_engine import make_params
+
+def test_parallel_writes_fill_disjoint_slices(tmp_path):
+    params = make_params(T=10)
+    seeds = np.arange(25)
+    store = run_to_store(params, str(tmp_path / 'run.traj'), seeds=seeds, backend='numpy', chunk_size=4, processes=2)
+    expected = simulate_batch(params, seeds)
+    np.testing.assert_array_equal(store.paths().data, expected.data)
+    np.testing.assert_array_equal(store.seeds, seeds)
+    assert store.params == params and store.metadata == {'backend': 'numpy'}
+    assert not store.data.flags.writeable
+
+def test_block_scans_match_in_memory_queries(tmp_path):
+    params = make_params(T=52)
+    seeds = np.arange(300)
+    batch = simulate_batch(params, seeds)
+    store = TrajectoryStore.create(str(tmp_path / 'run.traj'), params, seeds)
+    store.write(0, batch.sims(slice(0, 120)))
+    store.write(120, batch.sims(slice(120, 300)))
+    store.block_size = 64  # several blocks, last one partial
+
+    q = store.quantiles('price', weeks=[24, 51], q=[.05, .5, .95])
+    np.testing.assert_allclose(q, np.quantile(batch['price'][:, [24, 51]], [.05, .5, .95], axis=0))
+    np.testing.assert_allclose(store.mean('providers'), batch['providers'].mean(axis=0))
+
+    threshold = float(np.median(batch['providers'][:, 51]))
+    expected = np.flatnonzero((batch['providers'][:, 51] < threshold) & (batch['price'].min(axis=1) > 0.02))
+    np.testing.assert_array_equal(store.where('providers[51] < %r and price.min() > 0.02' % threshold), expected)
+    providers = store.field('providers')
+    np.testing.assert_array_equal(store.where((providers[51] < threshold) & (store.field('price').min() > 0.02)),
+                                  expected)
+    np.testing.assert_array_equal(store.paths(where=f'not providers[51] >= {threshold}').data,
+                                  batch.data[batch['providers'][:, 51] < threshold])
+
+    with pytest.raises(ValueError):
+        store.where('price')
+    with pytest.raises(ValueError):
+        store.where('liquidity[3] > 1')
+    np.testing.assert_array_equal(store.where('(price < 0.02).any() or 0.5 < price[-1]'),
+                                  np.flatnonzero((batch['price'] < 0.02).any(axis=1) | (batch['price'][:, -1] > 0.5)))
+    for escape in ("().__class__.__base__.__subclasses__()", "price.__class__", "__import__('os')",
+                   "price[0] < (lambda: 1)()", "price[0] < 'a'", "price.min(1) > 0", "[x for x in ()]",
+                   "price[0] < price", "price[0] > price", "price < price[0]", "price > price[0]",
+                   "price.min() < price", "price < 0.5"):
+        with pytest.raises(ValueError):
+            store.where(escape)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from batch_engine import draw_shocks, SHOCK_PRICE
+from backends import simulate
+from monte_carlo import run_monte_carlo
+from variance_reduction import shock_tensor, bridge_increments, benchmark
+from test_engine import make_params
+
+def test_shock_tensors_have_engine_layout():
+    params = make_params(investorUnlockWeek=5)
+    seeds = np.arange(9)
+    np.testing.assert_array_equal(shock_tensor(params, seeds), draw_shocks(params, seeds))
+
+    anti = shock_tensor(params, seeds, 'antithetic')
+    np.testing.assert_array_equal(anti[1::2], -anti[0:-1:2])
+    np.testing.assert_array_equal(anti[::2], draw_shocks(params, seeds[::2]))
+
+    sobol = shock_tensor(params, np.arange(4096), 'sobol')
+    assert sobol.shape == (4096, params.T, 3)
+    assert not sobol[:, 5, SHOCK_PRICE].any()
+    assert abs(sobol.mean()) < 0.01 and abs(sobol[:, :4].std() - 1) < 0.02
+    with pytest.raises(ValueError):
+        shock_tensor(params, seeds, 'halton')
+
+def test_bridge_increments_are_iid_standard_normal():
+    z = np.random.default_rng(0).normal(size=(200_000, 7))
+    increments = bridge_increments(z)
+    np.testing.assert_allclose(np.cov(increments, rowvar=False), np.eye(7), atol=0.02)
+    np.testing.assert_allclose(increments.sum(axis=1), np.sqrt(7) * z[:, 0], atol=1e-9)
+
+def test_variance_reduction_tightens_estimates():
+    rows = {row['mode']: row for row in benchmark(make_params(seed=3), n_sims=256, replications=12)}
+    assert rows['antithetic']['mean_efficiency'] > 2
+    assert rows['sobol']['mean_efficiency'] > 4
+    assert rows['sobol']['p95_efficiency'] > 1
+
+def test_monte_carlo_driver_feeds_tensor_to_chunks():
+    params = make_params(seed=8)
+    seeds = np.arange(100, 160)
+    results = run_monte_carlo(params, backend='numpy', seeds=seeds, chunk_size=16, processes=1,
+                              variance_reduction='sobol')
+    expected = simulate(params, seeds, 'numpy', shock_tensor(params, seeds, 'sobol'))
+    np.testing.assert_array_equal(results.data, expected.data)
+    with pytest.raises(ValueError):
+        run_monte_carlo(params, n_sims=4, backend='python', variance_reduction='antithetic')
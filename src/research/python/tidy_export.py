@@ -0,0 +1,175 @@
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from collections import deque
+from multiprocessing import Pool, cpu_count
+from typing import Optional, Sequence
+from engine import SimulationParams, RESULT_FIELDS
+from backends import get_backend
+from parallel import chunk_bounds
+from variance_reduction import shock_tensor
+from monte_carlo import make_seeds, check_variance_reduction
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:  # Optional dependency: tidy exports fall back to CSV
+    pa = pq = None
+    HAS_PYARROW = False
+
+# Same long format as thesis_results/baseline_dryrun/baseline_tidy.csv (run_thesis_baseline.ts)
+TIDY_COLUMNS = ('week', 'profile_id', 'sim_index', 'metric', 'value')
+TIDY_FORMATS = ('parquet', 'csv')
+DEFAULT_TIDY_CHUNK = 2000
+
+def tidy_format(path: str) -> str:
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in TIDY_FORMATS:
+        raise ValueError(f"Tidy export path must end in {' or '.join('.' + f for f in TIDY_FORMATS)}, got '{path}'")
+    return fmt
+
+def tidy_chunk(data: np.ndarray, weeks: np.ndarray, sim_offset: int) -> dict:
+    """
+    Long-format columns for an (n, T, n_fields) block, ordered sim, week,
+    metric like the TS export. `metric` holds codes into RESULT_FIELDS.
+    """
+    n, T, F = data.shape
+    return {
+        'week': np.tile(np.repeat(np.asarray(weeks, dtype=np.int32), F), n),
+        'sim_index': np.repeat(np.arange(sim_offset, sim_offset + n, dtype=np.int64), T * F),
+        'metric': np.tile(np.arange(F, dtype=np.int8), n * T),
+        'value': data.reshape(-1),
+    }
+
+class TidyWriter:
+    """
+    Appends tidy blocks to one Parquet file (one row group per block, with
+    dictionary-encoded profile_id/metric) or to one CSV file.
+    """
+
+    def __init__(self, path: str, profile_id: str):
+        self.path = path
+        self.format = tidy_format(path)
+        self.profile_id = profile_id
+        self.rows = 0
+        self._writer = None
+        self._csv = None
+        if self.format == 'parquet':
+            self._metrics = pa.array(RESULT_FIELDS, type=pa.string())
+            self._profiles = pa.array([profile_id], type=pa.string())
+            self.schema = pa.schema([
+                ('week', pa.int32()),
+                ('profile_id', pa.dictionary(pa.int8(), pa.string())),
+                ('sim_index', pa.int64()),
+                ('metric', pa.dictionary(pa.int8(), pa.string())),
+                ('value', pa.float64()),
+            ])
+            self._writer = pq.ParquetWriter(path, self.schema, compression='zstd',
+                                            use_dictionary=['profile_id', 'metric'])
+        else:
+            self._csv = open(path, 'w', newline='')
+            self._csv.write(','.join(TIDY_COLUMNS) + '\n')
+
+    def write(self, data: np.ndarray, weeks: np.ndarray, sim_offset: int):
+        cols = tidy_chunk(data, weeks, sim_offset)
+        n_rows = cols['value'].size
+        if self._writer is not None:
+            table = pa.Table.from_arrays([
+                pa.array(cols['week']),
+                pa.DictionaryArray.from_arrays(pa.array(np.zeros(n_rows, dtype=np.int8)), self._profiles),
+                pa.array(cols['sim_index']),
+                pa.DictionaryArray.from_arrays(pa.array(cols['metric']), self._metrics),
+                pa.array(cols['value']),
+            ], schema=self.schema)
+            self._writer.write_table(table, row_group_size=n_rows)
+        else:
+            frame = pd.DataFrame({
+                'week': cols['week'],
+                'profile_id': self.profile_id,
+                'sim_index': cols['sim_index'],
+                'metric': np.asarray(RESULT_FIELDS, dtype=object)[cols['metric']],
+                'value': cols['value'],
+            })
+            frame.to_csv(self._csv, header=False, index=False, float_format='%.6f', na_rep='NA')
+        self.rows += n_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._csv is not None:
+            self._csv.close()
+            self._csv = None
+
+    def __enter__(self) -> 'TidyWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _simulate_tidy_chunk(args):
+    """Wrapper for multiprocessing: full (n, T, n_fields) paths for one chunk"""
+    params, seeds, backend, variance_reduction = args
+    shocks = None if variance_reduction == 'none' else shock_tensor(params, seeds, variance_reduction)
+    batch = get_backend(backend)(params, seeds, shocks)
+    return batch.data, batch.weeks
+
+def export_tidy(params: SimulationParams, path: str, n_sims: int = 1000, profile_id: str = 'research',
+                seeds: Optional[Sequence[int]] = None, backend: str = 'python',
+                chunk_size: int = DEFAULT_TIDY_CHUNK, processes: int = None,
+                variance_reduction: str = 'none') -> str:
+    """
+    Streams every path of a Monte Carlo run to `path` (.parquet or .csv) in
+    long format: one row per (sim, week, SimResult field). Chunks are written
+    in seed order as workers finish them, with at most two chunks per worker
+    in flight, so peak memory is O(processes * chunk_size * T) whatever n_sims is.
+    Without pyarrow a .parquet path falls back to CSV next to it.
+    Returns the path actually written.
+    """
+    check_variance_reduction(variance_reduction, backend)
+    if tidy_format(path) == 'parquet' and not HAS_PYARROW:
+        warnings.warn("pyarrow is not installed; writing the tidy export as CSV")
+        path = os.path.splitext(path)[0] + '.csv'
+    if seeds is None:
+        seeds = make_seeds(n_sims, params.seed)
+    seeds = np.asarray(seeds)
+    n_sims = len(seeds)
+    processes = processes or cpu_count()
+    max_in_flight = 2 * processes
+
+    print(f"Streaming {n_sims} paths to {path}...")
+    start_time = time.time()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    bounds = iter(chunk_bounds(n_sims, chunk_size))
+    pending = deque()
+    with TidyWriter(path, profile_id) as writer, Pool(processes=processes) as pool:
+        def submit_next():
+            bound = next(bounds, None)
+            if bound is not None:
+                task = (params, seeds[bound[0]:bound[1]], backend, variance_reduction)
+                pending.append((bound[0], pool.apply_async(_simulate_tidy_chunk, (task,))))
+
+        for _ in range(max_in_flight):
+            submit_next()
+        while pending:
+            start, result = pending.popleft()
+            data, weeks = result.get()
+            writer.write(data, weeks, start)
+            del data
+            submit_next()
+
+    duration = time.time() - start_time
+    print(f"✅ {writer.rows:,} tidy rows written in {duration:.2f} seconds ({n_sims / duration:.0f} sims/sec)")
+    return path
+
+if __name__ == "__main__":
+    from export_data import research_scenarios
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output_dir = os.path.join(script_dir, "../../../thesis_results/research_tidy")
+    for name, params, filename in research_scenarios():
+        profile_id = os.path.splitext(filename)[0].replace('research_', '')
+        export_tidy(params, os.path.join(output_dir, f"{profile_id}_tidy.parquet"), n_sims=1000,
+                    profile_id=profile_id, backend='numpy')
@@ -0,0 +1,355 @@
+import ast
+import dataclasses
+import json
+import operator
+import struct
+import time
+import numpy as np
+from multiprocessing import Pool, cpu_count
+from typing import Callable, Optional, Sequence, Union
+from engine import SimulationParams, RESULT_FIELDS
+from backends import get_backend
+from parallel import chunk_bounds, default_chunk_size
+from results import SimResultBatch, FIELD_INDEX
+from monte_carlo import make_seeds
+
+# Layout: MAGIC | uint32 version | uint32 header bytes | JSON header | padding |
+# int64 seeds[n_sims] | float64 data[n_sims, T, n_fields] (C order, SimResultBatch layout).
+# Offsets are absolute and 8-byte aligned, so any process can map its own slice.
+MAGIC = b'DPTS'
+VERSION = 1
+PREAMBLE = struct.Struct('<4sII')
+ALIGN = 8
+
+# Paths per scan block are sized so one block of full paths stays around this many bytes
+BLOCK_BYTES = 64 * 2**20
+
+class Condition:
+    """Lazy per-path predicate, evaluated on (n, T, n_fields) blocks"""
+
+    def __init__(self, fn: Callable[[np.ndarray], np.ndarray]):
+        self.fn = fn
+
+    def __call__(self, block: np.ndarray) -> np.ndarray:
+        return self.fn(block)
+
+    def __and__(self, other: 'Condition') -> 'Condition':
+        return Condition(lambda block: self(block) & other(block))
+
+    def __or__(self, other: 'Condition') -> 'Condition':
+        return Condition(lambda block: self(block) | other(block))
+
+    def __invert__(self) -> 'Condition':
+        return Condition(lambda block: ~self(block))
+
+class WeekRef:
+    """One field at one week (or the all-weeks reduction), comparable to a number or another WeekRef"""
+
+    def __init__(self, name: str, values: Callable[[np.ndarray], np.ndarray]):
+        self.name = name
+        self.values = values
+
+    def _compare(self, op, other) -> Condition:
+        if isinstance(other, FieldRef):
+            raise ValueError(f"'{other.name}' covers every week; compare one week (e.g. {other.name}[0]) "
+                             f"or reduce with .any()/.all()")
+        if isinstance(other, WeekRef):
+            return Condition(lambda block: op(self.values(block), other.values(block)))
+        return Condition(lambda block: op(self.values(block), other))
+
+    def __lt__(self, other): return self._compare(operator.lt, other)
+    def __le__(self, other): return self._compare(operator.le, other)
+    def __gt__(self, other): return self._compare(operator.gt, other)
+    def __ge__(self, other): return self._compare(operator.ge, other)
+    def __eq__(self, other): return self._compare(operator.eq, other)
+    def __ne__(self, other): return self._compare(operator.ne, other)
+
+class WeekMask:
+    """`price < 0.02` over every week: reduce with .any() or .all() to get a per-path Condition"""
+
+    def __init__(self, fn: Callable[[np.ndarray], np.ndarray]):
+        self.fn = fn
+
+    def any(self) -> Condition:
+        return Condition(lambda block: self.fn(block).any(axis=1))
+
+    def all(self) -> Condition:
+        return Condition(lambda block: self.fn(block).all(axis=1))
+
+class FieldRef:
+    """`providers[51]` in a query: indexes a SimResult field by week"""
+
+    def __init__(self, name: str):
+        if name not in FIELD_INDEX:
+            raise ValueError(f"Unknown field '{name}' (available: {', '.join(RESULT_FIELDS)})")
+        self.name = name
+        self.index = FIELD_INDEX[name]
+
+    def __getitem__(self, week: int) -> WeekRef:
+        return WeekRef(f"{self.name}[{week}]", lambda block: block[:, week, self.index])
+
+    def min(self) -> WeekRef:
+        return WeekRef(f"{self.name}.min()", lambda block: block[:, :, self.index].min(axis=1))
+
+    def max(self) -> WeekRef:
+        return WeekRef(f"{self.name}.max()", lambda block: block[:, :, self.index].max(axis=1))
+
+    def _compare(self, op, other) -> WeekMask:
+        if not isinstance(other, (int, float)):
+            raise ValueError(f"'{self.name}' covers every week; compare it with a number and reduce "
+                             f"with .any()/.all()")
+        return WeekMask(lambda block: op(block[:, :, self.index], other))
+
+    def __lt__(self, other): return self._compare(operator.lt, other)
+    def __le__(self, other): return self._compare(operator.le, other)
+    def __gt__(self, other): return self._compare(operator.gt, other)
+    def __ge__(self, other): return self._compare(operator.ge, other)
+
+COMPARE_OPS = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+               ast.Eq: operator.eq, ast.NotEq: operator.ne}
+# `3 < price[0]` is evaluated as `price[0] > 3`
+FLIPPED = {operator.lt: operator.gt, operator.le: operator.ge, operator.gt: operator.lt, operator.ge: operator.le,
+           operator.eq: operator.eq, operator.ne: operator.ne}
+FIELD_REDUCTIONS = ('min', 'max')
+MASK_REDUCTIONS = ('any', 'all')
+
+def _compare(op, left, right):
+    if isinstance(left, (int, float)) and not isinstance(right, (int, float)):
+        op, left, right = FLIPPED[op], right, left
+    if isinstance(left, FieldRef) and op in (operator.eq, operator.ne):
+        raise ValueError(f"'{left.name}' over every week supports <, <=, > and >= only")
+    if not isinstance(left, (WeekRef, FieldRef)):
+        raise ValueError("A comparison needs a field on one side")
+    return op(left, right)
+
+def _evaluate(node: ast.AST):
+    """
+    Interprets the parsed query without eval: only and/or/not, comparisons,
+    numbers, field names, field[week] and field.min()/.max() /
+    (field < x).any()/.all() are allowed; anything else is a ValueError.
+    """
+    if isinstance(node, ast.BoolOp):
+        values = [_expect(_evaluate(v), Condition) for v in node.values]
+        combine = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+        result = values[0]
+        for value in values[1:]:
+            result = combine(result, value)
+        return result
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.Not):
+            return ~_expect(_evaluate(node.operand), Condition)
+        if isinstance(node.op, (ast.USub, ast.UAdd)) and isinstance(node.operand, ast.Constant):
+            value = _number(node.operand)
+            return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Compare):
+        operands = [_evaluate(node.left)] + [_evaluate(c) for c in node.comparators]
+        result = None
+        for op_node, left, right in zip(node.ops, operands, operands[1:]):
+            if type(op_node) not in COMPARE_OPS:
+                raise ValueError(f"Unsupported comparison '{type(op_node).__name__}'")
+            step = _compare(COMPARE_OPS[type(op_node)], left, right)
+            result = step if result is None else result & _expect(step, Condition)
+        return result
+    if isinstance(node, ast.Constant):
+        return _number(node)
+    if isinstance(node, ast.Name):
+        return FieldRef(node.id)
+    if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name):
+        week = _evaluate(node.slice)
+        if not isinstance(week, int):
+            raise ValueError("Weeks are indexed with an integer, e.g. providers[51]")
+        return FieldRef(node.value.id)[week]
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and not node.args and not node.keywords):
+        target, method = node.func.value, node.func.attr
+        if isinstance(target, ast.Name) and method in FIELD_REDUCTIONS:
+            return getattr(FieldRef(target.id), method)()
+        if isinstance(target, ast.Compare) and method in MASK_REDUCTIONS:
+            return getattr(_expect(_evaluate(target), WeekMask), method)()
+    raise ValueError(f"Unsupported query syntax: {ast.unparse(node)!r}")
+
+def _number(node: ast.Constant):
+    if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+        raise ValueError(f"Only numeric constants are allowed, got {node.value!r}")
+    return node.value
+
+def _expect(value, kind):
+    if not isinstance(value, kind):
+        raise ValueError("and/or/not combine per-path conditions; reduce whole-field comparisons "
+                         "with .any() or .all()" if kind is Condition else "Expected a whole-field comparison")
+    return value
+
+def parse_where(where: Union[str, Condition]) -> Condition:
+    """
+    Accepts a Condition or an expression such as
+    'providers[51] < 100 and price.min() > 0.02 and not (price < 0.01).any()'
+    """
+    if isinstance(where, Condition):
+        return where
+    try:
+        tree = ast.parse(where, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid query '{where}': {e.msg}") from None
+    condition = _evaluate(tree.body)
+    if not isinstance(condition, Condition):
+        raise ValueError(f"'{where}' is not a per-path condition")
+    return condition
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+class TrajectoryStore:
+    """
+    Full (n_sims, T, n_fields) Monte Carlo tensor in one memory-mapped file.
+    Queries scan whole-path blocks of `block_size` sims, so they touch each
+    page once and never hold more than a block of paths.
+    """
+
+    def __init__(self, path: str, mode: str = 'r'):
+        with open(path, 'rb') as f:
+            magic, version, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a trajectory store")
+            if version > VERSION:
+                raise ValueError(f"{path} has format version {version}; this reader supports up to {VERSION}")
+            self.header = json.loads(f.read(header_len))
+        if tuple(self.header['fields']) != RESULT_FIELDS:
+            raise ValueError(f"{path} was written with fields {self.header['fields']}, engine has {list(RESULT_FIELDS)}")
+        self.path = path
+        self.n_sims = self.header['n_sims']
+        self.T = self.header['T']
+        self.weeks = np.asarray(self.header['weeks'])
+        self.seeds = np.memmap(path, dtype='<i8', mode='r', offset=self.header['seeds_offset'], shape=(self.n_sims,))
+        self.data = np.memmap(path, dtype='<f8', mode=mode, offset=self.header['data_offset'],
+                              shape=(self.n_sims, self.T, len(RESULT_FIELDS)))
+        self.block_size = max(1, BLOCK_BYTES // (self.T * len(RESULT_FIELDS) * 8))
+
+    @classmethod
+    def create(cls, path: str, params: SimulationParams, seeds: Sequence[int],
+               metadata: Optional[dict] = None) -> 'TrajectoryStore':
+        """Allocates a zero-filled store for `seeds`; fill it with write() or run_to_store()"""
+        seeds = np.asarray(seeds, dtype='<i8')
+        header = {'fields': list(RESULT_FIELDS), 'n_sims': len(seeds), 'T': params.T,
+                  'weeks': list(range(params.T)), 'params': dataclasses.asdict(params),
+                  'metadata': metadata or {}, 'seeds_offset': 0, 'data_offset': 0}
+        # Offsets depend on the header length, which depends on the offsets: size it with room to spare
+        probe = json.dumps(dict(header, seeds_offset=2**62, data_offset=2**62), separators=(',', ':')).encode()
+        seeds_offset = PREAMBLE.size + len(probe) + _pad(PREAMBLE.size + len(probe))
+        header.update(seeds_offset=seeds_offset, data_offset=seeds_offset + seeds.nbytes)
+        encoded = json.dumps(header, separators=(',', ':')).encode()
+        encoded += b' ' * (seeds_offset - PREAMBLE.size - len(encoded))
+        data_bytes = len(seeds) * params.T * len(RESULT_FIELDS) * 8
+        with open(path, 'wb') as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+            f.write(encoded)
+            f.write(seeds.tobytes())
+            f.truncate(header['data_offset'] + data_bytes)
+        return cls(path, mode='r+')
+
+    @property
+    def params(self) -> SimulationParams:
+        return SimulationParams(**self.header['params'])
+
+    @property
+    def metadata(self) -> dict:
+        return self.header['metadata']
+
+    def write(self, start: int, batch: SimResultBatch):
+        """Writes a batch into sims [start, start + len(batch)); slices from different processes must not overlap"""
+        self.data[start:start + batch.n_sims] = batch.data
+        self.data.flush()
+
+    def blocks(self):
+        """(start, (n, T, n_fields) view) over the whole store"""
+        for start in range(0, self.n_sims, self.block_size):
+            yield start, self.data[start:start + self.block_size]
+
+    def column(self, name: str, weeks: Optional[Sequence[int]] = None) -> np.ndarray:
+        """(n_sims, len(weeks)) copy of one field, gathered block by block"""
+        index = FIELD_INDEX[name]
+        weeks = np.arange(self.T) if weeks is None else np.asarray(weeks)
+        out = np.empty((self.n_sims, len(weeks)))
+        for start, block in self.blocks():
+            out[start:start + len(block)] = block[:, weeks, index]
+        return out
+
+    def quantiles(self, name: str, weeks: Optional[Sequence[int]] = None,
+                  q: Sequence[float] = (0.05, 0.5, 0.95)) -> np.ndarray:
+        """(len(q), len(weeks)) quantiles of one field, matching np.percentile's 'linear' method"""
+        return np.quantile(self.column(name, weeks), q, axis=0)
+
+    def mean(self, name: str, weeks: Optional[Sequence[int]] = None) -> np.ndarray:
+        index = FIELD_INDEX[name]
+        weeks = np.arange(self.T) if weeks is None else np.asarray(weeks)
+        total = np.zeros(len(weeks))
+        for _, block in self.blocks():
+            total += block[:, weeks, index].sum(axis=0)
+        return total / self.n_sims
+
+    def where(self, where: Union[str, Condition]) -> np.ndarray:
+        """Indices of the paths matching a condition"""
+        condition = parse_where(where)
+        hits = [start + np.flatnonzero(condition(block)) for start, block in self.blocks()]
+        return np.concatenate(hits) if hits else np.empty(0, dtype=np.int64)
+
+    def paths(self, where: Union[str, Condition, None] = None,
+              index: Union[slice, Sequence[int], None] = None) -> SimResultBatch:
+        """Copies the matching paths (or an explicit index) into a SimResultBatch"""
+        if where is not None:
+            index = self.where(where)
+        if index is None:
+            index = slice(None)
+        return SimResultBatch(np.array(self.data[index]).reshape(-1, self.T, len(RESULT_FIELDS)), self.weeks)
+
+    def field(self, name: str) -> FieldRef:
+        return FieldRef(name)
+
+    def close(self):
+        """Flushes pending writes; the mapping is released once no views of it remain"""
+        if self.data.mode != 'r':
+            self.data.flush()
+        self.data = self.seeds = None
+
+    def __enter__(self) -> 'TrajectoryStore':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Per-worker store attachment, set once by the pool initializer
+_worker = {}
+
+def _init_worker(path: str, params: SimulationParams, backend: str):
+    _worker.update(store=TrajectoryStore(path, mode='r+'), params=params, backend=get_backend(backend))
+
+def _run_store_chunk(task):
+    """Simulates seeds[start:stop] straight into the worker's mapping of the store"""
+    start, seeds = task
+    _worker['store'].write(start, _worker['backend'](_worker['params'], seeds))
+    return start
+
+def run_to_store(params: SimulationParams, path: str, n_sims: int = 1000,
+                 seeds: Optional[Sequence[int]] = None, backend: str = 'python',
+                 chunk_size: Optional[int] = None, processes: Optional[int] = None) -> TrajectoryStore:
+    """
+    Runs a Monte Carlo job whose workers write disjoint sim slices of one
+    on-disk store, so the run is bounded by disk rather than RAM.
+    Returns the store opened read-only.
+    """
+    if seeds is None:
+        seeds = make_seeds(n_sims, params.seed)
+    seeds = np.asarray(seeds)
+    processes = processes or cpu_count()
+    chunk_size = chunk_size or min(10_000, default_chunk_size(len(seeds), processes))
+
+    print(f"Starting {len(seeds)} Monte Carlo Simulations into {path}...")
+    start_time = time.time()
+    TrajectoryStore.create(path, params, seeds, {'backend': backend}).close()
+    tasks = [(start, seeds[start:stop]) for start, stop in chunk_bounds(len(seeds), chunk_size)]
+    with Pool(processes=processes, initializer=_init_worker, initargs=(path, params, backend)) as pool:
+        for _ in pool.imap_unordered(_run_store_chunk, tasks):
+            pass
+
+    duration = time.time() - start_time
+    print(f"Completed in {duration:.2f} seconds ({len(seeds) / duration:.0f} sims/sec)")
+    return TrajectoryStore(path)
@@ -0,0 +1,119 @@
+import time
+import numpy as np
+from scipy.stats import norm, qmc
+from typing import List, Sequence
+from engine import SimulationParams
+from batch_engine import draw_shocks, N_SHOCKS, SHOCK_PRICE
+from backends import simulate
+from results import key_metrics
+
+VARIANCE_REDUCTION_MODES = ('none', 'antithetic', 'sobol')
+
+def antithetic_shocks(params: SimulationParams, seeds: Sequence[int]) -> np.ndarray:
+    """
+    Rows 2j and 2j+1 are mirror images: both use seeds[2j]'s draws, the second
+    negated. Odd-index seeds are unused; an odd n leaves the last row unpaired.
+    """
+    seeds = np.asarray(seeds)
+    base = draw_shocks(params, seeds[::2])
+    shocks = np.empty((len(seeds), params.T, N_SHOCKS))
+    shocks[0::2] = base
+    shocks[1::2] = -base[:len(seeds) // 2]
+    return shocks
+
+def bridge_order(T: int) -> List[tuple]:
+    """
+    Brownian bridge construction order over times 0..T: the endpoint first,
+    then midpoints breadth-first. Entries are (t, left, right, w_left, w_right, sd).
+    """
+    steps = [(T, 0, 0, 0.0, 0.0, np.sqrt(T))]
+    spans = [(0, T)]
+    while spans:
+        left, right = spans.pop(0)
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        steps.append((mid, left, right, (right - mid) / (right - left), (mid - left) / (right - left),
+                      np.sqrt((mid - left) * (right - mid) / (right - left))))
+        spans += [(left, mid), (mid, right)]
+    return steps
+
+def bridge_increments(z: np.ndarray) -> np.ndarray:
+    """
+    Maps (n, T) iid normals, in bridge_order, to the T unit increments of a
+    Brownian path. The increments are again iid N(0, 1), but the first
+    columns of z now decide the path's coarse shape.
+    """
+    n, T = z.shape
+    path = np.zeros((n, T + 1))
+    for j, (t, left, right, w_left, w_right, sd) in enumerate(bridge_order(T)):
+        path[:, t] = w_left * path[:, left] + w_right * path[:, right] + sd * z[:, j]
+    return np.diff(path, axis=1)
+
+def sobol_shocks(params: SimulationParams, seeds: Sequence[int]) -> np.ndarray:
+    """
+    Scrambled Sobol points mapped to standard normals. Each shock series is
+    built as a Brownian bridge and the series are interleaved, so the
+    best-balanced leading Sobol dimensions go to the coarse shape of every
+    series. The scramble is seeded from the seed list.
+    """
+    n, T = len(seeds), params.T
+    sampler = qmc.Sobol(d=T * N_SHOCKS, scramble=True, seed=np.random.default_rng(np.asarray(seeds)))
+    # Draw a full power-of-two block (keeps Sobol's balance properties), use the first n points
+    points = sampler.random_base2(max(0, int(np.ceil(np.log2(max(n, 1))))))[:n]
+    z = norm.ppf(np.clip(points, 1e-12, 1 - 1e-12)).reshape(n, T, N_SHOCKS)
+    shocks = np.stack([bridge_increments(z[:, :, k]) for k in range(N_SHOCKS)], axis=-1)
+    # The engine draws no price shock on the unlock week
+    if 0 <= params.investorUnlockWeek < T:
+        shocks[:, params.investorUnlockWeek, SHOCK_PRICE] = 0.0
+    return shocks
+
+def shock_tensor(params: SimulationParams, seeds: Sequence[int], variance_reduction: str = 'none') -> np.ndarray:
+    """(n_sims, T, N_SHOCKS) shock tensor for any backend that accepts `shocks=`"""
+    if variance_reduction == 'none':
+        return draw_shocks(params, seeds)
+    if variance_reduction == 'antithetic':
+        return antithetic_shocks(params, seeds)
+    if variance_reduction == 'sobol':
+        return sobol_shocks(params, seeds)
+    raise ValueError(f"Unknown variance_reduction '{variance_reduction}' "
+                     f"(available: {', '.join(VARIANCE_REDUCTION_MODES)})")
+
+def estimator_spread(params: SimulationParams, n_sims: int, replications: int = 50,
+                     variance_reduction: str = 'none', backend: str = 'numpy',
+                     metric: str = 'providers', week: int = -1) -> dict:
+    """Std across independent replications of the mean/p05/p95 estimates of one metric-week"""
+    estimates = {'mean': [], 'p05': [], 'p95': []}
+    for r in range(replications):
+        seeds = np.random.default_rng([params.seed, r]).integers(0, 1000000, n_sims)
+        batch = simulate(params, seeds, backend, shock_tensor(params, seeds, variance_reduction))
+        values = key_metrics(batch, params.T)[metric][:, week]
+        estimates['mean'].append(values.mean())
+        estimates['p05'].append(np.percentile(values, 5))
+        estimates['p95'].append(np.percentile(values, 95))
+    return {stat: float(np.std(values, ddof=1)) for stat, values in estimates.items()}
+
+def benchmark(params: SimulationParams, n_sims: int = 1024, replications: int = 50,
+              backend: str = 'numpy', metric: str = 'providers') -> List[dict]:
+    """
+    Estimator spread per mode, and the path multiple plain Monte Carlo needs to
+    match it: (std_none / std_mode)^2, since spread shrinks like 1/sqrt(n).
+    """
+    rows = []
+    for mode in VARIANCE_REDUCTION_MODES:
+        began = time.perf_counter()
+        spread = estimator_spread(params, n_sims, replications, mode, backend, metric)
+        rows.append({'mode': mode, 'seconds': time.perf_counter() - began, **spread})
+    for row in rows:
+        for stat in ('mean', 'p05', 'p95'):
+            row[f'{stat}_efficiency'] = (rows[0][stat] / row[stat]) ** 2 if row[stat] > 0 else float('nan')
+    return rows
+
+if __name__ == "__main__":
+    from export_data import research_scenarios
+    for name, params, _ in research_scenarios():
+        print(f"\n{name}: final-week providers, 1024 paths x 50 replications")
+        print(f"{'mode':>11} {'sd(mean)':>10} {'sd(p05)':>10} {'sd(p95)':>10} {'x paths (mean/p05/p95)':>24}")
+        for row in benchmark(params):
+            gains = f"{row['mean_efficiency']:.1f} / {row['p05_efficiency']:.1f} / {row['p95_efficiency']:.1f}"
+            print(f"{row['mode']:>11} {row['mean']:>10.3f} {row['p05']:>10.3f} {row['p95']:>10.3f} {gains:>24}")